@@ -0,0 +1,182 @@
+import asyncio
+import os
+from contextlib import asynccontextmanager
+
+from config import ASYNC_POOL_SIZE, ORDERS_FETCH_CHUNK
+from config import ARCHIVE_PAGE_SIZE
+from database import (ORDER_GROUPS_QUERY, ORDER_DETAILS_QUERY,
+                      UPDATE_STATUS_QUERY, UPDATE_STATUS_IF_UNCHANGED_QUERY,
+                      ORDER_STATUS_QUERY, bulk_status_query, orders_query, archive_query)
+from order_row import make_row_builder
+
+# aiomysql و qasync اختياريان: بدونهما يعمل البرنامج بالـ threads المعتادة
+try:
+    import aiomysql
+    from pymysql.constants import CLIENT
+except ImportError:
+    aiomysql = None
+
+try:
+    import qasync
+except ImportError:
+    qasync = None
+
+
+def async_available():
+    return aiomysql is not None and qasync is not None
+
+
+def async_enabled():
+    """تفعيل الطبقة غير المتزامنة عبر DB_ASYNC=1 في ملف .env"""
+    return os.getenv('DB_ASYNC') == '1' and async_available()
+
+
+def create_event_loop(app):
+    """ربط حلقة asyncio بحلقة أحداث Qt"""
+    loop = qasync.QEventLoop(app)
+    asyncio.set_event_loop(loop)
+    return loop
+
+
+class AsyncDatabase:
+    """نسخة غير متزامنة من Database تعمل فوق مجمع اتصالات صغير
+
+    عدة استعلامات (تحديث القائمة، تفاصيل الطلب، تغيير الحالة) تتشارك
+    المجمع دون thread لكل طلب. إلغاء المهمة يلغي الاستعلام الجاري.
+    """
+
+    def __init__(self, pool_size=ASYNC_POOL_SIZE):
+        self.host = os.getenv('DB_HOST')
+        self.user = os.getenv('DB_USER')
+        self.password = os.getenv('DB_PASSWORD')
+        self.database = os.getenv('DB_DATABASE_office')
+        self.port = int(os.getenv('DB_PORT') or 3306)
+        self.pool_size = pool_size
+        self.pool = None
+        self._pool_lock = asyncio.Lock()
+
+    async def connect(self):
+        async with self._pool_lock:
+            if self.pool is None:
+                self.pool = await aiomysql.create_pool(
+                    host=self.host,
+                    user=self.user,
+                    password=self.password,
+                    db=self.database,
+                    port=self.port,
+                    charset='utf8mb4',
+                    minsize=1,
+                    maxsize=self.pool_size,
+                    # عدد الصفوف المطابقة لا المتغيرة، لفحص تعارض ModifiedDate
+                    client_flag=CLIENT.FOUND_ROWS,
+                )
+        return self.pool
+
+    @asynccontextmanager
+    async def acquire(self):
+        """حجز اتصال من المجمع مع التخلص منه إذا أُلغي الاستعلام في منتصفه"""
+        pool = self.pool or await self.connect()
+        conn = await pool.acquire()
+        try:
+            yield conn
+        except asyncio.CancelledError:
+            # الاتصال في حالة غير معروفة بعد الإلغاء فلا نعيده للمجمع
+            conn.close()
+            raise
+        finally:
+            pool.release(conn)
+
+    async def get_orders(self, since=None):
+        async with self.acquire() as conn:
+            async with conn.cursor() as cursor:
+                await cursor.execute(*orders_query(since))
+                build = make_row_builder([d[0] for d in cursor.description])
+                return [build(row) for row in await cursor.fetchall()]
+
+    async def iter_orders(self, chunk_size=ORDERS_FETCH_CHUNK, since=None):
+        """جلب الطلبات على دفعات من مؤشر غير مخزّن، الأحدث أولاً"""
+        async with self.acquire() as conn:
+            async with conn.cursor(aiomysql.SSCursor) as cursor:
+                await cursor.execute(*orders_query(since))
+                build = make_row_builder([d[0] for d in cursor.description])
+                while True:
+                    batch = await cursor.fetchmany(chunk_size)
+                    if not batch:
+                        break
+                    yield [build(row) for row in batch]
+
+    async def get_archived_orders(self, before, before_id=None, search=None, limit=ARCHIVE_PAGE_SIZE):
+        async with self.acquire() as conn:
+            async with conn.cursor() as cursor:
+                await cursor.execute(*archive_query(before, before_id, search, limit))
+                build = make_row_builder([d[0] for d in cursor.description])
+                return [build(row) for row in await cursor.fetchall()]
+
+    async def get_order_details(self, order_id):
+        async with self.acquire() as conn:
+            async with conn.cursor(aiomysql.DictCursor) as cursor:
+                await cursor.execute(ORDER_GROUPS_QUERY, (order_id,))
+                groups_result = await cursor.fetchone()
+
+                await cursor.execute(ORDER_DETAILS_QUERY, (order_id,))
+                order = await cursor.fetchone()
+
+        if order and groups_result:
+            order.update(groups_result)
+        return order if order else {}
+
+    async def update_order_status(self, order_id, status):
+        async with self.acquire() as conn:
+            async with conn.cursor() as cursor:
+                await cursor.execute(UPDATE_STATUS_QUERY, (status, order_id))
+            await conn.commit()
+
+    async def update_orders_status(self, order_ids, status):
+        """تغيير حالة عدة طلبات في معاملة واحدة"""
+        if not order_ids:
+            return
+        async with self.acquire() as conn:
+            try:
+                async with conn.cursor() as cursor:
+                    await cursor.execute(bulk_status_query(len(order_ids)),
+                                         (status, *order_ids))
+                await conn.commit()
+            except Exception:
+                await conn.rollback()
+                raise
+
+    async def apply_status_changes(self, changes):
+        """تطبيق تغييرات الحالة في معاملة واحدة مع فحص التعارض (انظر Database)"""
+        results = []
+        conflicted = {}
+        async with self.acquire() as conn:
+            try:
+                async with conn.cursor() as cursor:
+                    for order_id, status, base_modified in changes:
+                        if order_id in conflicted:
+                            results.append((False, *conflicted[order_id]))
+                            continue
+                        if base_modified is None:
+                            matched = await cursor.execute(UPDATE_STATUS_QUERY, (status, order_id))
+                        else:
+                            matched = await cursor.execute(UPDATE_STATUS_IF_UNCHANGED_QUERY,
+                                                           (status, order_id, base_modified))
+                        await cursor.execute(ORDER_STATUS_QUERY, (order_id,))
+                        server_state = await cursor.fetchone() or (None, None)
+                        if not matched:
+                            conflicted[order_id] = server_state
+                        results.append((bool(matched), *server_state))
+                await conn.commit()
+            except Exception:
+                await conn.rollback()
+                raise
+        return results
+
+    def get_order_statuses(self):
+        return ["Pending", "Accepted", "Rejected"]
+
+    async def close_connection(self):
+        if self.pool is not None:
+            self.pool.close()
+            await self.pool.wait_closed()
+            self.pool = None
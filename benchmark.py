@@ -0,0 +1,231 @@
+import argparse
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from order_row import make_row_builder
+from order_cache import OrdersCache
+from order_columns import np
+from database import Database, UPDATE_STATUS_QUERY, ORDERS_QUERY
+
+# أعمدة نتيجة استعلام القائمة الحالي (o.* مع بيانات العميل والمجموعات)
+LIST_COLUMNS = [
+    'ID', 'Client_ID', 'LandAddress', 'LandArea', 'Basement', 'GroundFloor',
+    'Floor1', 'Floor2', 'Roof', 'Type', 'Details', 'Offers', 'Accept_Reject',
+    'Date', 'ModifiedDate', 'customer_name', 'customer_phone', 'customer_email',
+    'custom_groups', 'group_colors', 'group_ids',
+]
+
+STATUSES = [b'Pending', b'Accepted', b'Rejected']
+
+# استعلام القائمة بكل أعمدة الطلب كما كان قبل حصره في أعمدة القائمة، للمقارنة
+FULL_ORDERS_QUERY = (ORDERS_QUERY[:ORDERS_QUERY.index('o.ID,')]
+                     + 'o.*,\n        c.Email as customer_email,\n        '
+                     + ORDERS_QUERY[ORDERS_QUERY.index('c.Name'):])
+
+
+def make_raw_rows(count):
+    """صفوف خام بنفس شكل ما يرجعه المؤشر الخام"""
+    base = datetime(2020, 1, 1)
+    rows = []
+    for i in range(count):
+        date = (base + timedelta(hours=i)).strftime('%Y-%m-%d %H:%M:%S').encode()
+        rows.append((
+            str(i + 1).encode(), str(i % 500).encode(),
+            'حي النرجس، شارع رقم {}'.format(i).encode(), b'600',
+            b'120', b'250', b'250', b'180', b'60', 'فيلا سكنية'.encode(),
+            ('تفاصيل طلب التصميم ' * 12).encode(),
+            'تصميم معماري;تصميم إنشائي;إشراف'.encode(), STATUSES[i % 3],
+            date, date, 'عميل رقم {}'.format(i).encode(),
+            '05{:08d}'.format(i).encode(), 'client{}@example.com'.format(i).encode(),
+            'مجموعة أ,مجموعة ب'.encode() if i % 4 == 0 else None,
+            b'#ff0000,#00ff00' if i % 4 == 0 else None,
+            b'1,2' if i % 4 == 0 else None,
+        ))
+    return rows
+
+
+def decode_as_dicts(rows):
+    """محاكاة المؤشر القاموسي: فك كل الأعمدة وبناء قاموس لكل صف"""
+    decoded = []
+    for raw in rows:
+        order = {}
+        for name, value in zip(LIST_COLUMNS, raw):
+            if value is None:
+                order[name] = None
+            elif name in ('ID', 'Client_ID'):
+                order[name] = int(value)
+            elif name == 'group_ids':
+                order[name] = [int(part) for part in value.decode().split(',')]
+            elif name in ('Date', 'ModifiedDate'):
+                order[name] = datetime.fromisoformat(value.decode())
+            else:
+                order[name] = value.decode('utf-8')
+        decoded.append(order)
+    return decoded
+
+
+def decode_as_rows(rows):
+    build = make_row_builder(LIST_COLUMNS)
+    return [build(raw) for raw in rows]
+
+
+def measure(decoder, rows):
+    start = time.perf_counter()
+    decoder(rows)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    result = decoder(rows)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return elapsed, size
+
+
+def bench_row_decode(count):
+    rows = make_raw_rows(count)
+    print(f"\n=== فك صفوف القائمة ({count} طلب) ===\n")
+    print(f"{'الطريقة':<12} {'الزمن (ms)':>12} {'الذاكرة/طلب (bytes)':>22}")
+    print("-" * 48)
+    for name, decoder in (('dict', decode_as_dicts), ('OrderRow', decode_as_rows)):
+        elapsed, size = measure(decoder, rows)
+        print(f"{name:<12} {elapsed * 1000:>12.1f} {size / count:>22.0f}")
+
+
+def scan_filter(orders, status, search):
+    """الفلترة السابقة: مرور على كل الطلبات ثم فرز"""
+    result = [order for order in orders
+              if order['Accept_Reject'] == status
+              and (search in order['customer_name'].lower() or search in order['customer_phone'])]
+    result.sort(key=lambda order: order['Date'], reverse=True)
+    return result
+
+
+def bench_filter(count, repeat=20):
+    orders = decode_as_rows(make_raw_rows(count))
+    cache = OrdersCache()
+    for order in orders:
+        cache.upsert(order)
+    status, search = 'Pending', '12'
+
+    print(f"\n=== الفلترة والترتيب ({count} طلب، {'NumPy' if np is not None else 'array'}) ===\n")
+    print(f"{'الطريقة':<22} {'المتوسط (ms)':>14}")
+    print("-" * 38)
+    for name, func in (
+        ('scan + sort', lambda: scan_filter(orders, status, search)),
+        ('columns: status', lambda: cache.columns.select(status)),
+        ('columns: query', lambda: cache.query(status, search=search)),
+    ):
+        _, mean = time_calls(func, repeat)
+        print(f"{name:<22} {mean * 1000:>14.2f}")
+
+
+def time_calls(func, repeat):
+    """زمن أول استدعاء (يشمل التحليل/الإعداد) ومتوسط الاستدعاءات التالية"""
+    start = time.perf_counter()
+    func()
+    first = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return first, (time.perf_counter() - start) / repeat
+
+
+def bench_statements(repeat):
+    """مقارنة البروتوكول النصي بالاستعلامات المعدة مسبقاً على قاعدة البيانات"""
+    db = Database()
+    if not db.connect():
+        return
+    cursor = db.connection.cursor()
+    cursor.execute("SELECT ID, Accept_Reject FROM orders ORDER BY Date DESC LIMIT 1")
+    order_id, status = cursor.fetchone()
+    cursor.close()
+
+    def update_and_rollback():
+        # تنفيذ التحديث ثم التراجع عنه حتى لا تتغير البيانات
+        cursor = db.statement_cursor('update_status')
+        cursor.execute(UPDATE_STATUS_QUERY, (status, order_id))
+        db.connection.rollback()
+        db.release_cursor(cursor)
+
+    statements = (
+        ('get_orders', db.get_orders),
+        ('get_order_details', lambda: db.get_order_details(order_id)),
+        ('update_order_status', update_and_rollback),
+    )
+
+    print(f"\n=== التحليل + التنفيذ ({repeat} تكرار) ===\n")
+    print(f"{'الاستعلام':<22} {'الوضع':<10} {'أول مرة (ms)':>14} {'المتوسط (ms)':>14}")
+    print("-" * 64)
+    for name, func in statements:
+        for use_prepared in (False, True):
+            db.use_prepared = use_prepared
+            # اتصال جديد لكل وضع حتى يشمل أول استدعاء إعداد الاستعلام
+            db.close_connection()
+            db.connect()
+            first, mean = time_calls(func, repeat)
+            mode = 'prepared' if use_prepared else 'text'
+            print(f"{name:<22} {mode:<10} {first * 1000:>14.2f} {mean * 1000:>14.2f}")
+    print_round_trips(db)
+    db.close_connection()
+
+
+def print_round_trips(db):
+    """عدد الرحلات للخادم لكل عملية (الاتصال وإعداد الاستعلامات محسوبان فيها)"""
+    print(f"\n{'العملية':<22} {'الاستدعاءات':>12} {'الرحلات':>10} {'لكل استدعاء':>12}")
+    print("-" * 60)
+    for name, (calls, round_trips) in sorted(db.round_trip_stats().items()):
+        print(f"{name:<22} {calls:>12} {round_trips:>10} {round_trips / calls:>12.2f}")
+    print(f"إعادة اتصال: {db.reconnects}، إعادة محاولة: {db.retries}")
+    for name, received in sorted(db.bytes_received.items()):
+        print(f"{name:<22} {received:>14,} بايت")
+
+
+def query_bytes(db, query):
+    mark = db.start_bytes()
+    cursor = db.connection.cursor(raw=True)
+    cursor.execute(query)
+    cursor.fetchall()
+    cursor.close()
+    db.finish_bytes('query', mark)
+    return db.last_bytes
+
+
+def bench_bytes():
+    """البايتات المنقولة في تحديث كامل: كل الأعمدة / أعمدة القائمة، مع الضغط وبدونه"""
+    print(f"\n{'الاستعلام':<22} {'الضغط':<8} {'البايتات':>14}")
+    print("-" * 46)
+    for compress in (False, True):
+        db = Database()
+        db.compress = compress
+        db.measure_bytes = True
+        db.ensure_connection()
+        mode = 'on' if compress else 'off'
+        print(f"{'o.* (السابق)':<22} {mode:<8} {query_bytes(db, FULL_ORDERS_QUERY):>14,}")
+        db.get_orders()
+        print(f"{'get_orders':<22} {mode:<8} {db.last_bytes:>14,}")
+        db.close_connection()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="قياس أداء قائمة الطلبات")
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--statements', type=int, metavar='REPEAT',
+                        help="مقارنة النصي بالمعد مسبقاً على قاعدة البيانات الفعلية")
+    parser.add_argument('--filter', action='store_true', help="قياس فلترة وترتيب الكاش")
+    parser.add_argument('--bytes', action='store_true',
+                        help="حجم تحديث القائمة على قاعدة البيانات الفعلية")
+    args = parser.parse_args()
+    if args.statements:
+        bench_statements(args.statements)
+    elif args.bytes:
+        bench_bytes()
+    elif args.filter:
+        bench_filter(args.rows)
+    else:
+        bench_row_decode(args.rows)
+
+
+if __name__ == '__main__':
+    main()
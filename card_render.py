@@ -0,0 +1,180 @@
+from PyQt6.QtWidgets import QWidget, QSizePolicy
+from PyQt6.QtCore import Qt, QRectF
+from PyQt6.QtGui import QColor, QFont, QFontMetrics, QPainter, QPixmap, QPixmapCache
+
+from config import STATUS_COLORS, STATUS_TRANSLATIONS, CARD_PIXMAP_CACHE_KB
+from offers import offer_tokens, offers_label
+
+# هوامش محتوى الكرت والمسافة بين أسطره
+CONTENT_MARGIN_X = 10
+CONTENT_MARGIN_Y = 8
+ROW_SPACING = 4
+NAME_WIDTH = 200
+PHONE_WIDTH = 150
+
+
+def configure_card_cache(limit_kb=CARD_PIXMAP_CACHE_KB):
+    """حد ذاكرة صور الكروت؛ الأقدم استخداماً يُحذف عند تجاوزه"""
+    QPixmapCache.setCacheLimit(limit_kb)
+
+
+def format_phone(phone):
+    phone = str(phone or '')
+    if phone.startswith('0'):
+        phone = '966' + phone[1:]
+    elif not phone.startswith('966'):
+        phone = '966' + phone
+    return ' '.join([phone[:3], phone[3:6], phone[6:]])
+
+
+def card_version(order):
+    """نسخة البيانات المعروضة في الكرت؛ تتغير مع أي حقل ظاهر"""
+    return hash((
+        order.get('customer_name'),
+        order.get('customer_phone'),
+        order.get('Accept_Reject'),
+        order.get('Offers'),
+        order.get('Date'),
+        order.get('custom_groups'),
+        order.get('group_colors'),
+    ))
+
+
+def _font(base, point_size, bold=False, family=None):
+    font = QFont(base)
+    if family:
+        font.setFamily(family)
+        font.setStyleHint(QFont.StyleHint.Monospace)
+    font.setPointSizeF(point_size)
+    font.setBold(bold)
+    return font
+
+
+class OrderContentView(QWidget):
+    """محتوى الكرت (الاسم، الجوال، الحالة، العروض، المجموعات) مرسوماً كصورة واحدة
+
+    تشكيل النص العربي مكلف، فيُرسم المحتوى مرة واحدة ويُحفظ في QPixmapCache
+    بمفتاح (رقم الطلب، نسخة البيانات، العرض، DPI)، وإعادة الرسم بعدها نسخ
+    للصورة فقط. تغيير الحالة أو أي حقل ظاهر يغير النسخة فيُرسم من جديد.
+    """
+
+    def __init__(self, order_data, parent=None):
+        super().__init__(parent)
+        self.order_data = order_data
+        self.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Fixed)
+        self.update_fonts()
+
+    def update_fonts(self):
+        base = self.font()
+        self.name_font = _font(base, 10, bold=True)
+        self.phone_font = _font(base, 9, bold=True, family='monospace')
+        self.text_font = _font(base, 9)
+        self.date_font = _font(base, 8)
+        self.dot_font = _font(base, 14)
+        self.setFixedHeight(self.content_height())
+
+    def groups(self):
+        if not self.order_data.get('custom_groups'):
+            return []
+        names = self.order_data['custom_groups'].split(',')
+        colors = self.order_data['group_colors'].split(',') if self.order_data.get('group_colors') else []
+        return [(name.strip(), colors[i] if i < len(colors) else '#666')
+                for i, name in enumerate(names)]
+
+    def row_heights(self):
+        heights = [max(QFontMetrics(self.name_font).height(),
+                       QFontMetrics(self.text_font).height()) + 2]
+        if self.order_data.get('Offers'):
+            heights.append(QFontMetrics(self.text_font).height() + 4)
+        if self.order_data.get('custom_groups'):
+            heights.append(QFontMetrics(self.dot_font).height())
+        return heights
+
+    def content_height(self):
+        heights = self.row_heights()
+        return sum(heights) + ROW_SPACING * (len(heights) - 1) + 2 * CONTENT_MARGIN_Y
+
+    def refresh(self):
+        """إعادة الرسم بعد تغيير البيانات؛ المفتاح الجديد يتجاوز الصورة القديمة"""
+        self.setFixedHeight(self.content_height())
+        self.update()
+
+    def cache_key(self, width, dpr):
+        return (f"order-card:{self.order_data['ID']}:{card_version(self.order_data)}:"
+                f"{width}:{dpr}:{self.layoutDirection().value}")
+
+    def paintEvent(self, event):
+        dpr = self.devicePixelRatioF()
+        key = self.cache_key(self.width(), dpr)
+        pixmap = QPixmapCache.find(key)
+        if pixmap is None:
+            pixmap = QPixmap(round(self.width() * dpr), round(self.height() * dpr))
+            pixmap.setDevicePixelRatio(dpr)
+            pixmap.fill(Qt.GlobalColor.transparent)
+            painter = QPainter(pixmap)
+            self.paint_content(painter)
+            painter.end()
+            QPixmapCache.insert(key, pixmap)
+        painter = QPainter(self)
+        painter.drawPixmap(0, 0, pixmap)
+        painter.end()
+
+    def paint_content(self, painter):
+        painter.setRenderHint(QPainter.RenderHint.TextAntialiasing)
+        rtl = self.layoutDirection() == Qt.LayoutDirection.RightToLeft
+        width = self.width() - 2 * CONTENT_MARGIN_X
+        align = (Qt.AlignmentFlag.AlignRight if rtl else Qt.AlignmentFlag.AlignLeft) | \
+            Qt.AlignmentFlag.AlignVCenter
+
+        def span(x, y, w, h):
+            # x من بداية السطر (اليمين في العربية)
+            if rtl:
+                return QRectF(CONTENT_MARGIN_X + width - x - w, y, w, h)
+            return QRectF(CONTENT_MARGIN_X + x, y, w, h)
+
+        def draw(font, color, rect, text):
+            painter.setFont(font)
+            painter.setPen(QColor(color))
+            text = QFontMetrics(font).elidedText(text, Qt.TextElideMode.ElideRight, int(rect.width()))
+            painter.drawText(rect, align, text)
+
+        heights = self.row_heights()
+        y = CONTENT_MARGIN_Y
+
+        # الاسم | الجوال | الحالة
+        h = heights.pop(0)
+        draw(self.name_font, '#333', span(0, y, NAME_WIDTH - 15, h),
+             self.order_data.get('customer_name') or '')
+        draw(self.phone_font, '#666', span(NAME_WIDTH, y, PHONE_WIDTH, h),
+             f"{format_phone(self.order_data.get('customer_phone'))} |")
+        status = self.order_data.get('Accept_Reject', '')
+        status_x = NAME_WIDTH + PHONE_WIDTH + 6
+        draw(self.text_font, STATUS_COLORS.get(status, '#666'),
+             span(status_x, y, max(width - status_x, 0), h),
+             STATUS_TRANSLATIONS.get(status, status))
+        y += h + ROW_SPACING
+
+        # العروض وتاريخ الطلب في نهاية السطر
+        if self.order_data.get('Offers'):
+            h = heights.pop(0)
+            date = self.order_data['Date'].strftime('%Y-%m-%d') if self.order_data.get('Date') else ''
+            date_width = QFontMetrics(self.date_font).horizontalAdvance(date) + 4
+            draw(self.date_font, '#666', span(width - date_width, y, date_width, h), date)
+            draw(self.text_font, '#666', span(0, y, max(width - date_width - 10, 0), h),
+                 offers_label(offer_tokens(self.order_data['Offers'])))
+            y += h + ROW_SPACING
+
+        # المجموعات بنقطة ملونة قبل كل اسم
+        if self.order_data.get('custom_groups'):
+            h = heights.pop(0)
+            x = 0
+            dot_width = QFontMetrics(self.dot_font).horizontalAdvance('•') + 4
+            text_metrics = QFontMetrics(self.text_font)
+            for name, color in self.groups():
+                if x >= width:
+                    break
+                draw(self.dot_font, color, span(x, y, dot_width, h), '•')
+                x += dot_width
+                name_width = min(text_metrics.horizontalAdvance(name) + 4, max(width - x, 0))
+                draw(self.text_font, '#666', span(x, y, name_width, h), name)
+                x += name_width + 6
@@ -0,0 +1,212 @@
+import argparse
+import csv
+import json
+import sys
+
+from config import ORDER_STATUSES, STATUS_TRANSLATIONS, FIELD_TRANSLATIONS
+from database import Database
+from selection_state import format_selection_time, load_selection_levels, load_selection_times
+
+# هذا الملف لا يستورد PyQt6 حتى يعمل بسرعة من cron والسكربتات
+
+
+def format_value(value):
+    if hasattr(value, 'strftime'):
+        return value.strftime('%Y-%m-%d %H:%M')
+    return '' if value is None else str(value)
+
+
+def print_json(data):
+    print(json.dumps(data, ensure_ascii=False, default=format_value))
+
+
+def cmd_list(db, args):
+    levels = load_selection_levels()
+    shown = 0
+    for batch in db.iter_filtered_orders(args.status, args.search):
+        for order in batch:
+            level = levels.get(str(order['ID']), 0)
+            if args.contacted and level == 0:
+                continue
+            if args.json:
+                print_json({**order.to_dict(), 'selection_level': level})
+            else:
+                print('\t'.join([
+                    str(order['ID']),
+                    order['Accept_Reject'] or '',
+                    format_value(order['Date']),
+                    order['customer_name'] or '',
+                    order['customer_phone'] or '',
+                    str(level),
+                ]))
+            shown += 1
+            if args.limit and shown >= args.limit:
+                return 0
+    return 0
+
+
+def cmd_details(db, args):
+    order = db.get_order_details(args.order_id)
+    if not order:
+        print(f"الطلب {args.order_id} غير موجود", file=sys.stderr)
+        return 1
+    if args.json:
+        print_json(order)
+        return 0
+    for key, value in order.items():
+        print(f"{FIELD_TRANSLATIONS.get(key, key)}: {format_value(value)}")
+    return 0
+
+
+def read_status_csv(path, default_status):
+    """صفوف (رقم الطلب[, الحالة]) من ملف CSV؛ الصفوف غير الرقمية (العناوين) تُتجاهل"""
+    changes = []
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        for row in csv.reader(f):
+            if not row or not row[0].strip().isdigit():
+                continue
+            status = row[1].strip() if len(row) > 1 and row[1].strip() else default_status
+            if status not in ORDER_STATUSES:
+                raise ValueError(f"حالة غير معروفة للطلب {row[0]}: {status}")
+            changes.append((int(row[0]), status))
+    return changes
+
+
+def cmd_status(db, args):
+    changes = [(order_id, args.status) for order_id in args.order_ids]
+    if args.csv:
+        changes.extend(read_status_csv(args.csv, args.status))
+    if not changes:
+        print("لم يُحدد أي طلب", file=sys.stderr)
+        return 1
+    if any(status is None for _, status in changes):
+        print("حدد الحالة عبر --set أو في العمود الثاني من الملف", file=sys.stderr)
+        return 1
+    # كل التغييرات في معاملة واحدة دون فحص التعارض
+    results = db.apply_status_changes([(order_id, status, None) for order_id, status in changes])
+    missing = [order_id for (order_id, _), (_, server_status, _) in zip(changes, results)
+               if server_status is None]
+    for order_id in missing:
+        print(f"الطلب {order_id} غير موجود", file=sys.stderr)
+    print(f"تم تغيير حالة {len(changes) - len(missing)} طلب")
+    return 1 if missing else 0
+
+
+def cmd_stats(db, args):
+    counts = db.count_orders_by_status()
+    contacted = sum(1 for level in load_selection_levels().values() if level)
+    if args.json:
+        print_json({'statuses': counts, 'total': sum(counts.values()), 'contacted': contacted})
+        return 0
+    for status, count in sorted(counts.items(), key=lambda item: str(item[0])):
+        print(f"{STATUS_TRANSLATIONS.get(status, status)}\t{count}")
+    print(f"المجموع\t{sum(counts.values())}")
+    print(f"تم الاتصال\t{contacted}")
+    return 0
+
+
+def cmd_selections(db, args):
+    levels = load_selection_levels()
+    times = load_selection_times()
+    rows = sorted((int(order_id), level, times.get(order_id))
+                  for order_id, level in levels.items() if level)
+    if args.json:
+        print_json([{'order_id': order_id, 'level': level, 'selected_at': selected_at}
+                    for order_id, level, selected_at in rows])
+        return 0
+    for order_id, level, selected_at in rows:
+        print(f"{order_id}\t{level}\t{format_selection_time(selected_at)}")
+    return 0
+
+
+def cmd_summary(db, args):
+    from order_summary import install_summary, rebuild_summary, uninstall_summary, verify_summary
+
+    if args.action == 'install':
+        print(f"تم إنشاء جدول الملخص وتعبئته بـ {install_summary(db)} طلب")
+    elif args.action == 'rebuild':
+        print(f"تمت إعادة تعبئة جدول الملخص بـ {rebuild_summary(db)} طلب")
+    elif args.action == 'uninstall':
+        uninstall_summary(db)
+        print("تم حذف جدول الملخص والـ triggers")
+    else:
+        mismatches = verify_summary(db)
+        for order_id, problem in mismatches[:50]:
+            print(f"{order_id}\t{problem}")
+        if mismatches:
+            print(f"{len(mismatches)} طلب لا يطابق الملخص؛ شغّل: python cli.py summary rebuild",
+                  file=sys.stderr)
+            return 1
+        print("جدول الملخص مطابق")
+    return 0
+
+
+def cmd_export(db, args):
+    from order_export import export_orders
+
+    def progress(written, scanned):
+        print(f"\r{written} / {scanned}", end='', file=sys.stderr, flush=True)
+
+    count = export_orders(db, args.path, status=args.status, search=args.search,
+                          contacted_only=args.contacted, progress=progress)
+    print(file=sys.stderr)
+    print(f"تم تصدير {count} طلب إلى {args.path}")
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="نظام إدارة طلبات التصميم - سطر الأوامر")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    export = commands.add_parser('export', help="تصدير الطلبات المفلترة إلى CSV أو XLSX")
+    export.add_argument('path', help="مسار الملف (.csv أو .xlsx)")
+    export.add_argument('--status', choices=ORDER_STATUSES)
+    export.add_argument('--search', default='', help="بحث في اسم العميل أو رقم الجوال")
+    export.add_argument('--contacted', action='store_true', help="الطلبات التي تم الاتصال بها فقط")
+    export.set_defaults(handler=cmd_export)
+
+    listing = commands.add_parser('list', help="عرض الطلبات المطابقة للفلتر")
+    listing.add_argument('--status', choices=ORDER_STATUSES)
+    listing.add_argument('--search', default='', help="بحث في اسم العميل أو رقم الجوال")
+    listing.add_argument('--contacted', action='store_true', help="الطلبات التي تم الاتصال بها فقط")
+    listing.add_argument('--limit', type=int, default=0, help="أقصى عدد من الطلبات")
+    listing.add_argument('--json', action='store_true', help="سطر JSON لكل طلب")
+    listing.set_defaults(handler=cmd_list)
+
+    details = commands.add_parser('details', help="تفاصيل طلب")
+    details.add_argument('order_id', type=int)
+    details.add_argument('--json', action='store_true')
+    details.set_defaults(handler=cmd_details)
+
+    status = commands.add_parser('status', help="تغيير حالة طلب أو أكثر في معاملة واحدة")
+    status.add_argument('order_ids', type=int, nargs='*')
+    status.add_argument('--set', dest='status', choices=ORDER_STATUSES)
+    status.add_argument('--csv', help="ملف CSV بأعمدة: رقم الطلب، الحالة (اختياري)")
+    status.set_defaults(handler=cmd_status)
+
+    stats = commands.add_parser('stats', help="عدد الطلبات لكل حالة")
+    stats.add_argument('--json', action='store_true')
+    stats.set_defaults(handler=cmd_stats)
+
+    selections = commands.add_parser('selections', help="الطلبات التي تم الاتصال بها ومستواها")
+    selections.add_argument('--json', action='store_true')
+    selections.set_defaults(handler=cmd_selections)
+
+    summary = commands.add_parser('summary', help="جدول ملخص القائمة (order_list_summary)")
+    summary.add_argument('action', choices=['install', 'rebuild', 'verify', 'uninstall'])
+    summary.set_defaults(handler=cmd_summary)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    db = Database()
+    try:
+        return args.handler(db, args)
+    finally:
+        db.close_connection()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -47,3 +47,44 @@ FIELD_TRANSLATIONS = {
     "ProjectNumber": "رقم المشروع",
     "project_status": "حالة المشروع"
 }
+
+# عدد الطلبات في كل دفعة عند الجلب التدريجي
+ORDERS_FETCH_CHUNK = 200
+
+# عدد الاتصالات في مجمع قاعدة البيانات غير المتزامنة
+ASYNC_POOL_SIZE = 4
+
+# عدد الصفوف في كل دفعة عند تصدير الطلبات
+EXPORT_CHUNK = 1000
+
+# تباعد إعادة محاولة إرسال تغييرات الحالة المعلقة (بالملي ثانية)
+OUTBOX_RETRY_BASE = 2000
+OUTBOX_RETRY_MAX = 120000
+
+# نافذة الطلبات المحملة افتراضياً: المعلقة + المحسومة خلال آخر N شهر (0 = كل الطلبات)
+# يمكن تغييرها عبر ORDERS_WINDOW_MONTHS في ملف .env
+HOT_WINDOW_MONTHS = 6
+
+# الطلبات الأقدم تُجلب عند الحاجة بصفحات، مع حد أقصى لما يبقى منها في الذاكرة
+ARCHIVE_PAGE_SIZE = 200
+ARCHIVE_CACHE_LIMIT = 2000
+
+# حد ذاكرة صور محتوى الكروت المرسومة مسبقاً (بالكيلوبايت)
+CARD_PIXMAP_CACHE_KB = 20480
+
+# بناء الكروت على دفعات: عدد الكروت الأولى المبنية فوراً، ومدة كل شريحة بعدها (ms)
+RENDER_FIRST_BATCH = 30
+RENDER_SLICE_MS = 8
+
+# عدد threads عمليات قاعدة البيانات في الواجهة (لكل منها اتصال خاص)
+DB_POOL_THREADS = 3
+
+# ping اتصالات قاعدة البيانات بعد هذه المدة من الخمول فقط (بالثواني)
+DB_KEEPALIVE_IDLE = 300
+
+# نسخة القراءة (DB_REPLICA_HOST في .env): قراءة الطلبات التي كتبها البرنامج
+# من الخادم الأساسي لهذه المدة على الأقل بعد الكتابة (بالثواني)
+DB_REPLICA_PIN = 10
+# أقصى تأخر مقبول لنسخة القراءة عن الأساسي، وكل كم ثانية يُفحص (أو تُجرب بعد تعطلها)
+DB_REPLICA_MAX_LAG = 30
+DB_REPLICA_CHECK = 30
@@ -1,23 +1,384 @@
 import os
+import functools
+import inspect
+import threading
+import time as clock
+from collections import Counter
+from datetime import date, datetime, time, timedelta
 from dotenv import load_dotenv
 import mysql.connector
-from mysql.connector import Error
+from mysql.connector import Error, errorcode
+from mysql.connector.constants import ClientFlag
+from config import (ORDERS_FETCH_CHUNK, HOT_WINDOW_MONTHS, ARCHIVE_PAGE_SIZE, DB_KEEPALIVE_IDLE,
+                    RENDER_FIRST_BATCH, DB_REPLICA_PIN, DB_REPLICA_MAX_LAG, DB_REPLICA_CHECK)
+from order_row import make_row_builder
 
 # تحميل المتغيرات البيئية من الملف
 # استخدام المسار الكامل للملف
 env_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.env')
 load_dotenv(env_path)
 
-class Database:
+# استعلام قائمة الطلبات (الأحدث أولاً)
+# أعمدة القائمة فقط (ORDER_ROW_FIELDS)؛ التفاصيل والنصوص الطويلة تُجلب
+# عند فتح نافذة الطلب (ORDER_DETAILS_QUERY)
+ORDERS_QUERY_TEMPLATE = """
+    SELECT 
+        o.ID,
+        o.Accept_Reject,
+        o.Offers,
+        o.Date,
+        o.ModifiedDate,
+        c.Name as customer_name,
+        c.Phone as customer_phone,
+        GROUP_CONCAT(DISTINCT cg.name) as custom_groups,
+        GROUP_CONCAT(DISTINCT cg.color) as group_colors,
+        GROUP_CONCAT(DISTINCT cg.id ORDER BY cg.id) as group_ids
+    FROM orders o 
+    JOIN clientdata c ON o.Client_ID = c.ID
+    LEFT JOIN task_group_assignments tga ON o.ID = tga.order_id
+    LEFT JOIN custom_groups cg ON tga.group_id = cg.id
+    WHERE o.Offers IS NOT NULL AND o.Offers != ''{conditions}
+    GROUP BY o.ID
+    ORDER BY o.Date DESC
+"""
+
+ORDERS_QUERY = ORDERS_QUERY_TEMPLATE.format(conditions='')
+
+# الطلبات "الساخنة": المعلقة دائماً + المحسومة منذ بداية النافذة
+HOT_ORDERS_QUERY = ORDERS_QUERY_TEMPLATE.format(conditions="""
+      AND (o.Accept_Reject = 'Pending' OR o.Date >= %s OR o.Date IS NULL)""")
+
+# نفس أعمدة القائمة من جدول order_list_summary (انظر order_summary.py)،
+# قراءة بالفهرس دون ربط المجموعات وتجميعها في كل تحديث
+SUMMARY_QUERY_TEMPLATE = """
+    SELECT ID, Accept_Reject, Offers, Date, ModifiedDate,
+           customer_name, customer_phone, custom_groups, group_colors, group_ids
+    FROM order_list_summary{conditions}
+    ORDER BY Date DESC
+"""
+
+SUMMARY_ORDERS_QUERY = SUMMARY_QUERY_TEMPLATE.format(conditions='')
+
+HOT_SUMMARY_ORDERS_QUERY = SUMMARY_QUERY_TEMPLATE.format(conditions="""
+    WHERE Accept_Reject = 'Pending' OR Date >= %s OR Date IS NULL""")
+
+# اسم المؤشر المعد مسبقاً لكل استعلام قائمة
+ORDERS_STATEMENT_NAMES = {
+    ORDERS_QUERY: 'orders',
+    HOT_ORDERS_QUERY: 'hot_orders',
+    SUMMARY_ORDERS_QUERY: 'summary_orders',
+    HOT_SUMMARY_ORDERS_QUERY: 'hot_summary_orders',
+}
+
+def summary_enabled():
+    """قراءة القائمة من order_list_summary عبر ORDERS_SUMMARY=1 في ملف .env"""
+    return os.getenv('ORDERS_SUMMARY') == '1'
+
+def hot_window_start(months=None):
+    """بداية نافذة الطلبات المحسومة المحملة افتراضياً؛ None يعني كل الطلبات
+
+    تُقرب لبداية اليوم حتى لا تتغير النافذة بين تحديث وآخر في نفس اليوم.
+    """
+    if months is None:
+        months = int(os.getenv('ORDERS_WINDOW_MONTHS', HOT_WINDOW_MONTHS))
+    if months <= 0:
+        return None
+    return datetime.combine(date.today() - timedelta(days=30 * months), time.min)
+
+def orders_query(since=None, summary=None):
+    """استعلام القائمة ومعاملاته: كل الطلبات أو نافذة since فقط
+
+    summary يقرأ من جدول الملخص بدل الربط (الافتراضي حسب summary_enabled).
+    """
+    if summary is None:
+        summary = summary_enabled()
+    if since is None:
+        return (SUMMARY_ORDERS_QUERY if summary else ORDERS_QUERY), ()
+    return (HOT_SUMMARY_ORDERS_QUERY if summary else HOT_ORDERS_QUERY), (since,)
+
+def archive_query(before, before_id=None, search=None, limit=ARCHIVE_PAGE_SIZE):
+    """صفحة من الطلبات المحسومة الأقدم من (before, before_id)، الأحدث أولاً
+
+    الترقيم بالمفتاح (التاريخ ثم الرقم) لا بالإزاحة، فلا تتكرر الطلبات ولا
+    تُفقد بين الصفحات حتى لو تساوت التواريخ.
+    """
+    conditions = ["o.Accept_Reject != 'Pending'"]
+    params = []
+    if before_id is None:
+        conditions.append("o.Date < %s")
+        params.append(before)
+    else:
+        conditions.append("(o.Date < %s OR (o.Date = %s AND o.ID < %s))")
+        params.extend([before, before, before_id])
+    search_sql, search_params = order_filter_conditions(search=search)
+    sql = ''.join(f"\n      AND {condition}" for condition in conditions) + search_sql
+    query = ORDERS_QUERY_TEMPLATE.format(conditions=sql).replace(
+        "ORDER BY o.Date DESC", "ORDER BY o.Date DESC, o.ID DESC\n    LIMIT %s")
+    return query, (*params, *search_params, limit)
+
+def first_screen_query(status=None, since=None, limit=RENDER_FIRST_BATCH, summary=None):
+    """أحدث limit طلباً لفلتر الحالة فقط ضمن نافذة since، للشاشة الأولى
+
+    أرقام الطلبات تُختار أولاً من جدول الطلبات وحده (بفهرس الحالة والتاريخ
+    إن وجد) ثم تُربط بالعميل والمجموعات، فلا يعتمد الزمن على عدد الطلبات.
+    """
+    if summary is None:
+        summary = summary_enabled()
+    prefix = '' if summary else 'o.'
+    conditions = []
+    params = []
+    if status:
+        conditions.append(f"{prefix}Accept_Reject = %s")
+        params.append(status)
+    if since is not None:
+        conditions.append(f"({prefix}Accept_Reject = 'Pending' OR {prefix}Date >= %s "
+                          f"OR {prefix}Date IS NULL)")
+        params.append(since)
+    params.append(limit)
+    if summary:
+        where = "\n    WHERE " + " AND ".join(conditions) if conditions else ''
+        return SUMMARY_QUERY_TEMPLATE.format(conditions=where) + "    LIMIT %s\n", tuple(params)
+    ids_query = (
+        "SELECT o.ID FROM orders o\n"
+        "        WHERE o.Offers IS NOT NULL AND o.Offers != ''"
+        + ''.join(f"\n          AND {condition}" for condition in conditions)
+        + "\n        ORDER BY o.Date DESC\n        LIMIT %s")
+    query = ORDERS_QUERY_TEMPLATE.format(conditions='').replace(
+        "FROM orders o ", f"FROM ({ids_query}) f\n    JOIN orders o ON o.ID = f.ID")
+    return query, tuple(params)
+
+ORDERS_COUNT_TEMPLATE = """
+    SELECT COUNT(*)
+    FROM orders o 
+    JOIN clientdata c ON o.Client_ID = c.ID
+    WHERE o.Offers IS NOT NULL AND o.Offers != ''{conditions}
+"""
+
+# عدد الطلبات لكل حالة
+STATUS_COUNTS_QUERY = """
+    SELECT o.Accept_Reject, COUNT(*)
+    FROM orders o
+    WHERE o.Offers IS NOT NULL AND o.Offers != ''
+    GROUP BY o.Accept_Reject
+"""
+
+def order_filter_conditions(status=None, search=None):
+    """شروط SQL إضافية تطابق فلاتر الواجهة (الحالة والبحث)"""
+    conditions = []
+    params = []
+    if status:
+        conditions.append("o.Accept_Reject = %s")
+        params.append(status)
+    if search:
+        conditions.append("(c.Name LIKE %s OR c.Phone LIKE %s)")
+        like = f"%{search}%"
+        params.extend([like, like])
+    sql = ''.join(f"\n      AND {condition}" for condition in conditions)
+    return sql, tuple(params)
+
+# استعلام منفصل لجلب مجموعات الطلب
+ORDER_GROUPS_QUERY = """
+    SELECT 
+        GROUP_CONCAT(DISTINCT cg.name) as custom_groups,
+        GROUP_CONCAT(DISTINCT cg.color) as group_colors
+    FROM orders o 
+    LEFT JOIN task_group_assignments tga ON o.ID = tga.order_id
+    LEFT JOIN custom_groups cg ON tga.group_id = cg.id
+    WHERE o.ID = %s
+"""
+
+# استعلام تفاصيل الطلب مع العميل والمشروع
+ORDER_DETAILS_QUERY = """
+    SELECT 
+        o.*,
+        c.*,
+        p.ProjectName,
+        p.ProjectNumber,
+        p.Status as project_status
+    FROM orders o 
+    JOIN clientdata c ON o.Client_ID = c.ID
+    LEFT JOIN projects p ON o.ID = p.QuotationID
+    WHERE o.ID = %s
+"""
+
+UPDATE_STATUS_QUERY = "UPDATE orders SET Accept_Reject = %s, ModifiedDate = NOW() WHERE ID = %s"
+
+# التحديث فقط إذا لم يتغير الطلب على الخادم منذ آخر قراءة
+UPDATE_STATUS_IF_UNCHANGED_QUERY = (
+    "UPDATE orders SET Accept_Reject = %s, ModifiedDate = NOW() "
+    "WHERE ID = %s AND ModifiedDate <=> %s"
+)
+
+ORDER_STATUS_QUERY = "SELECT Accept_Reject, ModifiedDate FROM orders WHERE ID = %s"
+
+def bulk_status_query(count):
+    """استعلام تغيير حالة عدد من الطلبات دفعة واحدة"""
+    placeholders = ', '.join(['%s'] * count)
+    return ("UPDATE orders SET Accept_Reject = %s, ModifiedDate = NOW() "
+            f"WHERE ID IN ({placeholders})")
+
+# أخطاء انقطاع الاتصال التي تستحق إعادة الاتصال
+LOST_CONNECTION_ERRORS = {
+    errorcode.CR_SERVER_GONE_ERROR,
+    errorcode.CR_SERVER_LOST,
+    errorcode.CR_SERVER_LOST_EXTENDED,
+}
+
+def replica_enabled():
+    """توجيه القراءات لنسخة قراءة عبر DB_REPLICA_HOST في ملف .env"""
+    return bool(os.getenv('DB_REPLICA_HOST'))
+
+class RecentWrites:
+    """الطلبات التي كتبها هذا البرنامج مؤخراً، مشتركة بين كل اتصالاته
+
+    قراءتها تذهب للخادم الأساسي حتى تلحق بها نسخة القراءة، فيرى المستخدم
+    ما كتبه بنفسه (read-your-writes).
+    """
+
     def __init__(self):
-        self.host = os.getenv('DB_HOST')
-        self.user = os.getenv('DB_USER')
-        self.password = os.getenv('DB_PASSWORD')
+        self.lock = threading.Lock()
+        self.orders = {}  # رقم الطلب -> وقت آخر كتابة
+        self.last = None
+
+    def add(self, order_ids):
+        now = clock.monotonic()
+        with self.lock:
+            for order_id in order_ids:
+                self.orders[order_id] = now
+            self.last = now
+
+    def pinned(self, order_id=None, window=DB_REPLICA_PIN):
+        """هل كُتب الطلب (أو أي طلب إذا كان None) خلال آخر window ثانية"""
+        cutoff = clock.monotonic() - window
+        with self.lock:
+            if order_id is None:
+                return self.last is not None and self.last >= cutoff
+            written = self.orders.get(order_id)
+            if written is not None and written < cutoff:
+                del self.orders[order_id]
+                return False
+            return written is not None
+
+recent_writes = RecentWrites()
+
+def db_operation(idempotent=True, route=None):
+    """عملية قاعدة بيانات: قفل الاتصال وعد رحلاتها وإعادة المحاولة عند الانقطاع
+
+    الاستعلام يُنفذ مباشرة دون فحص الاتصال مسبقاً. إذا انقطع الاتصال
+    يُعاد فتحه، وتُعاد العملية مرة واحدة إن كانت آمنة للتكرار (idempotent).
+    عمليات الكتابة لا تُعاد لأن الخادم ربما طبقها قبل الانقطاع.
+    في الدوال المولّدة تُعاد المحاولة فقط إذا فشلت قبل أول دفعة.
+
+    route يجعل العملية قراءة تُنفذ على نسخة القراءة إن كانت مناسبة (انظر
+    Database.read_replica): 'list' لقراءات القائمة، و 'order' لقراءة طلب
+    واحد رقمه أول معامل. إذا فشلت على النسخة تُعاد على الخادم الأساسي.
+    """
+    def decorate(method):
+        name = method.__name__
+
+        def replica_for(self, args):
+            if route is None:
+                return None
+            return self.read_replica(args[0] if route == 'order' else None)
+
+        if inspect.isgeneratorfunction(method):
+            @functools.wraps(method)
+            def stream(self, *args, **kwargs):
+                replica = replica_for(self, args)
+                if replica is not None:
+                    batches = getattr(replica, name)(*args, **kwargs)
+                    try:
+                        first = next(batches)
+                    except StopIteration:
+                        return
+                    except Error as e:
+                        self.replica_failed(e)
+                    else:
+                        yield first
+                        yield from batches
+                        return
+                with self.lock:
+                    self.begin(name)
+                    mark = self.start_bytes()
+                    for attempt in range(2):
+                        batches = method(self, *args, **kwargs)
+                        try:
+                            first = next(batches)
+                            break
+                        except StopIteration:
+                            return
+                        except Error as e:
+                            if not self.handle_error(e) or not idempotent or attempt:
+                                raise
+                            self.retries += 1
+                    yield first
+                    yield from batches
+                    self.finish_bytes(name, mark)
+            return stream
+
+        @functools.wraps(method)
+        def call(self, *args, **kwargs):
+            replica = replica_for(self, args)
+            if replica is not None:
+                try:
+                    return getattr(replica, name)(*args, **kwargs)
+                except Error as e:
+                    self.replica_failed(e)
+            with self.lock:
+                self.begin(name)
+                mark = self.start_bytes()
+                try:
+                    result = method(self, *args, **kwargs)
+                except Error as e:
+                    if not self.handle_error(e) or not idempotent:
+                        raise
+                    self.retries += 1
+                    result = method(self, *args, **kwargs)
+                self.finish_bytes(name, mark)
+                return result
+        return call
+    return decorate
+
+class Database:
+    def __init__(self, role='primary'):
+        # نسخة القراءة تأخذ ما لم يُحدد لها (المستخدم، كلمة المرور، المنفذ) من الأساسي
+        prefix = 'DB_REPLICA_' if role == 'replica' else 'DB_'
+        self.role = role
+        self.host = os.getenv(f'{prefix}HOST')
+        self.user = os.getenv(f'{prefix}USER') or os.getenv('DB_USER')
+        self.password = os.getenv(f'{prefix}PASSWORD') or os.getenv('DB_PASSWORD')
         self.database = os.getenv('DB_DATABASE_office')
-        self.port = os.getenv('DB_PORT')
+        self.port = os.getenv(f'{prefix}PORT') or os.getenv('DB_PORT')
         self.connection = None
+        # القراءات تذهب لنسخة القراءة إن وُجدت، والكتابة للأساسي دائماً
+        self.replica = Database('replica') if role == 'primary' and replica_enabled() else None
+        self.replica_down_until = 0.0
+        self.replica_checked = 0.0
+        self.replica_lag = 0
+        # الاستعلامات الثابتة تُعد مرة واحدة لكل اتصال (البروتوكول الثنائي)
+        self.use_prepared = os.getenv('DB_PREPARED', '1') != '0'
+        self.prepared_cursors = {}
+        self.prepared_connection = None
+        # العمليات على الاتصال واحدة تلو الأخرى (keepalive قد يأتي من thread آخر)
+        self.lock = threading.RLock()
+        self.last_used = clock.monotonic()
+        # عدد الرحلات للخادم لكل عملية: الاستعلامات، الإعداد، الحفظ، الاتصال، ping
+        self.operation = None
+        self.calls = Counter()
+        self.round_trips = Counter()
+        self.reconnects = 0
+        self.retries = 0
+        self.connected_once = False
+        # ضغط البروتوكول لمكاتب الاتصال البطيء (DB_COMPRESS=1 في ملف .env)
+        self.compress = os.getenv('DB_COMPRESS') == '1'
+        # قياس البايتات المستلمة لكل عملية (DB_MEASURE_BYTES=1)؛ يكلف رحلتين إضافيتين
+        self.measure_bytes = os.getenv('DB_MEASURE_BYTES') == '1'
+        self.bytes_received = Counter()
+        self.last_bytes = None
+        self.bytes_overhead = {}  # الاتصال -> حجم رد استعلام القياس نفسه
         
     def connect(self):
+        self.count_round_trip()
         try:
             self.connection = mysql.connector.connect(
                 host=self.host,
@@ -25,89 +386,415 @@ class Database:
                 password=self.password,
                 database=self.database,
                 port=self.port,
-                auth_plugin='mysql_native_password'
+                auth_plugin='mysql_native_password',
+                # امتداد C إن كان مثبتاً، وإلا التنفيذ بـ Python (use_pure=False يفشل بدونه)
+                use_pure=not mysql.connector.HAVE_CEXT,
+                compress=self.compress,
+                # عدد الصفوف المطابقة لا المتغيرة، لفحص تعارض ModifiedDate
+                client_flags=[ClientFlag.FOUND_ROWS]
             )
             return True
         except Error as e:
             print(f"Error connecting to database: {e}")
             return False
-            
-    def get_orders(self):
-        if not self.connection or not self.connection.is_connected():
-            self.connect()
-        
+
+    def ensure_connection(self):
+        """فتح الاتصال إن لم يكن مفتوحاً، ورفع خطأ إذا تعذر الاتصال
+
+        لا يُفحص الاتصال المفتوح بـ ping (رحلة إضافية قبل كل استعلام)؛
+        الانقطاع يُكتشف من خطأ الاستعلام نفسه (انظر db_operation).
+        """
+        if self.connection is None:
+            reconnecting = self.connected_once
+            if not self.connect():
+                raise Error("Database is unreachable")
+            self.connected_once = True
+            if reconnecting:
+                self.reconnects += 1
+
+    def begin(self, operation):
+        self.operation = operation
+        self.calls[operation] += 1
+        self.last_used = clock.monotonic()
+
+    def count_round_trip(self, count=1):
+        self.round_trips[self.operation] += count
+
+    def execute(self, cursor, query, params=()):
+        self.count_round_trip()
+        cursor.execute(query, params)
+
+    def commit(self):
+        self.count_round_trip()
+        self.connection.commit()
+
+    def rollback(self):
+        try:
+            self.count_round_trip()
+            self.connection.rollback()
+        except Error as e:
+            # الخطأ الأصلي أهم؛ الاتصال المنقطع يُهمل ويُعاد فتحه لاحقاً
+            self.handle_error(e)
+
+    def handle_error(self, error):
+        """إهمال الاتصال إذا كان الخطأ انقطاعاً؛ يُرجع True في هذه الحالة"""
+        if getattr(error, 'errno', None) not in LOST_CONNECTION_ERRORS:
+            return False
+        self.drop_connection()
+        return True
+
+    def read_replica(self, order_id=None):
+        """نسخة القراءة لهذه القراءة، أو None لقراءتها من الخادم الأساسي
+
+        الأساسي يُستخدم إذا تعطلت النسخة مؤخراً، أو زاد تأخرها عن
+        DB_REPLICA_MAX_LAG، أو كتب هذا البرنامج الطلب (أو أي طلب في قراءات
+        القائمة) قبل أقل من DB_REPLICA_PIN ثانية أو من تأخر النسخة.
+        """
+        if self.replica is None:
+            return None
+        now = clock.monotonic()
+        if now < self.replica_down_until:
+            return None
+        if now - self.replica_checked >= DB_REPLICA_CHECK:
+            self.replica_checked = now
+            try:
+                lag = self.replica.replication_lag()
+            except Error as e:
+                self.replica_failed(e)
+                return None
+            if lag is None or lag > DB_REPLICA_MAX_LAG:
+                print(f"Read replica is behind ({lag}s); reading from primary")
+                self.replica_down_until = now + DB_REPLICA_CHECK
+                self.replica_checked = 0.0
+                return None
+            self.replica_lag = lag
+        if recent_writes.pinned(order_id, max(DB_REPLICA_PIN, self.replica_lag + 1)):
+            return None
+        return self.replica
+
+    def replica_failed(self, error):
+        """تعطيل نسخة القراءة لفترة؛ القراءات تذهب للأساسي ثم يُعاد فحصها"""
+        print(f"Read replica failed, reading from primary: {error}")
+        self.replica_down_until = clock.monotonic() + DB_REPLICA_CHECK
+        self.replica_checked = 0.0
+        with self.replica.lock:
+            self.replica.drop_connection()
+
+    @db_operation()
+    def replication_lag(self):
+        """تأخر هذه النسخة عن الأساسي بالثواني؛ None إذا توقف النسخ
+
+        إذا لم يكن الخادم نسخة أو لم تكن هناك صلاحية لمعرفة الحالة يُعد
+        التأخر صفراً ويبقى الاعتماد على مدة التثبيت بعد الكتابة.
+        """
+        self.ensure_connection()
+
         cursor = self.connection.cursor(dictionary=True)
-        query = """
-            SELECT 
-                o.*,
-                c.Name as customer_name,
-                c.Phone as customer_phone,
-                c.Email as customer_email,
-                GROUP_CONCAT(DISTINCT cg.name) as custom_groups,
-                GROUP_CONCAT(DISTINCT cg.color) as group_colors
-            FROM orders o 
-            JOIN clientdata c ON o.Client_ID = c.ID
-            LEFT JOIN task_group_assignments tga ON o.ID = tga.order_id
-            LEFT JOIN custom_groups cg ON tga.group_id = cg.id
-            WHERE o.Offers IS NOT NULL AND o.Offers != ''
-            GROUP BY o.ID
-            ORDER BY o.Date DESC
+        try:
+            try:
+                self.execute(cursor, "SHOW REPLICA STATUS")
+            except Error as e:
+                if e.errno == errorcode.ER_SPECIFIC_ACCESS_DENIED_ERROR:
+                    return 0
+                if e.errno != errorcode.ER_PARSE_ERROR:
+                    raise
+                # MariaDB و MySQL قبل 8.0.22
+                self.execute(cursor, "SHOW SLAVE STATUS")
+            status = cursor.fetchone()
+            cursor.fetchall()
+        finally:
+            cursor.close()
+        if not status:
+            return 0
+        lag = status.get('Seconds_Behind_Source', status.get('Seconds_Behind_Master'))
+        return None if lag is None else int(lag)
+
+    def drop_connection(self):
+        connection, self.connection = self.connection, None
+        self.prepared_cursors = {}
+        self.prepared_connection = None
+        if connection is not None:
+            try:
+                connection.close()
+            except Error:
+                pass
+
+    def keepalive(self, idle=DB_KEEPALIVE_IDLE):
+        """ping بعد الخمول فقط، حتى لا يكتشف أول استعلام بعده أن الاتصال انقطع
+
+        لا ينتظر إذا كان الاتصال مشغولاً بعملية أخرى. إذا فشل الـ ping
+        يُهمل الاتصال ويُفتح من جديد عند الاستعلام التالي.
         """
-        cursor.execute(query)
-        orders = cursor.fetchall()
+        if self.replica is not None:
+            self.replica.keepalive(idle)
+        if self.connection is None or clock.monotonic() - self.last_used < idle:
+            return
+        if not self.lock.acquire(blocking=False):
+            return
+        try:
+            self.begin('keepalive')
+            self.count_round_trip()
+            self.connection.ping(reconnect=False)
+        except Error:
+            self.drop_connection()
+        finally:
+            self.lock.release()
+
+    def server_bytes_sent(self):
+        """Bytes_sent للجلسة كما يحسبها الخادم (بعد الضغط إن كان مفعلاً)"""
+        cursor = self.connection.cursor()
+        cursor.execute("SHOW SESSION STATUS LIKE 'Bytes_sent'")
+        (_, value), = cursor.fetchall()
         cursor.close()
+        return int(value)
+
+    def start_bytes(self):
+        if not self.measure_bytes:
+            return None
+        self.ensure_connection()
+        if self.connection not in self.bytes_overhead:
+            first = self.server_bytes_sent()
+            self.bytes_overhead = {self.connection: self.server_bytes_sent() - first}
+        return self.connection, self.server_bytes_sent()
+
+    def finish_bytes(self, operation, mark):
+        # بعد إعادة الاتصال يبدأ عداد الجلسة من جديد فلا يصح الفرق
+        if mark is None or mark[0] is not self.connection:
+            return
+        connection, before = mark
+        self.last_bytes = self.server_bytes_sent() - before - self.bytes_overhead[connection]
+        self.bytes_received[operation] += self.last_bytes
+
+    def round_trip_stats(self):
+        """{العملية: (عدد الاستدعاءات، عدد الرحلات للخادم)}؛ قراءات النسخة باسم replica:العملية"""
+        stats = {name: (self.calls[name], self.round_trips[name]) for name in self.calls}
+        if self.replica is not None:
+            stats.update({f"replica:{name}": value
+                          for name, value in self.replica.round_trip_stats().items()})
+        return stats
+            
+    def statement_cursor(self, name, dictionary=False):
+        """مؤشر لأحد الاستعلامات الثابتة
+
+        في الوضع المعد مسبقاً يُحفظ مؤشر لكل استعلام على الاتصال الحالي،
+        فلا يعيد الخادم تحليل النص في كل مرة. عند إعادة الاتصال تُهمل
+        المؤشرات القديمة وتُعد الاستعلامات من جديد تلقائياً.
+        """
+        if not self.use_prepared:
+            if dictionary:
+                return self.connection.cursor(dictionary=True)
+            # مؤشر خام: تُفك أعمدة القائمة فقط إلى OrderRow
+            return self.connection.cursor(raw=True, buffered=False)
+
+        if self.prepared_connection is not self.connection:
+            self.prepared_cursors = {}
+            self.prepared_connection = self.connection
+        cursor = self.prepared_cursors.get(name)
+        if cursor is None:
+            cursor = self.connection.cursor(prepared=True, dictionary=dictionary)
+            self.prepared_cursors[name] = cursor
+            self.count_round_trip()  # إعداد الاستعلام عند أول تنفيذ
+        return cursor
+
+    def release_cursor(self, cursor):
+        # المؤشرات المعدة تبقى مفتوحة لإعادة استخدامها
+        if cursor not in self.prepared_cursors.values():
+            cursor.close()
+
+    @db_operation(route='list')
+    def get_orders(self, since=None):
+        self.ensure_connection()
+        
+        query, params = orders_query(since)
+        cursor = self.statement_cursor(ORDERS_STATEMENT_NAMES[query])
+        self.execute(cursor, query, params)
+        build = make_row_builder(cursor.column_names)
+        orders = [build(row) for row in cursor.fetchall()]
+        self.release_cursor(cursor)
         return orders
+
+    @db_operation(route='list')
+    def iter_orders(self, chunk_size=ORDERS_FETCH_CHUNK, since=None):
+        """جلب الطلبات على دفعات من مؤشر غير مخزّن، الأحدث أولاً
+
+        since يحصر الطلبات المحسومة فيما بعد هذا التاريخ (انظر hot_window_start).
+        """
+        self.ensure_connection()
+
+        # المؤشر غير المخزّن يقرأ الصفوف من الخادم عند الطلب
+        query, params = orders_query(since)
+        cursor = self.statement_cursor(ORDERS_STATEMENT_NAMES[query])
+        try:
+            self.execute(cursor, query, params)
+            build = make_row_builder(cursor.column_names)
+            while True:
+                batch = cursor.fetchmany(chunk_size)
+                if not batch:
+                    break
+                yield [build(row) for row in batch]
+        finally:
+            # في حال التوقف المبكر نستهلك باقي النتيجة قبل إغلاق المؤشر
+            if self.connection.unread_result:
+                self.connection.consume_results()
+            self.release_cursor(cursor)
         
+    @db_operation(route='list')
+    def count_orders(self, status=None, search=None):
+        self.ensure_connection()
+
+        conditions, params = order_filter_conditions(status, search)
+        cursor = self.connection.cursor()
+        self.execute(cursor, ORDERS_COUNT_TEMPLATE.format(conditions=conditions), params)
+        (count,) = cursor.fetchone()
+        cursor.close()
+        return count
+
+    @db_operation(route='list')
+    def count_orders_by_status(self):
+        """{status: count} لكل الطلبات التي لها عروض"""
+        self.ensure_connection()
+
+        cursor = self.connection.cursor()
+        self.execute(cursor, STATUS_COUNTS_QUERY)
+        counts = dict(cursor.fetchall())
+        cursor.close()
+        return counts
+
+    @db_operation(route='list')
+    def iter_filtered_orders(self, status=None, search=None, chunk_size=ORDERS_FETCH_CHUNK):
+        """جلب الطلبات المطابقة للفلتر على دفعات من مؤشر غير مخزّن"""
+        self.ensure_connection()
+
+        conditions, params = order_filter_conditions(status, search)
+        cursor = self.connection.cursor(raw=True, buffered=False)
+        try:
+            self.execute(cursor, ORDERS_QUERY_TEMPLATE.format(conditions=conditions), params)
+            build = make_row_builder(cursor.column_names)
+            while True:
+                batch = cursor.fetchmany(chunk_size)
+                if not batch:
+                    break
+                yield [build(row) for row in batch]
+        finally:
+            if self.connection.unread_result:
+                self.connection.consume_results()
+            cursor.close()
+
+    @db_operation(route='list')
+    def get_first_screen(self, status=None, since=None, limit=RENDER_FIRST_BATCH):
+        """الشاشة الأولى للفلتر الحالي قبل اكتمال التحميل (انظر first_screen_query)"""
+        self.ensure_connection()
+
+        query, params = first_screen_query(status, since, limit)
+        cursor = self.connection.cursor(raw=True)
+        self.execute(cursor, query, params)
+        build = make_row_builder(cursor.column_names)
+        orders = [build(row) for row in cursor.fetchall()]
+        cursor.close()
+        return orders
+
+    @db_operation(route='list')
+    def get_archived_orders(self, before, before_id=None, search=None, limit=ARCHIVE_PAGE_SIZE):
+        """صفحة من الطلبات المحسومة خارج النافذة (انظر archive_query)"""
+        self.ensure_connection()
+
+        query, params = archive_query(before, before_id, search, limit)
+        cursor = self.connection.cursor(raw=True)
+        self.execute(cursor, query, params)
+        build = make_row_builder(cursor.column_names)
+        orders = [build(row) for row in cursor.fetchall()]
+        cursor.close()
+        return orders
+
+    @db_operation(idempotent=False)
     def update_order_status(self, order_id, status):
-        if not self.connection or not self.connection.is_connected():
-            self.connect()
+        self.ensure_connection()
             
+        cursor = self.statement_cursor('update_status')
+        self.execute(cursor, UPDATE_STATUS_QUERY, (status, order_id))
+        self.commit()
+        recent_writes.add([order_id])
+        self.release_cursor(cursor)
+        
+    @db_operation(idempotent=False)
+    def update_orders_status(self, order_ids, status):
+        """تغيير حالة عدة طلبات في معاملة واحدة"""
+        if not order_ids:
+            return
+        self.ensure_connection()
+
         cursor = self.connection.cursor()
-        query = "UPDATE orders SET Accept_Reject = %s, ModifiedDate = NOW() WHERE ID = %s"
-        cursor.execute(query, (status, order_id))
-        self.connection.commit()
-        cursor.close()
+        try:
+            self.execute(cursor, bulk_status_query(len(order_ids)), (status, *order_ids))
+            self.commit()
+            recent_writes.add(order_ids)
+        except Error:
+            self.rollback()
+            raise
+        finally:
+            cursor.close()
+        
+    @db_operation(idempotent=False)
+    def apply_status_changes(self, changes):
+        """تطبيق تغييرات الحالة في معاملة واحدة مع فحص التعارض
+
+        changes: [(order_id, status, base_modified)]، و base_modified=None
+        يعني التحديث دون فحص. يُرجع لكل تغيير (ok, server_status, server_modified)
+        حيث ok=False يعني أن ModifiedDate تغير على الخادم فلم يُطبق التغيير.
+        """
+        self.ensure_connection()
+
+        cursor = self.connection.cursor(buffered=True)
+        results = []
+        conflicted = {}
+        try:
+            for order_id, status, base_modified in changes:
+                if order_id in conflicted:
+                    results.append((False, *conflicted[order_id]))
+                    continue
+                if base_modified is None:
+                    self.execute(cursor, UPDATE_STATUS_QUERY, (status, order_id))
+                else:
+                    self.execute(cursor, UPDATE_STATUS_IF_UNCHANGED_QUERY,
+                                   (status, order_id, base_modified))
+                matched = cursor.rowcount
+                self.execute(cursor, ORDER_STATUS_QUERY, (order_id,))
+                server_state = cursor.fetchone() or (None, None)
+                if not matched:
+                    conflicted[order_id] = server_state
+                results.append((bool(matched), *server_state))
+            self.commit()
+            recent_writes.add([order_id for order_id, _, _ in changes])
+        except Error:
+            self.rollback()
+            raise
+        finally:
+            cursor.close()
+        return results
         
+    @db_operation(route='order')
     def get_order_details(self, order_id):
-        if not self.connection or not self.connection.is_connected():
-            self.connect()
+        self.ensure_connection()
             
-        cursor = self.connection.cursor(dictionary=True)
-        
         # استعلام منفصل لجلب المجموعات
-        groups_query = """
-            SELECT 
-                GROUP_CONCAT(DISTINCT cg.name) as custom_groups,
-                GROUP_CONCAT(DISTINCT cg.color) as group_colors
-            FROM orders o 
-            LEFT JOIN task_group_assignments tga ON o.ID = tga.order_id
-            LEFT JOIN custom_groups cg ON tga.group_id = cg.id
-            WHERE o.ID = %s
-        """
-        cursor.execute(groups_query, (order_id,))
+        cursor = self.statement_cursor('order_groups', dictionary=True)
+        self.execute(cursor, ORDER_GROUPS_QUERY, (order_id,))
         groups_result = cursor.fetchone()
+        cursor.fetchall()
+        self.release_cursor(cursor)
         
         # استعلام رئيسي لجلب باقي المعلومات
-        main_query = """
-            SELECT 
-                o.*,
-                c.*,
-                p.ProjectName,
-                p.ProjectNumber,
-                p.Status as project_status
-            FROM orders o 
-            JOIN clientdata c ON o.Client_ID = c.ID
-            LEFT JOIN projects p ON o.ID = p.QuotationID
-            WHERE o.ID = %s
-        """
-        cursor.execute(main_query, (order_id,))
+        cursor = self.statement_cursor('order_details', dictionary=True)
+        self.execute(cursor, ORDER_DETAILS_QUERY, (order_id,))
         order = cursor.fetchone()
+        # استهلاك أي صفوف إضافية قبل استعلام آخر على نفس الاتصال
+        cursor.fetchall()
+        self.release_cursor(cursor)
         
         # دمج النتائج
         if order and groups_result:
             order.update(groups_result)
             
-        cursor.close()
         return order if order else {}
 
     def get_order_statuses(self):
@@ -115,27 +802,31 @@ class Database:
         
     def close_connection(self):
         """إغلاق اتصال قاعدة البيانات بشكل آمن"""
-        try:
-            if self.connection and self.connection.is_connected():
-                self.connection.close()
-                print("Database connection closed successfully")
-        except Error as e:
-            print(f"Error closing database connection: {e}")
+        with self.lock:
+            try:
+                if self.connection:
+                    self.connection.close()
+                    print("Database connection closed successfully")
+            except Error as e:
+                print(f"Error closing database connection: {e}")
+            self.connection = None
+        if self.replica is not None:
+            self.replica.close_connection()
 
+    @db_operation(route='list')
     def get_custom_groups(self):
-        if not self.connection or not self.connection.is_connected():
-            self.connect()
+        self.ensure_connection()
             
         cursor = self.connection.cursor(dictionary=True)
         query = "SELECT * FROM custom_groups WHERE is_active = 1"
-        cursor.execute(query)
+        self.execute(cursor, query)
         groups = cursor.fetchall()
         cursor.close()
         return groups
 
+    @db_operation(route='list')
     def get_recently_changed_orders(self):
-        if not self.connection or not self.connection.is_connected():
-            self.connect()
+        self.ensure_connection()
             
         cursor = self.connection.cursor(dictionary=True)
         query = """
@@ -148,7 +839,7 @@ class Database:
             JOIN clientdata c ON o.Client_ID = c.ID
             WHERE o.ModifiedDate >= NOW() - INTERVAL 1 MINUTE
         """
-        cursor.execute(query)
+        self.execute(cursor, query)
         orders = cursor.fetchall()
         cursor.close()
         return orders
@@ -0,0 +1,250 @@
+import argparse
+import asyncio
+import random
+import socket
+import struct
+import threading
+import time
+
+# ملفات تعريف الشبكة: تأخير كل اتجاه وتذبذبه (ms)، السرعة (بايت/ث، 0 = بلا حد)،
+# توقف كامل كل stall_every ثانية في المتوسط لمدة stall_for، واحتمال قطع
+# الاتصال (RST) عند كل دفعة بيانات
+PROFILES = {
+    'lan': dict(latency=0.2, jitter=0, bandwidth=0, stall_every=0, stall_for=0, reset_rate=0),
+    'vpn': dict(latency=40, jitter=15, bandwidth=2_000_000, stall_every=0, stall_for=0, reset_rate=0),
+    'wan': dict(latency=120, jitter=40, bandwidth=256_000, stall_every=0, stall_for=0, reset_rate=0),
+    'flaky': dict(latency=40, jitter=15, bandwidth=2_000_000, stall_every=20, stall_for=3,
+                  reset_rate=0.002),
+    'stall': dict(latency=20, jitter=5, bandwidth=0, stall_every=5, stall_for=8, reset_rate=0),
+}
+
+
+def _reset(writer):
+    # SO_LINGER بمهلة صفر يجعل الإغلاق RST بدل FIN، كانقطاع الشبكة الحقيقي
+    sock = writer.get_extra_info('socket')
+    if sock is not None:
+        try:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack('ii', 1, 0))
+        except OSError:
+            pass
+    writer.transport.abort()
+
+
+class Link:
+    """اتجاه واحد من اتصال: يقرأ الدفعات ويحدد وقت تسليم كل منها ثم يكتبها بالترتيب"""
+
+    def __init__(self, proxy, reader, writer, direction):
+        self.proxy = proxy
+        self.reader = reader
+        self.writer = writer
+        self.direction = direction
+        self.queue = asyncio.Queue()
+        self.last_release = 0.0
+
+    def release_time(self, size):
+        profile = self.proxy.profile
+        now = time.monotonic()
+        delay = max(0.0, profile['latency'] + random.uniform(-profile['jitter'], profile['jitter']))
+        release = max(now + delay / 1000, self.last_release)
+        if profile['bandwidth']:
+            release += size / profile['bandwidth']
+        release = max(release, self.proxy.stall_until(now))
+        self.last_release = release
+        return release
+
+    async def read(self, connection):
+        while True:
+            data = await self.reader.read(65536)
+            if not data:
+                await self.queue.put((0.0, None))
+                return
+            if random.random() < self.proxy.profile['reset_rate']:
+                self.proxy.stats['resets'] += 1
+                connection.reset()
+                return
+            await self.queue.put((self.release_time(len(data)), data))
+
+    async def write(self):
+        while True:
+            release, data = await self.queue.get()
+            if data is None:
+                if self.writer.can_write_eof():
+                    self.writer.write_eof()
+                return
+            wait = release - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            self.writer.write(data)
+            await self.writer.drain()
+            self.proxy.stats[self.direction] += len(data)
+
+
+class Connection:
+    def __init__(self, proxy, client_reader, client_writer, server_reader, server_writer):
+        self.client_writer = client_writer
+        self.server_writer = server_writer
+        self.links = [Link(proxy, client_reader, server_writer, 'sent'),
+                      Link(proxy, server_reader, client_writer, 'received')]
+        self.tasks = []
+
+    def reset(self):
+        for task in self.tasks:
+            task.cancel()
+        _reset(self.client_writer)
+        _reset(self.server_writer)
+
+    async def run(self):
+        for link in self.links:
+            self.tasks.append(asyncio.ensure_future(link.read(self)))
+            self.tasks.append(asyncio.ensure_future(link.write()))
+        try:
+            await asyncio.gather(*self.tasks)
+        except (asyncio.CancelledError, ConnectionError):
+            pass
+        finally:
+            for task in self.tasks:
+                task.cancel()
+            for writer in (self.client_writer, self.server_writer):
+                writer.close()
+
+
+class FaultProxy:
+    """وكيل TCP بين البرنامج وخادم MySQL يضيف تأخيراً وتذبذباً وحد سرعة وتوقفاً وقطعاً
+
+    يعمل في thread خاص (start / stop) حتى يُستخدم من السكربتات والاختبارات،
+    ويمكن تغيير ملف التعريف أثناء التشغيل بـ set_profile.
+    """
+
+    def __init__(self, target_host='127.0.0.1', target_port=3306,
+                 listen_host='127.0.0.1', listen_port=0, profile='lan'):
+        self.target = (target_host, int(target_port))
+        self.listen = (listen_host, int(listen_port))
+        self.profile = dict(PROFILES[profile]) if isinstance(profile, str) else dict(profile)
+        self.stats = {'connections': 0, 'resets': 0, 'sent': 0, 'received': 0}
+        self.stall_start = None
+        self.stall_end = 0.0
+        self.connections = set()
+        self.loop = None
+        self.server = None
+        self.thread = None
+        self.port = None
+
+    def set_profile(self, profile):
+        self.profile = dict(PROFILES[profile]) if isinstance(profile, str) else dict(profile)
+        self.stall_start = None
+        self.stall_end = 0.0
+
+    def stall_until(self, now):
+        """نهاية التوقف الحالي إن وجد؛ التوقفات تأتي في أوقات عشوائية"""
+        every = self.profile['stall_every']
+        if not every:
+            return 0.0
+        if self.stall_start is None:
+            self.stall_start = now + random.expovariate(1 / every)
+        if now >= self.stall_start:
+            self.stall_end = self.stall_start + self.profile['stall_for']
+            self.stall_start = self.stall_end + random.expovariate(1 / every)
+        return self.stall_end if now < self.stall_end else 0.0
+
+    async def handle(self, client_reader, client_writer):
+        try:
+            server_reader, server_writer = await asyncio.open_connection(*self.target)
+        except OSError:
+            _reset(client_writer)
+            return
+        self.stats['connections'] += 1
+        connection = Connection(self, client_reader, client_writer, server_reader, server_writer)
+        self.connections.add(connection)
+        try:
+            await connection.run()
+        finally:
+            self.connections.discard(connection)
+
+    def reset_all(self):
+        """قطع كل الاتصالات المفتوحة الآن (مثل انقطاع الـ VPN)"""
+        def reset():
+            for connection in list(self.connections):
+                self.stats['resets'] += 1
+                connection.reset()
+        self.loop.call_soon_threadsafe(reset)
+
+    async def serve(self, ready):
+        self.server = await asyncio.start_server(self.handle, *self.listen)
+        self.port = self.server.sockets[0].getsockname()[1]
+        ready.set()
+        async with self.server:
+            await self.server.serve_forever()
+
+    def start(self):
+        """تشغيل الوكيل في thread؛ يُرجع المنفذ الذي يستمع عليه"""
+        ready = threading.Event()
+
+        def run():
+            self.loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self.loop)
+            try:
+                self.loop.run_until_complete(self.serve(ready))
+            except asyncio.CancelledError:
+                pass
+            finally:
+                # انتظار انتهاء الاتصالات الملغاة قبل إغلاق الحلقة
+                pending = asyncio.all_tasks(self.loop)
+                if pending:
+                    self.loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+                self.loop.close()
+
+        self.thread = threading.Thread(target=run, daemon=True)
+        self.thread.start()
+        ready.wait()
+        return self.port
+
+    def stop(self):
+        if self.loop is None:
+            return
+
+        def close():
+            self.server.close()
+            for connection in list(self.connections):
+                connection.reset()
+            for task in asyncio.all_tasks(self.loop):
+                task.cancel()
+
+        self.loop.call_soon_threadsafe(close)
+        self.thread.join(timeout=5)
+
+
+def parse_address(text, default_host='127.0.0.1'):
+    host, _, port = text.rpartition(':')
+    return host or default_host, int(port)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="وكيل لمحاكاة شبكة بطيئة أو متقطعة أمام MySQL")
+    parser.add_argument('--listen', default='127.0.0.1:3307', help="العنوان الذي يتصل به البرنامج")
+    parser.add_argument('--target', default='127.0.0.1:3306', help="خادم MySQL الفعلي")
+    parser.add_argument('--profile', choices=sorted(PROFILES), default='vpn')
+    for name in PROFILES['lan']:
+        parser.add_argument(f"--{name.replace('_', '-')}", type=float, help="تجاوز قيمة الملف")
+    args = parser.parse_args()
+
+    profile = dict(PROFILES[args.profile])
+    for name in profile:
+        value = getattr(args, name)
+        if value is not None:
+            profile[name] = value
+    listen_host, listen_port = parse_address(args.listen)
+    target_host, target_port = parse_address(args.target)
+    proxy = FaultProxy(target_host, target_port, listen_host, listen_port, profile)
+    port = proxy.start()
+    print(f"{listen_host}:{port} -> {target_host}:{target_port} {profile}")
+    print("اضبط DB_HOST و DB_PORT في ملف .env على عنوان الوكيل، و Ctrl+C للإيقاف")
+    try:
+        while True:
+            time.sleep(10)
+            print(proxy.stats)
+    except KeyboardInterrupt:
+        proxy.stop()
+
+
+if __name__ == '__main__':
+    main()
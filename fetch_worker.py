@@ -0,0 +1,110 @@
+import multiprocessing
+import os
+import pickle
+import threading
+
+from mysql.connector import Error
+
+from config import DB_KEEPALIVE_IDLE
+from database import Database, recent_writes
+from order_row import ORDER_ROW_FIELDS, row_from_values
+
+# هذا الملف يُستورد في عملية العامل أيضاً فلا يستورد PyQt6
+
+
+def worker_enabled():
+    """تشغيل الجلب في عملية منفصلة عبر DB_WORKER=1 في ملف .env"""
+    return os.getenv('DB_WORKER') == '1'
+
+
+def worker_main(connection):
+    """حلقة عملية العامل: تملك اتصال قاعدة البيانات وتُرجع الفروقات فقط
+
+    كل طلب هو (since، pinned): بداية نافذة الطلبات، وهل كتبت الواجهة مؤخراً
+    فتُقرأ القائمة من الخادم الأساسي لا من نسخة القراءة. الرد رسالة pickle واحدة
+    ('delta', full, rows, removed) حيث rows قيم ORDER_ROW_FIELDS للطلبات
+    الجديدة أو المتغيرة منذ الرد السابق، و removed أرقام ما اختفى منها.
+    """
+    db = Database()
+    snapshot = {}
+    try:
+        while True:
+            if not connection.poll(DB_KEEPALIVE_IDLE):
+                db.keepalive()
+                continue
+            try:
+                request = connection.recv()
+            except EOFError:
+                break
+            if request is False:
+                break
+            since, pinned = request
+            if pinned:
+                # الكتابة حدثت في عملية الواجهة؛ تسجيلها هنا يوجه القراءة للأساسي
+                recent_writes.add(())
+            try:
+                rows = {}
+                for batch in db.iter_orders(since=since):
+                    for order in batch:
+                        rows[order.ID] = tuple(getattr(order, name) for name in ORDER_ROW_FIELDS)
+                changed = [values for order_id, values in rows.items()
+                           if snapshot.get(order_id) != values]
+                removed = [order_id for order_id in snapshot if order_id not in rows]
+                message = ('delta', not snapshot, changed, removed)
+                snapshot = rows
+            except Exception as e:
+                message = ('error', str(e))
+            connection.send_bytes(pickle.dumps(message, protocol=pickle.HIGHEST_PROTOCOL))
+    finally:
+        db.close_connection()
+
+
+class FetchWorker:
+    """عملية منفصلة تجلب الطلبات وتفكها وتقارنها بالجلب السابق
+
+    فك الصفوف ومقارنتها يحدث خارج عملية الواجهة فلا يتنافس مع الرسم على
+    الـ GIL، وما يصل للواجهة هو الفروقات فقط. إذا توقفت العملية تُعاد
+    تلقائياً ويكون أول رد بعدها كاملاً (full).
+    """
+
+    def __init__(self):
+        self.context = multiprocessing.get_context('spawn')
+        self.lock = threading.Lock()
+        self.connection = None
+        self.process = None
+        self.start()
+
+    def start(self):
+        self.connection, child = self.context.Pipe()
+        self.process = self.context.Process(target=worker_main, args=(child,), daemon=True)
+        self.process.start()
+        child.close()
+
+    def fetch(self, since=None):
+        """يُرجع (full, rows, removed)؛ يُستدعى من thread لأنه ينتظر العامل"""
+        with self.lock:
+            try:
+                self.connection.send((since, recent_writes.pinned()))
+                message = pickle.loads(self.connection.recv_bytes())
+            except (EOFError, OSError):
+                self.stop()
+                self.start()
+                raise Error("Fetch worker stopped; restarted")
+        if message[0] == 'error':
+            raise Error(message[1])
+        _, full, rows, removed = message
+        return full, [row_from_values(values) for values in rows], removed
+
+    def stop(self):
+        try:
+            self.connection.send(False)
+        except (OSError, ValueError):
+            pass
+        self.process.join(timeout=2)
+        if self.process.is_alive():
+            self.process.terminate()
+        self.connection.close()
+
+    def close(self):
+        with self.lock:
+            self.stop()
@@ -0,0 +1,243 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+from memory_check import SyntheticDatabase
+
+# زمن الإطارات في قائمة الطلبات: النافذة الحقيقية (offscreen) فوق قاعدة
+# بيانات اصطناعية بأحجام مختلفة، مع سيناريوهات تمرير وتبديل فلاتر وكتابة
+# بحث وتحديث في الخلفية. لكل سيناريو تُسجل مدة كل إطار (معالجة الأحداث ثم
+# رسم منطقة القائمة) ومدة الرسم وحده وتأخر حلقة الأحداث، وتُقارن بقيم
+# أساس محفوظة من نفس الجهاز.
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'frame_baselines.json')
+
+# المقاييس المقارنة بالأساس (بالملي ثانية)
+COMPARED_METRICS = ('frame_p95', 'frame_p99', 'paint_p95', 'latency_p99')
+
+HEARTBEAT_MS = 5
+
+
+def percentile(values, percent):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(percent / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+class FrameRecorder:
+    """إطارات سيناريو واحد وتأخر حلقة الأحداث أثناءه
+
+    مؤقت كل HEARTBEAT_MS يسجل تأخر كل نبضة عن موعدها؛ هذا ما يشعر به
+    المستخدم كتأخر في الاستجابة للنقر والكتابة.
+    """
+
+    def __init__(self, app, window):
+        from PyQt6.QtCore import QTimer
+        self.app = app
+        self.window = window
+        # حاوية الكروت لا الـ viewport: repaint للـ viewport لا يرسم الكروت داخلها.
+        # الرسم للجزء الظاهر منها فقط كما يفعل Qt عند التمرير
+        self.container = window.scroll_area.widget()
+        self.frames = []
+        self.paints = []
+        self.latencies = []
+        self.last_beat = None
+        self.heartbeat = QTimer()
+        self.heartbeat.timeout.connect(self.beat)
+
+    def beat(self):
+        now = time.perf_counter()
+        if self.last_beat is not None:
+            self.latencies.append(max(0.0, (now - self.last_beat) * 1000 - HEARTBEAT_MS))
+        self.last_beat = now
+
+    def start(self):
+        self.frames, self.paints, self.latencies = [], [], []
+        self.last_beat = None
+        self.heartbeat.start(HEARTBEAT_MS)
+
+    def stop(self):
+        self.heartbeat.stop()
+        return {
+            'frames': len(self.frames),
+            'frame_p50': percentile(self.frames, 50),
+            'frame_p95': percentile(self.frames, 95),
+            'frame_p99': percentile(self.frames, 99),
+            'frame_max': max(self.frames, default=0.0),
+            'paint_p95': percentile(self.paints, 95),
+            'latency_p95': percentile(self.latencies, 95),
+            'latency_p99': percentile(self.latencies, 99),
+            'latency_max': max(self.latencies, default=0.0),
+        }
+
+    def frame(self, action=None):
+        """إطار واحد: الإجراء (إن وجد) ثم معالجة الأحداث المعلقة ثم رسم الكروت"""
+        start = time.perf_counter()
+        if action is not None:
+            action()
+        self.app.processEvents()
+        paint_start = time.perf_counter()
+        self.container.repaint(self.container.visibleRegion())
+        end = time.perf_counter()
+        self.frames.append((end - start) * 1000)
+        self.paints.append((end - paint_start) * 1000)
+
+    def busy(self):
+        return bool(self.window.executor.active) or self.window.render_scheduler.busy()
+
+    def until_idle(self, action=None, timeout=300):
+        """إطارات متتالية حتى تنتهي مهام قاعدة البيانات وبناء الكروت"""
+        deadline = time.perf_counter() + timeout
+        self.frame()
+        while self.busy() and time.perf_counter() < deadline:
+            self.frame(action)
+
+
+def scenario_scroll(recorder, frames):
+    """تمرير من أعلى القائمة لأسفلها ثم العودة على frames إطاراً"""
+    bar = recorder.window.scroll_area.verticalScrollBar()
+    step = max(bar.pageStep() // 3, bar.maximum() // max(frames // 2, 1))
+    bar.setValue(0)
+    for direction in (1, -1):
+        for _ in range(frames // 2):
+            recorder.frame(lambda: bar.setValue(bar.value() + direction * step))
+
+
+def scenario_filters(recorder, frames):
+    window = recorder.window
+    for status in ('Accepted', 'Rejected', 'all', 'Pending'):
+        window.filter_by_status(status)
+        recorder.until_idle()
+
+
+def scenario_search(recorder, frames):
+    """كتابة بحث حرفاً حرفاً ثم مسحه، كل حرف في إطار مستقل"""
+    window = recorder.window
+    text = 'عميل 12'
+    for length in list(range(1, len(text) + 1)) + list(range(len(text) - 1, -1, -1)):
+        recorder.frame(lambda: window.search_input.setText(text[:length]))
+    window.archive_search_timer.stop()
+    recorder.until_idle()
+
+
+def scenario_refresh(recorder, frames):
+    """تحديث القائمة في الخلفية مع تمرير بطيء طوال التحديث"""
+    bar = recorder.window.scroll_area.verticalScrollBar()
+    bar.setValue(0)
+    recorder.window.load_orders()
+    recorder.until_idle(lambda: bar.setValue(bar.value() + bar.singleStep()))
+
+
+SCENARIOS = {
+    'scroll': scenario_scroll,
+    'filters': scenario_filters,
+    'search': scenario_search,
+    'refresh': scenario_refresh,
+}
+
+
+def run_size(app, size, scenarios, frames):
+    import main
+    SyntheticDatabase.populate(size)
+    window = main.MainWindow()
+    window.resize(1200, 800)
+    window.show()
+    recorder = FrameRecorder(app, window)
+    recorder.until_idle()
+    results = {}
+    for name in scenarios:
+        recorder.start()
+        SCENARIOS[name](recorder, frames)
+        results[name] = recorder.stop()
+    window.close()
+    window.deleteLater()
+    app.processEvents()
+    return results
+
+
+def compare(results, baselines, threshold, min_delta):
+    """المقاييس التي تجاوزت الأساس بنسبة threshold وبفرق min_delta ms على الأقل"""
+    regressions = []
+    for size, scenarios in results.items():
+        for name, metrics in scenarios.items():
+            base = baselines.get(size, {}).get(name)
+            if not base:
+                continue
+            for metric in COMPARED_METRICS:
+                old, new = base.get(metric), metrics[metric]
+                if old is not None and new > old * (1 + threshold) and new - old >= min_delta:
+                    regressions.append((size, name, metric, old, new))
+    return regressions
+
+
+def print_results(results):
+    print(f"{'الحجم':>7} {'السيناريو':<9} {'إطارات':>7} {'p50':>7} {'p95':>7} {'p99':>7} "
+          f"{'max':>8} {'رسم p95':>8} {'تأخر p95':>9} {'p99':>7} {'max':>8}")
+    for size, scenarios in results.items():
+        for name, m in scenarios.items():
+            print(f"{size:>7} {name:<9} {m['frames']:>7} {m['frame_p50']:>7.1f} {m['frame_p95']:>7.1f} "
+                  f"{m['frame_p99']:>7.1f} {m['frame_max']:>8.1f} {m['paint_p95']:>8.1f} "
+                  f"{m['latency_p95']:>9.1f} {m['latency_p99']:>7.1f} {m['latency_max']:>8.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="زمن الإطارات في قائمة الطلبات (ms)")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[500, 5000, 50000])
+    parser.add_argument('--scenarios', nargs='+', choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument('--scroll-frames', type=int, default=300)
+    parser.add_argument('--baseline', default=BASELINE_FILE)
+    parser.add_argument('--save-baseline', action='store_true',
+                        help="حفظ النتائج كأساس بدل المقارنة به")
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help="نسبة الزيادة التي تُعد تراجعاً")
+    parser.add_argument('--min-delta-ms', type=float, default=2.0,
+                        help="أقل فرق بالملي ثانية يُعد تراجعاً (يتجاهل التذبذب)")
+    args = parser.parse_args()
+
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    from PyQt6.QtWidgets import QApplication
+    import main as app_main
+    import task_executor
+    app_main.Database = SyntheticDatabase
+    task_executor.Database = SyntheticDatabase
+    app = QApplication(sys.argv[:1])
+
+    # ملفات الحالة المحلية (السجل، التحديدات) في مجلد مؤقت لا في مجلد العمل
+    args.baseline = os.path.abspath(args.baseline)
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)
+        for size in args.sizes:
+            results[str(size)] = run_size(app, size, args.scenarios, args.scroll_frames)
+    print_results(results)
+
+    if args.save_baseline:
+        baselines = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, encoding='utf-8') as f:
+                baselines = json.load(f)
+        for size, scenarios in results.items():
+            baselines.setdefault(size, {}).update(scenarios)
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(baselines, f, indent=2)
+        print(f"\nحُفظ الأساس في {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print("\nلا يوجد أساس للمقارنة؛ شغّل مع --save-baseline أولاً")
+        return 0
+    with open(args.baseline, encoding='utf-8') as f:
+        baselines = json.load(f)
+    regressions = compare(results, baselines, args.threshold, args.min_delta_ms)
+    for size, name, metric, old, new in regressions:
+        print(f"تراجع: {size} {name} {metric}: {old:.1f} -> {new:.1f} ms")
+    print("\nFAIL" if regressions else "\nOK")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,48 +1,74 @@
 import sys
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout,
                             QHBoxLayout, QScrollArea, QMenu, QLabel,
-                            QFrame, QPushButton, QLineEdit, QGridLayout, QSizePolicy,
-                            QButtonGroup)
-from PyQt6.QtCore import Qt, QTimer, QThread, pyqtSignal, QDateTime
-from PyQt6.QtGui import QAction, QFont
-from database import Database
-from config import STATUS_COLORS, STATUS_TRANSLATIONS, STATUS_LIGHT_COLORS
+                            QFrame, QPushButton, QLineEdit, QSizePolicy,
+                            QButtonGroup, QFileDialog, QProgressDialog, QMessageBox)
+from PyQt6.QtCore import Qt, QTimer, pyqtSignal
+from PyQt6.QtGui import QAction, QFont, QKeySequence, QShortcut
+from database import Database, hot_window_start
+from config import (STATUS_COLORS, STATUS_TRANSLATIONS, STATUS_LIGHT_COLORS,
+                    OUTBOX_RETRY_BASE, OUTBOX_RETRY_MAX, ARCHIVE_PAGE_SIZE)
 from order_details import OrderDetailsDialog
+from card_render import OrderContentView, configure_card_cache
+from render_scheduler import RenderScheduler
+from task_executor import TaskExecutor, PRIORITY_USER, PRIORITY_BACKGROUND
+from order_export import export_orders, ExportCancelled
+from outbox import StatusOutbox, replay_outbox, replay_outbox_async
+from order_cache import OrdersCache
+from offers import offer_name
+from selection_state import (load_selection_levels, load_selection_times,
+                             format_selection_time, SELECTIONS_FILE, SELECTION_DATES_FILE)
+from async_database import AsyncDatabase, async_enabled, create_event_loop
+from fetch_worker import FetchWorker, worker_enabled
+import multiprocessing
+import asyncio
 import json
 import os
+import time
 from functools import partial
 
-class OrdersUpdateThread(QThread):
-    orders_updated = pyqtSignal(list)
-    
-    def __init__(self, db):
-        super().__init__()
-        self.db = db
-    
-    def run(self):
-        try:
-            orders = self.db.get_orders()
-            self.orders_updated.emit(orders)
-        except Exception as e:
-            print(f"Error fetching orders: {e}")
-            self.orders_updated.emit([])
+# مهام قاعدة البيانات؛ تُنفذ في TaskExecutor وتُستدعى بـ (task, ...)
 
-class StatusUpdateThread(QThread):
-    status_updated = pyqtSignal(bool, int, str)  # success, order_id, new_status
-    
-    def __init__(self, db, order_id, new_status):
-        super().__init__()
-        self.db = db
-        self.order_id = order_id
-        self.new_status = new_status
-    
-    def run(self):
-        try:
-            self.db.update_order_status(self.order_id, self.new_status)
-            self.status_updated.emit(True, self.order_id, self.new_status)
-        except Exception as e:
-            print(f"Error updating status: {e}")
-            self.status_updated.emit(False, self.order_id, self.new_status)
+def stream_orders(task, since):
+    """جلب الطلبات على دفعات، كل دفعة تصل للواجهة فور جلبها"""
+    for batch in task.db.iter_orders(since=since):
+        if task.cancelled:
+            return False
+        task.report(batch)
+    if task.db.measure_bytes:
+        print(f"Orders refresh: {task.db.last_bytes} bytes")
+    return True
+
+def fetch_first_screen(task, status, since):
+    return task.db.get_first_screen(status, since)
+
+def fetch_status_counts(task):
+    return task.db.count_orders_by_status()
+
+def fetch_orders_delta(task, worker, since):
+    return worker.fetch(since)  # (full, الطلبات المتغيرة، المحذوفة)
+
+def fetch_archive_page(task, before, before_id=None, search=None):
+    return task.db.get_archived_orders(before, before_id, search)
+
+def fetch_custom_groups(task):
+    return task.db.get_custom_groups()
+
+def flush_status_outbox(task, outbox_path):
+    # اتصال SQLite خاص بهذا الـ thread
+    outbox = StatusOutbox(outbox_path)
+    try:
+        return replay_outbox(outbox, task.db)  # (applied, conflicts)
+    finally:
+        outbox.close()
+
+def export_orders_task(task, path, status, search, contacted_only):
+    total = task.db.count_orders(status, search)
+    task.report(0, 0, total)
+    return export_orders(task.db, path, status=status, search=search,
+                         contacted_only=contacted_only,
+                         progress=lambda written, scanned: task.report(written, scanned, total),
+                         is_cancelled=lambda: task.cancelled)
 
 class SelectionCircle(QLabel):
     clicked = pyqtSignal()
@@ -98,35 +124,48 @@ class SelectionCircle(QLabel):
 
 class OrderCard(QFrame):
     status_changed = pyqtSignal(int, str)
+    selection_changed = pyqtSignal(int, int, object)  # order_id, level, وقت التحديد
+    mark_clicked = pyqtSignal(int, object)  # order_id, أزرار التعديل (Ctrl/Shift)
+    bulk_status_requested = pyqtSignal(str)
+    
+    CARD_STYLE = """
+        QFrame {{
+            background-color: {background};
+            border-radius: 4px;
+            margin: 4px;
+        }}
+        QFrame:hover {{
+            background-color: {hover};
+        }}
+        QLabel#dateLabel {{
+            color: #666;
+            font-size: 11px;
+            padding: 2px 5px;
+        }}
+    """
     
-    def __init__(self, order_data, available_statuses, parent=None):
+    def __init__(self, order_data, available_statuses, parent=None, async_db=None,
+                 selection_level=None, selection_date=None, executor=None):
         super().__init__(parent)
         self.order_data = order_data
         self.available_statuses = available_statuses
         self.selection_level = 0
-        self.db = Database()
+        self.async_db = async_db
+        self.executor = executor
         self.context_menu = None
         self.status_actions = []
-        self.update_thread = None
-        self.load_selection_state()
-        self.load_selection_date()
+        self.marked = False  # ضمن التحديد المتعدد لتغيير الحالة دفعة واحدة
+        self.marked_count = 0  # عدد الكروت المحددة عند فتح القائمة
+        # حالة التحديد تأتي من MainWindow، وإلا تُقرأ من الملفات
+        if selection_level is None:
+            self.load_selection_state()
+            self.load_selection_date()
+        else:
+            self.selection_level = selection_level
+            self.selection_date = selection_date
         
         # تطبيق ستايل الكرت
-        self.setStyleSheet("""
-            QFrame {
-                background-color: white;
-                border-radius: 4px;
-                margin: 4px;
-            }
-            QFrame:hover {
-                background-color: #f8f9fa;
-            }
-            QLabel#dateLabel {
-                color: #666;
-                font-size: 11px;
-                padding: 2px 5px;
-            }
-        """)
+        self.update_style()
         
         # إنشاء التخطيط الرئيسي
         main_layout = QHBoxLayout()
@@ -167,24 +206,31 @@ class OrderCard(QFrame):
         
         main_layout.addWidget(left_container)
         
-        # محتوى الكرت
-        content_widget = QWidget()
-        content_layout = QVBoxLayout(content_widget)
-        content_layout.setContentsMargins(10, 8, 10, 8)
-        content_layout.setSpacing(4)
-        
-        # إضافة التخطيطات الأخرى هنا
-        self.setup_content(content_layout)
-        
-        main_layout.addWidget(content_widget)
+        # محتوى الكرت مرسوم كصورة واحدة محفوظة في الكاش
+        self.content_view = OrderContentView(self.order_data)
+        main_layout.addWidget(self.content_view)
         
+    def update_style(self):
+        if self.marked:
+            self.setStyleSheet(self.CARD_STYLE.format(background='#E3F2FD', hover='#D6EAFB'))
+        else:
+            self.setStyleSheet(self.CARD_STYLE.format(background='white', hover='#f8f9fa'))
+
+    def set_marked(self, marked):
+        if marked != self.marked:
+            self.marked = marked
+            self.update_style()
+
     def mousePressEvent(self, event):
-        # نلغي تفعيل الضغط على الكرت
+        # الضغط (مع Ctrl أو Shift) يحدد الكروت لتغيير حالتها دفعة واحدة
+        if event.button() == Qt.MouseButton.LeftButton:
+            self.mark_clicked.emit(self.order_data['ID'], event.modifiers())
         super().mousePressEvent(event)
         
     def mouseDoubleClickEvent(self, event):
         # فتح نافذة تفاصيل الطلب
-        details_dialog = OrderDetailsDialog(self.order_data['ID'], Database())
+        details_dialog = OrderDetailsDialog(self.order_data['ID'], self.executor,
+                                            async_db=self.async_db)
         details_dialog.exec()
         
     def contextMenuEvent(self, event):
@@ -212,13 +258,22 @@ class OrderCard(QFrame):
         self.status_actions.clear()
         
         # إنشاء actions جديدة
-        for status in self.available_statuses:
-            if status != self.order_data['Accept_Reject']:
+        if self.marked and self.marked_count > 1:
+            # تغيير حالة جميع الكروت المحددة دفعة واحدة
+            self.context_menu.addSection(f"تغيير حالة المحدد ({self.marked_count})")
+            for status in self.available_statuses:
                 action = QAction(STATUS_TRANSLATIONS.get(status, status), self)
-                # استخدام functools.partial لتجنب مشكلة الـ lambda
-                action.triggered.connect(partial(self.change_status, status))
+                action.triggered.connect(partial(self.bulk_status_requested.emit, status))
                 self.context_menu.addAction(action)
                 self.status_actions.append(action)
+        else:
+            for status in self.available_statuses:
+                if status != self.order_data['Accept_Reject']:
+                    action = QAction(STATUS_TRANSLATIONS.get(status, status), self)
+                    # استخدام functools.partial لتجنب مشكلة الـ lambda
+                    action.triggered.connect(partial(self.change_status, status))
+                    self.context_menu.addAction(action)
+                    self.status_actions.append(action)
         
         self.context_menu.exec(event.globalPos())
     
@@ -226,10 +281,9 @@ class OrderCard(QFrame):
         # زيادة المستوى وإعادته إلى 0 إذا وصل للحد الأقصى
         self.selection_level = (self.selection_level + 1) % 11
         
-        # تحديث التاريخ إذا كان المستوى > 0
+        # تحديث وقت التحديد (ثوانٍ منذ epoch) إذا كان المستوى > 0
         if self.selection_level > 0:
-            now = QDateTime.currentDateTime()
-            self.selection_date = now.toString("yyyy/MM/dd hh:mm")
+            self.selection_date = time.time()
         else:
             self.selection_date = None
         
@@ -241,58 +295,35 @@ class OrderCard(QFrame):
         # حفظ الحالة
         self.save_selection_state()
         self.save_selection_date()
+        self.selection_changed.emit(self.order_data['ID'], self.selection_level, self.selection_date)
         
     def load_selection_state(self):
-        try:
-            if os.path.exists('selected_cards.json'):
-                with open('selected_cards.json', 'r') as f:
-                    selections = json.load(f)
-                    # تحويل القيم القديمة (true/false) إلى المستوى الجديد
-                    if str(self.order_data['ID']) in selections:
-                        value = selections[str(self.order_data['ID'])]
-                        if isinstance(value, bool):
-                            self.selection_level = 1 if value else 0
-                        else:
-                            self.selection_level = int(value) if str(value).isdigit() else 0
-                    else:
-                        self.selection_level = 0
-        except Exception as e:
-            print(f"Error loading selection state: {e}")
-            self.selection_level = 0
+        self.selection_level = load_selection_levels().get(str(self.order_data['ID']), 0)
             
     def save_selection_state(self):
         try:
             selections = {}
-            if os.path.exists('selected_cards.json'):
-                with open('selected_cards.json', 'r') as f:
+            if os.path.exists(SELECTIONS_FILE):
+                with open(SELECTIONS_FILE, 'r') as f:
                     selections = json.load(f)
             
             selections[str(self.order_data['ID'])] = self.selection_level
             
-            with open('selected_cards.json', 'w') as f:
+            with open(SELECTIONS_FILE, 'w') as f:
                 json.dump(selections, f)
         except Exception as e:
             print(f"Error saving selection state: {e}")
     
     def load_selection_date(self):
         """تحميل تاريخ التحديد من الملف"""
-        try:
-            if os.path.exists('selection_dates.json'):
-                with open('selection_dates.json', 'r') as f:
-                    dates = json.load(f)
-                    self.selection_date = dates.get(str(self.order_data['ID']), None)
-            else:
-                self.selection_date = None
-        except Exception as e:
-            print(f"Error loading selection date: {e}")
-            self.selection_date = None
+        self.selection_date = load_selection_times().get(str(self.order_data['ID']), None)
     
     def save_selection_date(self):
         """حفظ تاريخ التحديد في الملف"""
         try:
             dates = {}
-            if os.path.exists('selection_dates.json'):
-                with open('selection_dates.json', 'r') as f:
+            if os.path.exists(SELECTION_DATES_FILE):
+                with open(SELECTION_DATES_FILE, 'r', encoding='utf-8') as f:
                     dates = json.load(f)
             
             # تحديث أو حذف التاريخ
@@ -301,7 +332,7 @@ class OrderCard(QFrame):
             else:
                 dates.pop(str(self.order_data['ID']), None)
             
-            with open('selection_dates.json', 'w', encoding='utf-8') as f:
+            with open(SELECTION_DATES_FILE, 'w', encoding='utf-8') as f:
                 json.dump(dates, f, ensure_ascii=False)
         except Exception as e:
             print(f"Error saving selection date: {e}")
@@ -310,134 +341,29 @@ class OrderCard(QFrame):
         """تحديث نص التاريخ في الواجهة"""
         if hasattr(self, 'date_label'):
             if self.selection_level > 0 and self.selection_date:
-                self.date_label.setText(self.selection_date)
+                self.date_label.setText(format_selection_time(self.selection_date))
                 self.date_label.show()
             else:
                 self.date_label.hide()
 
-    def setup_content(self, content_layout):
-        # استخدام Grid Layout للتنسيق كجدول
-        header_layout = QGridLayout()
-        header_layout.setSpacing(0)
-        header_layout.setContentsMargins(0, 0, 0, 0)
-        
-        # اسم العميل - عامود 0
-        name_label = QLabel(self.order_data.get('customer_name', ''))
-        name_label.setStyleSheet("""
-            font-size: 10pt;
-            font-weight: bold;
-            color: #333;
-            padding-right: 15px;
-            min-width: 150px;
-        """)
-        name_label.setFixedWidth(200)
-        header_layout.addWidget(name_label, 0, 0)
-        
-        # رقم الجوال - عامود 1
-        phone = str(self.order_data.get('customer_phone', ''))
-        if phone.startswith('0'):
-            phone = '966' + phone[1:]
-        elif not phone.startswith('966'):
-            phone = '966' + phone
-            
-        formatted_phone = ' '.join([phone[:3], phone[3:6], phone[6:]])
-        phone_label = QLabel(f"<b>{formatted_phone}</b> |")
-        phone_label.setStyleSheet("""
-            font-size: 9pt;
-            color: #666;
-            padding: 0 15px;
-            font-family: monospace;
-            min-width: 130px;
-        """)
-        phone_label.setFixedWidth(150)
-        phone_label.setTextFormat(Qt.TextFormat.RichText)
-        header_layout.addWidget(phone_label, 0, 1)
-        
-        # الحالة - عامود 2
-        status = self.order_data.get('Accept_Reject', '')
-        status_text = STATUS_TRANSLATIONS.get(status, status)
-        status_label = QLabel(status_text)
-        status_label.setStyleSheet(f"""
-            color: {STATUS_COLORS.get(status, '#666')};
-            font-size: 9pt;
-            padding: 1px 6px;
-            border-radius: 3px;
-        """)
-        header_layout.addWidget(status_label, 0, 2)
-        
-        # إضافة stretch للمسافة المتبقية
-        header_layout.setColumnStretch(2, 1)
-        
-        content_layout.addLayout(header_layout)
-        
-        # عروض الأسعار
-        if self.order_data.get('Offers'):
-            offers_layout = QHBoxLayout()
-            offers = self.order_data['Offers'].replace(';', ' | ')
-            offers_label = QLabel(offers)
-            offers_label.setStyleSheet("""
-                color: #666;
-                font-size: 9pt;
-                padding: 2px 0;
-            """)
-            offers_layout.addWidget(offers_label)
-            offers_layout.addStretch()
-            
-            date_label = QLabel(self.order_data['Date'].strftime('%Y-%m-%d'))
-            date_label.setStyleSheet("color: #666; font-size: 8pt;")
-            offers_layout.addWidget(date_label)
-            
-            content_layout.addLayout(offers_layout)
-        
-        # المجموعات (إذا وجدت)
-        if self.order_data.get('custom_groups'):
-            groups = self.order_data['custom_groups'].split(',')
-            colors = self.order_data['group_colors'].split(',') if self.order_data.get('group_colors') else []
-            
-            groups_layout = QHBoxLayout()
-            for i, group in enumerate(groups):
-                color = colors[i] if i < len(colors) else '#666'
-                dot = QLabel('•')
-                dot.setStyleSheet(f'color: {color}; font-size: 14pt; padding: 0 2px;')
-                groups_layout.addWidget(dot)
-                
-                group_label = QLabel(group.strip())
-                group_label.setStyleSheet('color: #666; font-size: 9pt;')
-                groups_layout.addWidget(group_label)
-            
-            groups_layout.addStretch()
-            content_layout.addLayout(groups_layout)
-        
     def change_status(self, new_status):
         """تغيير حالة الطلب"""
         if new_status == self.order_data['Accept_Reject']:
             return
             
-        old_status = self.order_data['Accept_Reject']
         self.order_data['Accept_Reject'] = new_status
         
-        # تحديث الواجهة
-        self.setup_content(self.layout().itemAt(2).widget().layout())
+        # تحديث الواجهة؛ الحفظ في قاعدة البيانات عبر السجل المحلي في MainWindow
+        self.content_view.refresh()
         self.status_changed.emit(self.order_data['ID'], new_status)
-        
-        # إذا كان هناك thread قديم، ننتظر انتهاءه
-        if self.update_thread and self.update_thread.isRunning():
-            self.update_thread.wait()
-        
-        # تحديث قاعدة البيانات في الخلفية
-        self.update_thread = StatusUpdateThread(self.db, self.order_data['ID'], new_status)
-        self.update_thread.status_updated.connect(lambda success, order_id, status: 
-            self.handle_status_update(success, order_id, status, old_status))
-        self.update_thread.start()
-    
-    def handle_status_update(self, success, order_id, new_status, old_status):
-        if not success:
-            # إذا فشل التحديث، نرجع للحالة القديمة
-            print(f"فشل تحديث الحالة في قاعدة البيانات. الرجوع للحالة السابقة.")
-            self.order_data['Accept_Reject'] = old_status
-            self.setup_content(self.layout().itemAt(2).widget().layout())
-            self.status_changed.emit(order_id, old_status)
             
+# أسماء مفاتيح الترتيب في القائمة
+SORT_KEY_LABELS = {
+    'date': "تاريخ الطلب",
+    'modified': "تاريخ آخر تعديل",
+    'selection': "تاريخ الاتصال",
+}
+
 class SidebarButton(QPushButton):
     def __init__(self, text, parent=None):
         super().__init__(text, parent)
@@ -462,23 +388,64 @@ class SidebarButton(QPushButton):
         """)
 
 class MainWindow(QMainWindow):
-    def __init__(self):
+    def __init__(self, async_db=None, fetch_worker=None):
         super().__init__()
+        configure_card_cache()
         self.db = Database()
+        self.async_db = async_db
+        self.fetch_worker = fetch_worker  # عملية الجلب المنفصلة (اختياري)
+        # كل عمليات قاعدة البيانات من الواجهة تمر عبر مجمع threads واحد
+        self.executor = TaskExecutor(parent=self)
+        self.orders_task = None
+        self.marked_ids = set()  # الطلبات المحددة لتغيير الحالة دفعة واحدة
+        self.mark_anchor = None  # آخر كرت نُقر عليه لتحديد النطاق بـ Shift
+        self.export_task = None
+        # تغييرات الحالة تُسجل محلياً أولاً ثم تُرسل عند توفر الاتصال
+        self.outbox = StatusOutbox()
+        self.outbox_task = None
+        self.outbox_failures = 0
+        self.outbox_dirty = False
+        # الطلبات المحسومة قبل بداية النافذة تُجلب عند التمرير أو البحث فقط
+        self.window_start = hot_window_start()
+        self.archive_task = None
         self.available_statuses = self.db.get_order_statuses()
-        self.orders_cache = []
+        self.orders_cache = OrdersCache()
         self.current_filter = 'Pending'
+        self.current_group = None  # فلتر المجموعة (None = كل المجموعات)
+        self.offer_filter = set()  # أرقام أنواع العروض المختارة (فارغ = الكل)
         self.show_selected_only = False
         self.sort_descending = True  # ترتيب تنازلي افتراضياً
+        self.sort_key = 'date'  # date / modified / selection
         self.search_text = ''
+        self.stream_seen = None  # أرقام الطلبات المستلمة أثناء الجلب التدريجي
+        self.stream_rendering = False
+        self.stream_overlay = {}
+        # الشاشة الأولى عند بدء التشغيل تُعرض قبل اكتمال تحميل القائمة
+        self.first_screen_pending = False
+        self.first_screen_shown = False
         self.setup_ui()
-        self.load_orders()
+        self.card_chunk = None  # حاوية الكروت المبنية التي لم تظهر بعد
+        self.chunk_cards = []
+        self.render_scheduler = RenderScheduler(self.prepare_cards, self.build_card, self,
+                                                reveal=self.reveal_cards)
+        self.load_startup()
         
         # إعداد المؤقت للتحديث التلقائي
         self.update_timer = QTimer(self)
         self.update_timer.timeout.connect(self.load_orders)
         self.update_timer.start(60000)
 
+        # البحث في الأرشيف بعد توقف الكتابة
+        self.archive_search_timer = QTimer(self)
+        self.archive_search_timer.setSingleShot(True)
+        self.archive_search_timer.timeout.connect(self.search_archive)
+
+        # إعادة محاولة إرسال التغييرات المعلقة مع تباعد متزايد
+        self.outbox_timer = QTimer(self)
+        self.outbox_timer.setSingleShot(True)
+        self.outbox_timer.timeout.connect(self.flush_outbox)
+        self.flush_outbox()
+
     def setup_ui(self):
         self.setWindowTitle("نظام إدارة طلبات التصميم")
         self.setMinimumSize(800, 600)
@@ -518,8 +485,11 @@ class MainWindow(QMainWindow):
         selected_button.clicked.connect(self.toggle_selected_filter)
         selected_layout.addWidget(selected_button)
         
-        sort_button = QPushButton("⇅")  # زر الترتيب
+        sort_button = QPushButton("⇅")  # زر الترتيب (الزر الأيمن لاختيار المفتاح)
+        self.sort_button = sort_button
         sort_button.setFixedWidth(30)
+        sort_button.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
+        sort_button.customContextMenuRequested.connect(self.show_sort_menu)
         sort_button.setStyleSheet("""
             QPushButton {
                 border: none;
@@ -544,20 +514,70 @@ class MainWindow(QMainWindow):
         
         # زر جميع الطلبات
         all_button = SidebarButton("جميع الطلبات")
+        self.all_button = all_button
         self.button_group.addButton(all_button)
         all_button.clicked.connect(self.show_all_orders)
         sidebar_layout.addWidget(all_button)
         
         # أزرار الحالات
+        self.status_buttons = {}
         for status in self.available_statuses:
             btn = SidebarButton(STATUS_TRANSLATIONS.get(status, status))
+            self.status_buttons[status] = btn
             self.button_group.addButton(btn)
             if status == 'Pending':
                 btn.setChecked(True)
             btn.clicked.connect(lambda checked, s=status: self.filter_by_status(s))
             sidebar_layout.addWidget(btn)
+
+        # أزرار المجموعات تُضاف عند تحميلها من قاعدة البيانات
+        group_separator = QFrame()
+        group_separator.setFrameShape(QFrame.Shape.HLine)
+        group_separator.setStyleSheet("background-color: #dee2e6; margin: 5px 10px;")
+        sidebar_layout.addWidget(group_separator)
+
+        self.group_button_group = QButtonGroup(self)
+        self.group_button_group.setExclusive(True)
+        self.groups_layout = QVBoxLayout()
+        self.groups_layout.setContentsMargins(0, 0, 0, 0)
+        self.groups_layout.setSpacing(0)
+        all_groups_button = SidebarButton("كل المجموعات")
+        all_groups_button.setChecked(True)
+        self.group_button_group.addButton(all_groups_button)
+        all_groups_button.clicked.connect(lambda: self.filter_by_group(None))
+        self.groups_layout.addWidget(all_groups_button)
+        sidebar_layout.addLayout(self.groups_layout)
+
+        # أزرار أنواع العروض تُضاف عند ظهورها في الطلبات، ويمكن اختيار أكثر من نوع
+        offers_separator = QFrame()
+        offers_separator.setFrameShape(QFrame.Shape.HLine)
+        offers_separator.setStyleSheet("background-color: #dee2e6; margin: 5px 10px;")
+        sidebar_layout.addWidget(offers_separator)
+
+        self.offer_buttons = {}
+        self.offers_layout = QVBoxLayout()
+        self.offers_layout.setContentsMargins(0, 0, 0, 0)
+        self.offers_layout.setSpacing(0)
+        sidebar_layout.addLayout(self.offers_layout)
         
         sidebar_layout.addStretch()
+
+        # زر تصدير القائمة المفلترة
+        export_button = QPushButton("تصدير القائمة")
+        export_button.clicked.connect(self.export_current_view)
+        export_button.setStyleSheet("""
+            QPushButton {
+                margin: 10px 10px 0 10px;
+                padding: 6px;
+                border: 1px solid #dee2e6;
+                border-radius: 4px;
+                background-color: white;
+            }
+            QPushButton:hover {
+                background-color: #e9ecef;
+            }
+        """)
+        sidebar_layout.addWidget(export_button)
         
         # زر الإغلاق
         close_button = QPushButton("إغلاق البرنامج")
@@ -619,130 +639,657 @@ class MainWindow(QMainWindow):
         
         scroll_area.setWidget(self.orders_container)
         orders_layout.addWidget(scroll_area)
+        self.scroll_area = scroll_area
+        scroll_area.verticalScrollBar().valueChanged.connect(self.check_archive_scroll)
         
         main_layout.addWidget(orders_widget)
+
+        # تحديد جميع الطلبات الظاهرة وإلغاء التحديد
+        QShortcut(QKeySequence.StandardKey.SelectAll, self, self.mark_all_visible)
+        QShortcut(QKeySequence(Qt.Key.Key_Escape), self, self.clear_marks)
         
+    def load_startup(self):
+        """تحميل البداية على مراحل
+
+        أولاً الشاشة الأولى للفلتر الحالي فقط (استعلام محدود لا يعتمد على عدد
+        الطلبات) بأولوية المستخدم، ومعها بالتوازي على اتصالات المجمع الأخرى
+        القائمة كاملة والمجموعات وأعداد الحالات، وكل منها يُدمج عند وصوله.
+        """
+        if not self.async_db:
+            self.first_screen_pending = True
+            status = None if self.current_filter == 'all' else self.current_filter
+            self.executor.submit(fetch_first_screen, status, self.window_start,
+                                 priority=PRIORITY_USER, key='first_screen',
+                                 on_result=self.show_first_screen,
+                                 on_error=self.on_first_screen_error)
+        self.load_orders()
+        self.load_groups()
+        self.load_counts()
+
+    def show_first_screen(self, orders):
+        if not self.first_screen_pending:
+            return  # القائمة الكاملة وصلت قبلها
+        self.first_screen_pending = False
+        self.first_screen_shown = True
+        overlay = self.outbox.pending_statuses()
+        for order in orders:
+            if order['ID'] in overlay:
+                order['Accept_Reject'] = overlay[order['ID']]
+            self.orders_cache.upsert(order)
+        self.update_orders()
+
+    def on_first_screen_error(self, error):
+        # القائمة الكاملة تُعرض عند وصولها كالمعتاد
+        print(f"Error fetching first screen: {error}")
+        self.first_screen_pending = False
+
+    def load_counts(self):
+        if self.async_db:
+            return
+        self.executor.submit(fetch_status_counts, priority=PRIORITY_BACKGROUND, key='counts',
+                             on_result=self.update_counts, on_error=self.on_counts_error)
+
+    def update_counts(self, counts):
+        """عدد الطلبات لكل حالة بجانب أزرار الشريط الجانبي"""
+        for status, button in self.status_buttons.items():
+            button.setText(f"{STATUS_TRANSLATIONS.get(status, status)} ({counts.get(status, 0)})")
+        self.all_button.setText(f"جميع الطلبات ({sum(counts.values())})")
+
+    def on_counts_error(self, error):
+        print(f"Error fetching status counts: {error}")
+
+    def load_groups(self):
+        self.executor.submit(fetch_custom_groups, priority=PRIORITY_BACKGROUND,
+                             on_result=self.add_group_buttons,
+                             on_error=self.on_groups_error)
+
+    def on_groups_error(self, error):
+        print(f"Error fetching custom groups: {error}")
+
+    def add_group_buttons(self, groups):
+        for group in groups:
+            btn = SidebarButton(f"● {group['name']}")
+            if group.get('color'):
+                # لون النقطة والنص بلون المجموعة
+                btn.setStyleSheet(btn.styleSheet() + f"QPushButton {{ color: {group['color']}; }}")
+            self.group_button_group.addButton(btn)
+            btn.clicked.connect(lambda checked, g=group['id']: self.filter_by_group(g))
+            self.groups_layout.addWidget(btn)
+
     def load_orders(self):
-        self.update_thread = OrdersUpdateThread(self.db)
-        self.update_thread.orders_updated.connect(self.update_orders)
-        self.update_thread.start()
-    
-    def update_orders(self, orders):
+        since = hot_window_start()
+        if since != self.window_start:
+            # النافذة انتقلت ليوم جديد فصفحات الأرشيف لم تعد متصلة بها
+            self.orders_cache.clear_archive()
+            self.window_start = since
+        if self.async_db:
+            # إلغاء التحديث السابق إن كان ما زال جارياً حتى لا يطغى على الأحدث
+            if self.orders_task and not self.orders_task.done():
+                self.orders_task.cancel()
+            self.orders_task = asyncio.ensure_future(self.load_orders_async())
+            return
+        if self.fetch_worker:
+            # العامل يقارن بآخر رد أرسله، فلا يُلغى رد لم يُدمج بعد
+            if self.executor.is_active('orders'):
+                return
+            self.executor.submit(fetch_orders_delta, self.fetch_worker, self.window_start,
+                                 priority=PRIORITY_BACKGROUND, key='orders', on_result=self.on_orders_delta,
+                                 on_error=self.on_orders_delta_error)
+            return
+        # التحديث الجديد يلغي السابق إن كان ما زال جارياً، فلا تطغى نتيجة قديمة على الأحدث
+        self.stream_seen = None
+        self.executor.submit(stream_orders, self.window_start,
+                             priority=PRIORITY_BACKGROUND, key='orders',
+                             on_progress=self.append_orders_batch,
+                             on_result=self.finish_orders_stream,
+                             on_error=self.on_orders_stream_error)
+
+    def on_orders_stream_error(self, error):
+        print(f"Error streaming orders: {error}")
+        self.finish_orders_stream(False)
+
+    def on_orders_delta(self, delta):
+        self.apply_orders_delta(*delta)
+
+    def on_orders_delta_error(self, error):
+        print(f"Error fetching orders from worker: {error}")
+
+    async def load_orders_async(self):
+        self.stream_seen = None
         try:
-            self.orders_cache = orders
-            
-            # حفظ حالة التحديد والتواريخ للكروت الحالية
-            current_selections = {}
-            current_dates = {}
-            for i in range(self.orders_layout.count()):
-                widget = self.orders_layout.itemAt(i).widget()
-                if isinstance(widget, OrderCard):
-                    order_id = str(widget.order_data['ID'])
-                    current_selections[order_id] = widget.selection_level
-                    if hasattr(widget, 'selection_date'):
-                        current_dates[order_id] = widget.selection_date
-
-            # حذف جميع الكروت الموجودة
-            while self.orders_layout.count():
-                item = self.orders_layout.takeAt(0)
-                if item.widget():
-                    item.widget().deleteLater()
-
-            # تجهيز قائمة الكروت مع تواريخها
-            cards_data = []
+            async for batch in self.async_db.iter_orders(since=self.window_start):
+                self.append_orders_batch(batch)
+        except asyncio.CancelledError:
+            self.stream_seen = None
+            raise
+        except Exception as e:
+            print(f"Error streaming orders: {e}")
+            self.finish_orders_stream(False)
+            return
+        self.finish_orders_stream(True)
+
+    def append_orders_batch(self, batch):
+        """إضافة دفعة من الطلبات للقائمة فور وصولها"""
+        try:
+            if self.stream_seen is None:
+                # الدفعة الأولى: نبدأ العرض مباشرة
+                self.stream_seen = set()
+                self.first_screen_pending = False
+                # التغييرات المعلقة في السجل المحلي تظهر فوق بيانات الخادم
+                self.stream_overlay = self.outbox.pending_statuses()
+                # الدفعات تصل الأحدث أولاً، فالترتيبات الأخرى تنتظر اكتمال الجلب،
+                # وكذلك إذا ظهرت الشاشة الأولى حتى لا تُستبدل بدفعة فيها أقل منها،
+                # أو إذا كانت صفحات أرشيف معروضة حتى لا تختفي من أسفل القائمة
+                self.stream_rendering = (self.sort_key == 'date' and self.sort_descending
+                                         and not self.first_screen_shown
+                                         and not self.orders_cache.archive_ids)
+                if self.stream_rendering:
+                    self.render_scheduler.cancel()
+                    self.clear_cards()
+                    self.add_spacer()
+            for order in batch:
+                if order['ID'] in self.stream_overlay:
+                    order['Accept_Reject'] = self.stream_overlay[order['ID']]
+                self.orders_cache.upsert(order)
+                self.stream_seen.add(order['ID'])
+
+            if self.stream_rendering:
+                matching = self.matching_ids()
+                for order in batch:
+                    if (matching is None or order['ID'] in matching) and self.search_matches(order):
+                        # الإضافة قبل الـ spacer في نهاية القائمة
+                        self.add_card(order, self.orders_layout.count() - 1)
+        except Exception as e:
+            print(f"Error appending orders: {e}")
+
+    def finish_orders_stream(self, success):
+        stream_seen = self.stream_seen
+        self.stream_seen = None
+        self.first_screen_pending = False
+        self.first_screen_shown = False
+        if not success:
+            # إعادة عرض القائمة كاملة إذا انقطع الجلب في منتصفه
+            if stream_seen is not None and self.stream_rendering:
+                self.update_orders()
+            return
+        # حذف الطلبات التي لم تعد في نتيجة الخادم
+        self.orders_cache.retain(stream_seen or set())
+        if not self.stream_rendering:
+            self.update_orders()
+        else:
+            self.update_offer_facets()
+        self.load_counts()
+        QTimer.singleShot(100, self.check_archive_scroll)
+
+    def apply_orders_delta(self, full, rows, removed):
+        """دمج فروقات عملية الجلب؛ لا إعادة بناء إذا لم يتغير شيء"""
+        self.first_screen_pending = False
+        self.first_screen_shown = False
+        try:
+            overlay = self.outbox.pending_statuses()
+            for order in rows:
+                if order['ID'] in overlay:
+                    order['Accept_Reject'] = overlay[order['ID']]
+            self.orders_cache.apply_delta(rows, removed, full)
+            if full or rows or removed:
+                self.update_orders()
+                self.load_counts()
+            QTimer.singleShot(100, self.check_archive_scroll)
+        except Exception as e:
+            print(f"Error applying orders delta: {e}")
+
+    def archive_busy(self):
+        if self.async_db:
+            return self.archive_task is not None and not self.archive_task.done()
+        return self.executor.is_active('archive')
+
+    def load_archive(self, key, before, before_id=None, search=None):
+        if self.async_db:
+            self.archive_task = asyncio.ensure_future(
+                self.load_archive_async(key, before, before_id, search))
+            return
+        self.executor.submit(fetch_archive_page, before, before_id, search,
+                             priority=PRIORITY_USER, key='archive',
+                             on_result=partial(self.on_archive_page, key),
+                             on_error=self.on_archive_error)
+
+    def on_archive_error(self, error):
+        print(f"Error fetching archived orders: {error}")
+
+    async def load_archive_async(self, key, before, before_id, search):
+        try:
+            orders = await self.async_db.get_archived_orders(before, before_id, search)
+        except Exception as e:
+            print(f"Error fetching archived orders: {e}")
+            return
+        self.on_archive_page(key, orders)
+
+    def check_archive_scroll(self, *args):
+        """جلب الصفحة التالية من الأرشيف عند الوصول لنهاية القائمة"""
+        bar = self.scroll_area.verticalScrollBar()
+        if bar.value() < bar.maximum() - 200:
+            return
+        if (self.window_start is None or self.orders_cache.archive_exhausted
+                or self.current_filter == 'Pending' or self.search_text
+                or self.stream_seen is not None or self.archive_busy()):
+            return
+        before, before_id = self.orders_cache.archive_cursor or (self.window_start, None)
+        self.load_archive(('scroll', self.orders_cache.archive_cursor), before, before_id)
+
+    def search_archive(self):
+        if self.window_start is None or not self.search_text:
+            return
+        if self.archive_busy():
+            self.archive_search_timer.start(400)
+            return
+        self.load_archive(('search', self.search_text), self.window_start,
+                          search=self.search_text)
+
+    def on_archive_page(self, key, orders):
+        try:
+            overlay = self.outbox.pending_statuses()
             for order in orders:
-                # فحص الفلتر الحالي
-                status_filter = self.current_filter == 'all' or order['Accept_Reject'] == self.current_filter
-                # فحص البحث
-                search_filter = self.search_text.lower() in order.get('customer_name', '').lower() or \
-                              self.search_text.lower() in str(order.get('customer_phone', '')).lower()
-                # فحص التحديد
-                order_id = str(order['ID'])
-                selection_level = current_selections.get(order_id, 0)
-                selected_filter = not self.show_selected_only or selection_level > 0
-
-                if status_filter and search_filter and selected_filter:
-                    selection_date = current_dates.get(order_id)
-                    cards_data.append((order, selection_level, selection_date))
-
-            # ترتيب الكروت حسب التاريخ إذا كان فلتر المحددة مفعل
-            if self.show_selected_only:
-                cards_data.sort(
-                    key=lambda x: x[2] if x[2] else "0",  # استخدام التاريخ للترتيب
-                    reverse=self.sort_descending  # ترتيب تنازلي أو تصاعدي
-                )
-
-            # إضافة الكروت المرتبة
-            for order, selection_level, _ in cards_data:
-                card = OrderCard(order, self.available_statuses)
-                order_id = str(order['ID'])
-                # استعادة حالة التحديد والتاريخ
-                if order_id in current_selections:
-                    card.selection_level = current_selections[order_id]
-                    card.selection_circle.level = card.selection_level
-                    card.selection_circle.update_color()
-                    if order_id in current_dates:
-                        card.selection_date = current_dates[order_id]
-                        card.update_date_label()
-                card.status_changed.connect(self.on_status_changed)
-                self.orders_layout.addWidget(card)
-
-            # إضافة widget فارغ في النهاية لدفع الكروت للأعلى
-            spacer = QWidget()
-            spacer.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
-            self.orders_layout.addWidget(spacer)
+                if order['ID'] in overlay:
+                    order['Accept_Reject'] = overlay[order['ID']]
+            if key[0] == 'scroll':
+                if key[1] != self.orders_cache.archive_cursor:
+                    return  # السلسلة أُعيدت أثناء الجلب
+                self.orders_cache.add_scroll_page(orders, ARCHIVE_PAGE_SIZE)
+            else:
+                self.orders_cache.add_archive_page(key, orders)
+            # صفحات التمرير لا تُخرج أثناء التمرير، فقط عند تغيير العرض
+            self.orders_cache.trim_archive(keep=[key, *self.orders_cache.scroll_keys()])
+
+            if (key[0] == 'scroll' and self.sort_key == 'date' and self.sort_descending
+                    and not self.render_scheduler.busy()):
+                # الصفحة أقدم من كل المعروض فتُضاف في نهاية القائمة
+                matching = self.matching_ids()
+                for order in orders:
+                    if (matching is None or order['ID'] in matching) and self.search_matches(order):
+                        self.add_card(order, self.orders_layout.count() - 1)
+                QTimer.singleShot(100, self.check_archive_scroll)
+            elif key[0] == 'scroll' or key[1] == self.search_text:
+                self.update_orders()
+        except Exception as e:
+            print(f"Error adding archived orders: {e}")
+
+    def reset_view(self):
+        """إعادة بناء القائمة بعد تغيير الفلتر مع إخراج الأرشيف الزائد"""
+        self.orders_cache.trim_archive()
+        self.update_orders()
+        QTimer.singleShot(100, self.check_archive_scroll)
+
+    def clear_cards(self):
+        """حذف جميع الكروت الموجودة"""
+        while self.orders_layout.count():
+            item = self.orders_layout.takeAt(0)
+            if item.widget():
+                item.widget().deleteLater()
+
+    def add_spacer(self):
+        # إضافة widget فارغ في النهاية لدفع الكروت للأعلى
+        spacer = QWidget()
+        spacer.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
+        self.orders_layout.addWidget(spacer)
+
+    def matching_ids(self):
+        """أرقام الطلبات المطابقة لفلاتر الحالة والمجموعة والتحديد (None = الكل)"""
+        status = None if self.current_filter == 'all' else self.current_filter
+        return self.orders_cache.matching_ids(status, self.current_group, self.show_selected_only,
+                                              self.offer_filter)
+
+    def search_matches(self, order):
+        if not self.search_text:
+            return True
+        return self.search_text in (order.get('customer_name') or '').lower() or \
+               self.search_text in str(order.get('customer_phone') or '').lower()
+
+    def add_card(self, order, index=-1, insert=True):
+        order_id = order['ID']
+        card = OrderCard(order, self.available_statuses, async_db=self.async_db,
+                         executor=self.executor,
+                         selection_level=self.orders_cache.selection_level(order_id),
+                         selection_date=self.orders_cache.selection_time(order_id))
+        card.status_changed.connect(self.on_status_changed)
+        card.selection_changed.connect(self.orders_cache.set_selection)
+        card.mark_clicked.connect(self.on_card_mark_clicked)
+        card.bulk_status_requested.connect(self.change_marked_status)
+        card.set_marked(order['ID'] in self.marked_ids)
+        card.marked_count = len(self.marked_ids)
+        if insert:
+            self.orders_layout.insertWidget(index, card)
+        return card
+    
+    def update_orders(self, orders=None):
+        """إعادة بناء الكروت من الكاش؛ orders (إن وجدت) تُدمج فيه أولاً
+
+        البناء نفسه في RenderScheduler: الطلبات المتتالية تُدمج في بناء
+        واحد، والكروت تُبنى على شرائح بعد الجزء الظاهر.
+        """
+        try:
+            if orders is not None:
+                self.orders_cache.replace_all(orders)
+            self.render_scheduler.request()
         except Exception as e:
             print(f"Error updating orders: {e}")
 
+    def prepare_cards(self):
+        # أي إعادة بناء كاملة تلغي العرض التدريجي الجاري
+        self.stream_rendering = False
+        self.card_chunk = None
+        self.chunk_cards = []
+        self.clear_cards()
+        self.add_spacer()
+
+        # الفلترة والبحث والترتيب على أعمدة الكاش دفعة واحدة
+        self.update_offer_facets()
+        status = None if self.current_filter == 'all' else self.current_filter
+        return self.orders_cache.query(status, self.current_group, self.show_selected_only,
+                                       self.search_text, self.sort_key, self.sort_descending,
+                                       offers=self.offer_filter)
+
+    def update_offer_facets(self):
+        """عدد الطلبات لكل نوع عرض ضمن باقي الفلاتر الحالية بجانب أزراره"""
+        status = None if self.current_filter == 'all' else self.current_filter
+        counts = self.orders_cache.offer_counts(status, self.current_group,
+                                                self.show_selected_only, self.search_text)
+        for token in sorted(counts.keys() - self.offer_buttons.keys(), key=offer_name):
+            btn = SidebarButton("")
+            btn.setAutoExclusive(False)
+            btn.clicked.connect(lambda checked, t=token: self.toggle_offer_filter(t, checked))
+            self.offer_buttons[token] = btn
+            self.offers_layout.addWidget(btn)
+        for token, btn in self.offer_buttons.items():
+            btn.setText(f"{offer_name(token)} ({counts.get(token, 0)})")
+
+    def build_card(self, order):
+        # الكروت تُبنى في حاوية مخفية دون تخطيط قبل الـ spacer، ثم تُرتب وتظهر
+        # كلها مرة واحدة؛ إظهار كل كرت وحده يعيد حساب تخطيط القائمة كاملة
+        if self.card_chunk is None:
+            self.card_chunk = QWidget()
+            self.card_chunk.setObjectName("cardChunk")
+            self.card_chunk.hide()
+            self.orders_layout.insertWidget(self.orders_layout.count() - 1, self.card_chunk)
+            self.chunk_cards = []
+        card = self.add_card(order, insert=False)
+        card.setParent(self.card_chunk)
+        self.chunk_cards.append(card)
+
+    def reveal_cards(self):
+        if self.card_chunk is None:
+            return
+        chunk_layout = QVBoxLayout(self.card_chunk)
+        chunk_layout.setContentsMargins(0, 0, 0, 0)
+        chunk_layout.setSpacing(self.orders_layout.spacing())
+        for card in self.chunk_cards:
+            chunk_layout.addWidget(card)
+        self.card_chunk.show()
+        self.card_chunk = None
+        self.chunk_cards = []
+
     def on_status_changed(self, order_id, new_status):
         # تحديث الواجهة بعد تغيير الحالة
         try:
-            # تحديث الكاش
-            for order in self.orders_cache:
-                if order['ID'] == order_id:
-                    order['Accept_Reject'] = new_status
-                    break
+            # تحديث الكاش وتسجيل التغيير في السجل المحلي
+            order = self.orders_cache.update(order_id, Accept_Reject=new_status)
+            if order is not None:
+                self.outbox.enqueue([(order_id, new_status, order['ModifiedDate'])])
             # تحديث الواجهة
-            self.update_orders(self.orders_cache)
+            self.update_orders()
+            self.flush_outbox()
         except Exception as e:
             print(f"Error in status change: {e}")
 
+    def flush_outbox(self):
+        """إرسال تغييرات الحالة المعلقة لقاعدة البيانات بالترتيب"""
+        if self.executor.is_active('outbox') or \
+                (self.outbox_task and not self.outbox_task.done()):
+            # سيُعاد الإرسال بعد انتهاء الجولة الحالية
+            self.outbox_dirty = True
+            return
+        self.outbox_dirty = False
+        self.outbox_timer.stop()
+        if not self.outbox.pending_count():
+            return
+
+        if self.async_db:
+            self.outbox_task = asyncio.ensure_future(self.flush_outbox_async())
+            return
+
+        self.executor.submit(flush_status_outbox, self.outbox.path,
+                             priority=PRIORITY_USER, key='outbox',
+                             on_result=lambda result: self.on_outbox_flushed(True, *result),
+                             on_error=self.on_outbox_error)
+
+    def on_outbox_error(self, error):
+        print(f"Error replaying status changes: {error}")
+        self.on_outbox_flushed(False, [], [])
+
+    async def flush_outbox_async(self):
+        try:
+            applied, conflicts = await replay_outbox_async(self.outbox, self.async_db)
+        except Exception as e:
+            print(f"Error replaying status changes: {e}")
+            self.on_outbox_flushed(False, [], [])
+            return
+        self.on_outbox_flushed(True, applied, conflicts)
+
+    def on_outbox_flushed(self, success, applied, conflicts):
+        if not success:
+            # لا اتصال: نحتفظ بالتغييرات ونعيد المحاولة لاحقاً
+            self.outbox_failures += 1
+            delay = min(OUTBOX_RETRY_MAX, OUTBOX_RETRY_BASE * 2 ** (self.outbox_failures - 1))
+            self.outbox_timer.start(delay)
+            return
+        self.outbox_failures = 0
+
+        for order_id, status, server_modified in applied:
+            self.orders_cache.update(order_id, ModifiedDate=server_modified)
+        if applied:
+            self.load_counts()
+
+        if conflicts:
+            # الخادم هو المرجع عند التعارض: نعرض حالته ونبلغ المستخدم
+            lines = []
+            for order_id, status, server_status, server_modified in conflicts:
+                order = self.orders_cache.update(order_id, Accept_Reject=server_status,
+                                                 ModifiedDate=server_modified)
+                if order:
+                    name = order.get('customer_name', '')
+                else:
+                    name = str(order_id)
+                lines.append(f"{name}: {STATUS_TRANSLATIONS.get(status, status)} ← "
+                             f"{STATUS_TRANSLATIONS.get(server_status, server_status)}")
+            self.outbox.clear_conflicts()
+            self.update_orders()
+            QMessageBox.warning(self, "تعارض في تغيير الحالة",
+                                "تم تعديل هذه الطلبات من جهاز آخر قبل حفظ تغييرك، "
+                                "فتم اعتماد الحالة المحفوظة:\n\n" + "\n".join(lines))
+
+        if self.outbox_dirty:
+            self.flush_outbox()
+
+    def export_current_view(self):
+        """تصدير الطلبات حسب الفلتر الحالي إلى ملف"""
+        if self.executor.is_active('export'):
+            return
+        path, _ = QFileDialog.getSaveFileName(
+            self, "تصدير الطلبات", "orders.csv", "CSV (*.csv);;Excel (*.xlsx)")
+        if not path:
+            return
+
+        status = None if self.current_filter == 'all' else self.current_filter
+        self.export_progress = QProgressDialog("جاري تصدير الطلبات...", "إلغاء", 0, 0, self)
+        self.export_progress.setWindowModality(Qt.WindowModality.WindowModal)
+        # التصدير يشغل أحد threads المجمع باتصاله الخاص حتى ينتهي
+        self.export_task = self.executor.submit(
+            export_orders_task, path, status, self.search_text, self.show_selected_only,
+            priority=PRIORITY_USER, key='export',
+            on_progress=self.on_export_progress,
+            on_result=self.on_export_finished,
+            on_error=self.on_export_error)
+        self.export_progress.canceled.connect(self.export_task.cancel)
+        self.export_progress.show()
+
+    def on_export_progress(self, written, scanned, total):
+        if total and self.export_progress.maximum() != total:
+            self.export_progress.setMaximum(total)
+        self.export_progress.setLabelText(f"جاري تصدير الطلبات... ({written})")
+        if self.export_progress.maximum():
+            self.export_progress.setValue(min(scanned, self.export_progress.maximum() - 1))
+
+    def on_export_finished(self, count):
+        self.export_progress.reset()
+        QMessageBox.information(self, "تصدير الطلبات", f"تم تصدير {count} طلب")
+
+    def on_export_error(self, error):
+        self.export_progress.reset()
+        if not isinstance(error, ExportCancelled):
+            print(f"Error exporting orders: {error}")
+            QMessageBox.warning(self, "تصدير الطلبات", f"فشل التصدير: {error}")
+
+    def visible_cards(self):
+        cards = []
+        for i in range(self.orders_layout.count()):
+            widget = self.orders_layout.itemAt(i).widget()
+            if isinstance(widget, OrderCard):
+                cards.append(widget)
+            elif widget is not None and widget.objectName() == "cardChunk" and widget.layout():
+                chunk_layout = widget.layout()
+                cards.extend(chunk_layout.itemAt(j).widget() for j in range(chunk_layout.count()))
+        return cards
+
+    def visible_order_ids(self):
+        if self.render_scheduler.busy() and not self.render_scheduler.pending:
+            # أثناء البناء على شرائح: كل طلبات الفلتر الحالي وليس المبني منها فقط
+            return [order['ID'] for order in self.render_scheduler.items]
+        return [card.order_data['ID'] for card in self.visible_cards()]
+
+    def apply_marks(self):
+        """تحديث مظهر الكروت حسب التحديد المتعدد"""
+        cards = self.visible_cards()
+        marked_count = len(self.marked_ids.intersection(self.visible_order_ids()))
+        for card in cards:
+            card.set_marked(card.order_data['ID'] in self.marked_ids)
+            card.marked_count = marked_count
+
+    def on_card_mark_clicked(self, order_id, modifiers):
+        visible = self.visible_order_ids()
+        ctrl = bool(modifiers & Qt.KeyboardModifier.ControlModifier)
+        shift = bool(modifiers & Qt.KeyboardModifier.ShiftModifier)
+        if shift and self.mark_anchor in visible:
+            # تحديد النطاق من آخر كرت نُقر عليه حتى هذا الكرت
+            start = visible.index(self.mark_anchor)
+            end = visible.index(order_id)
+            if start > end:
+                start, end = end, start
+            if not ctrl:
+                self.marked_ids.clear()
+            self.marked_ids.update(visible[start:end + 1])
+        elif ctrl:
+            self.marked_ids ^= {order_id}
+            self.mark_anchor = order_id
+        else:
+            self.marked_ids = {order_id}
+            self.mark_anchor = order_id
+        self.apply_marks()
+
+    def mark_all_visible(self):
+        """تحديد جميع الطلبات في الفلتر الحالي"""
+        self.marked_ids = set(self.visible_order_ids())
+        self.apply_marks()
+
+    def clear_marks(self):
+        self.marked_ids.clear()
+        self.mark_anchor = None
+        self.apply_marks()
+
+    def change_marked_status(self, new_status):
+        """تغيير حالة جميع الطلبات المحددة في معاملة واحدة"""
+        visible = set(self.visible_order_ids())
+        changes = []
+        for order_id in self.marked_ids & visible:
+            order = self.orders_cache.get(order_id)
+            if order is not None and order['Accept_Reject'] != new_status:
+                self.orders_cache.update(order_id, Accept_Reject=new_status)
+                changes.append((order_id, new_status, order['ModifiedDate']))
+        if not changes:
+            return
+
+        # دفعة واحدة في السجل المحلي تُطبق في معاملة واحدة، وتحديث واحد للواجهة
+        self.outbox.enqueue(changes)
+        self.update_orders()
+        self.flush_outbox()
+
     def filter_by_status(self, status):
         self.current_filter = status
-        self.update_orders(self.orders_cache)
+        self.reset_view()
             
+    def filter_by_group(self, group_id):
+        self.current_group = group_id
+        self.reset_view()
+
+    def toggle_offer_filter(self, token, checked):
+        """إضافة نوع عرض للفلتر أو إزالته؛ تظهر الطلبات التي فيها أي من الأنواع المختارة"""
+        if checked:
+            self.offer_filter.add(token)
+        else:
+            self.offer_filter.discard(token)
+        self.reset_view()
+
     def show_all_orders(self):
         self.current_filter = 'all'
-        self.update_orders(self.orders_cache)
+        self.reset_view()
 
     def search_orders(self):
         self.search_text = self.search_input.text().lower()
-        self.update_orders(self.orders_cache)
+        self.reset_view()
+        if self.search_text:
+            self.archive_search_timer.start(400)
 
     def toggle_selected_filter(self):
         """تبديل فلتر العناصر المحددة"""
         self.show_selected_only = not self.show_selected_only
-        self.update_orders(self.orders_cache)
+        # عرض المحددة مرتب افتراضياً حسب وقت التحديد
+        if self.show_selected_only and self.sort_key == 'date':
+            self.sort_key = 'selection'
+        elif not self.show_selected_only and self.sort_key == 'selection':
+            self.sort_key = 'date'
+        self.update_orders()
 
     def toggle_sort_order(self):
         """تبديل اتجاه الترتيب"""
         self.sort_descending = not self.sort_descending
-        self.update_orders(self.orders_cache)
+        self.update_orders()
+
+    def set_sort_key(self, key):
+        self.sort_key = key
+        self.update_orders()
+
+    def show_sort_menu(self, pos):
+        """اختيار مفتاح الترتيب بالزر الأيمن على زر الترتيب"""
+        menu = QMenu(self)
+        for key, label in SORT_KEY_LABELS.items():
+            action = menu.addAction(label)
+            action.setCheckable(True)
+            action.setChecked(key == self.sort_key)
+            action.triggered.connect(partial(self.set_sort_key, key))
+        menu.exec(self.sort_button.mapToGlobal(pos))
+        menu.deleteLater()
     
     def close_application(self):
         try:
             # إيقاف المؤقت
             self.update_timer.stop()
             
-            # انتظار انتهاء جميع الـ threads
-            for i in range(self.orders_layout.count()):
-                widget = self.orders_layout.itemAt(i).widget()
-                if isinstance(widget, OrderCard) and hasattr(widget, 'update_thread'):
-                    if widget.update_thread and widget.update_thread.isRunning():
-                        widget.update_thread.wait()
+            # إلغاء المهام وانتظار الجاري منها ثم إغلاق اتصالاتها
+            self.outbox_timer.stop()
+            self.executor.shutdown()
             
             # إغلاق اتصال قاعدة البيانات
             self.db.close_connection()
+            if self.fetch_worker:
+                self.fetch_worker.close()
             
             # إغلاق التطبيق
             self.close()
@@ -757,15 +1304,18 @@ class MainWindow(QMainWindow):
             # إيقاف المؤقت
             self.update_timer.stop()
             
-            # انتظار انتهاء جميع الـ threads
-            for i in range(self.orders_layout.count()):
-                widget = self.orders_layout.itemAt(i).widget()
-                if isinstance(widget, OrderCard) and hasattr(widget, 'update_thread'):
-                    if widget.update_thread and widget.update_thread.isRunning():
-                        widget.update_thread.wait()
+            # إلغاء المهام وانتظار الجاري منها ثم إغلاق اتصالاتها
+            self.outbox_timer.stop()
+            self.executor.shutdown()
             
             # إغلاق اتصال قاعدة البيانات
             self.db.close_connection()
+            if self.fetch_worker:
+                self.fetch_worker.close()
+            if self.async_db:
+                if self.orders_task and not self.orders_task.done():
+                    self.orders_task.cancel()
+                asyncio.ensure_future(self.async_db.close_connection())
                 
             event.accept()
         except Exception as e:
@@ -773,6 +1323,8 @@ class MainWindow(QMainWindow):
             event.accept()
             
 if __name__ == '__main__':
+    # عملية الجلب المنفصلة تُشغل بـ spawn، ويلزم هذا في النسخة المجمعة
+    multiprocessing.freeze_support()
     app = QApplication(sys.argv)
     app.setLayoutDirection(Qt.LayoutDirection.RightToLeft)
     
@@ -785,6 +1337,15 @@ if __name__ == '__main__':
         }
     """)
     
-    window = MainWindow()
+    if async_enabled():
+        # طبقة قاعدة البيانات غير المتزامنة فوق حلقة أحداث Qt
+        loop = create_event_loop(app)
+        window = MainWindow(async_db=AsyncDatabase())
+        window.show()
+        with loop:
+            loop.run_forever()
+        sys.exit(0)
+
+    window = MainWindow(fetch_worker=FetchWorker() if worker_enabled() else None)
     window.show()
     sys.exit(app.exec())
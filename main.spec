@@ -5,7 +5,7 @@ a = Analysis(
     ['main.py'],
     pathex=[],
     binaries=[],
-    datas=[('.env', '.'), ('selected_cards.json', '.'), ('selection_dates.json', '.'), ('config.py', '.'), ('database.py', '.'), ('order_details.py', '.'), ('db_schema.py', '.')],
+    datas=[('.env', '.'), ('selected_cards.json', '.'), ('selection_dates.json', '.'), ('config.py', '.'), ('database.py', '.'), ('order_details.py', '.'), ('db_schema.py', '.'), ('order_row.py', '.'), ('async_database.py', '.'), ('selection_state.py', '.'), ('order_export.py', '.'), ('outbox.py', '.'), ('order_cache.py', '.'), ('card_render.py', '.'), ('fetch_worker.py', '.'), ('order_columns.py', '.'), ('render_scheduler.py', '.'), ('task_executor.py', '.'), ('offers.py', '.')],
     hiddenimports=['mysql.connector.plugins.mysql_native_password'],
     hookspath=[],
     hooksconfig={},
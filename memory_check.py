@@ -0,0 +1,336 @@
+import argparse
+import gc
+import os
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from datetime import datetime, timedelta
+
+from config import ORDERS_FETCH_CHUNK
+from order_row import OrderRow
+
+# فحص تسرب الذاكرة: دورات تحديث / فلترة / بحث / تغيير حالة / تفاصيل على
+# نافذة حقيقية (offscreen) فوق قاعدة بيانات اصطناعية في الذاكرة، مع قياس
+# نمو الذاكرة (tracemalloc) وعدد كائنات Qt وكائنات البرنامج الحية بعد كل دورة.
+# يخرج برمز 1 إذا تجاوز النمو الحد، فيصلح للتشغيل قبل كل إصدار.
+
+STATUSES = ['Pending', 'Accepted', 'Rejected']
+OFFERS = ['تصميم معماري;تصميم إنشائي', 'تصميم معماري', 'إشراف;تصميم داخلي', 'تصميم إنشائي;إشراف']
+
+# الكائنات الحية تُعد لأصناف هذه الوحدات (Database، OrderRow، Task ...)
+APP_MODULES = {'main', 'database', 'order_details', 'task_executor', 'render_scheduler',
+               'order_row', 'order_cache', 'card_render', 'outbox'}
+
+
+class SyntheticDatabase:
+    """بديل Database في الذاكرة بنفس الواجهة التي تستخدمها النافذة
+
+    البيانات مشتركة بين كل النسخ (كخادم واحد)، وكل تحديث يبني صفوفاً جديدة
+    كما يفعل المؤشر الحقيقي، فتظهر أي صفوف قديمة تبقى محجوزة.
+    """
+
+    orders = {}
+    lock = threading.Lock()
+    def __init__(self):
+        self.connection = None
+        self.measure_bytes = False
+        self.last_bytes = 0
+
+    @classmethod
+    def populate(cls, count):
+        base = datetime(2024, 1, 1)
+        cls.orders = {}
+        for i in range(count):
+            cls.orders[i + 1] = {
+                'ID': i + 1, 'Accept_Reject': STATUSES[i % 3],
+                'customer_name': f'عميل {i}', 'customer_phone': f'05{i:08d}',
+                'Offers': OFFERS[i % len(OFFERS)],
+                'Date': base + timedelta(hours=count - i), 'ModifiedDate': base,
+                'custom_groups': 'مجموعة أ' if i % 4 == 0 else None,
+                'group_colors': '#ff0000' if i % 4 == 0 else None,
+                'group_ids': [1] if i % 4 == 0 else None,
+            }
+
+    def ensure_connection(self):
+        return True
+
+    def connect(self):
+        return True
+
+    def keepalive(self, idle=None):
+        pass
+
+    def close_connection(self):
+        pass
+
+    def get_order_statuses(self):
+        return list(STATUSES)
+
+    def get_custom_groups(self):
+        return [{'id': 1, 'name': 'مجموعة أ', 'color': '#ff0000', 'is_active': 1}]
+
+    def iter_orders(self, chunk_size=ORDERS_FETCH_CHUNK, since=None):
+        with self.lock:
+            rows = [OrderRow.from_dict(order) for order in self.orders.values()]
+        rows.sort(key=lambda order: order['Date'], reverse=True)
+        for start in range(0, len(rows), chunk_size):
+            yield rows[start:start + chunk_size]
+
+    def get_orders(self, since=None):
+        return [row for batch in self.iter_orders(since=since) for row in batch]
+
+    def get_first_screen(self, status=None, since=None, limit=30):
+        rows = [row for batch in self.iter_orders() for row in batch
+                if status is None or row['Accept_Reject'] == status]
+        return rows[:limit]
+
+    def get_archived_orders(self, before, before_id=None, search=None, limit=None):
+        return []
+
+    def count_orders(self, status=None, search=None):
+        return len(self.orders)
+
+    def count_orders_by_status(self):
+        with self.lock:
+            return dict(Counter(order['Accept_Reject'] for order in self.orders.values()))
+
+    def get_order_details(self, order_id):
+        order = self.orders.get(order_id)
+        if order is None:
+            return {}
+        return {'ID': order_id, 'Name': order['customer_name'], 'Phone': order['customer_phone'],
+                'Email': f'client{order_id}@example.com', 'Offers': order['Offers'],
+                'Accept_Reject': order['Accept_Reject'], 'Details': 'تفاصيل ' * 40,
+                'Date': order['Date'], 'custom_groups': order['custom_groups']}
+
+    def apply_status_changes(self, changes):
+        results = []
+        with self.lock:
+            for order_id, status, base_modified in changes:
+                order = self.orders[order_id]
+                if base_modified is not None and order['ModifiedDate'] != base_modified:
+                    results.append((False, order['Accept_Reject'], order['ModifiedDate']))
+                    continue
+                order['Accept_Reject'] = status
+                order['ModifiedDate'] = datetime.now().replace(microsecond=0)
+                results.append((True, status, order['ModifiedDate']))
+        return results
+
+
+class MemoryCheck:
+    def __init__(self, app, window):
+        from PyQt6.QtCore import QCoreApplication, QEvent, QObject, QPoint
+        from PyQt6.QtGui import QContextMenuEvent
+        self.QObject = QObject
+        self.QPoint = QPoint
+        self.QContextMenuEvent = QContextMenuEvent
+        self.flush_deletes = lambda: QCoreApplication.sendPostedEvents(
+            None, QEvent.Type.DeferredDelete.value)
+        self.app = app
+        self.window = window
+        self.cycle_number = 0
+
+    def settle(self, timeout=30):
+        """انتظار انتهاء مهام قاعدة البيانات والبناء ثم تنفيذ deleteLater المعلق"""
+        deadline = time.perf_counter() + timeout
+        while time.perf_counter() < deadline:
+            self.app.processEvents()
+            if not self.window.executor.active and not self.window.render_scheduler.busy():
+                break
+            time.sleep(0.001)
+        self.app.processEvents()
+        self.flush_deletes()
+
+    def close_popups_soon(self):
+        from PyQt6.QtCore import QTimer
+
+        def close():
+            widget = self.app.activePopupWidget() or self.app.activeModalWidget()
+            if widget is None:
+                QTimer.singleShot(5, close)
+            elif hasattr(widget, 'done'):
+                # التفاصيل تُغلق بعد وصولها، كما يفعل المستخدم
+                if widget.executor.active:
+                    QTimer.singleShot(5, close)
+                else:
+                    widget.done(0)
+            else:
+                widget.close()
+        QTimer.singleShot(5, close)
+
+    def first_card(self):
+        cards = self.window.visible_cards()
+        return cards[0] if cards else None
+
+    def cycle(self):
+        """دورة واحدة تحاكي استخدام المكتب: تحديث، فلاتر، بحث، قائمة الحالة، تفاصيل"""
+        window = self.window
+        self.cycle_number += 1
+        window.load_orders()
+        self.settle()
+        for status in ('Accepted', 'Rejected', 'all', 'Pending'):
+            window.filter_by_status(status)
+            self.settle()
+        window.filter_by_group(1)
+        self.settle()
+        window.filter_by_group(None)
+        self.settle()
+        window.search_input.setText(f'عميل {self.cycle_number % 10}')
+        self.settle()
+        window.search_input.setText('')
+        window.archive_search_timer.stop()
+        self.settle()
+
+        card = self.first_card()
+        if card is not None:
+            # القائمة تُنشأ وتُغلق كما عند النقر بالزر الأيمن
+            position = self.QPoint(5, 5)
+            self.close_popups_soon()
+            card.contextMenuEvent(self.QContextMenuEvent(
+                self.QContextMenuEvent.Reason.Mouse, position, card.mapToGlobal(position)))
+            current = card.order_data['Accept_Reject']
+            card.change_status(STATUSES[(STATUSES.index(current) + 1) % len(STATUSES)])
+            self.settle()
+
+        card = self.first_card()
+        if card is not None:
+            self.close_popups_soon()
+            card.mouseDoubleClickEvent(None)
+            self.settle()
+
+    def sample(self):
+        gc.collect()
+        self.flush_deletes()
+        # العد قبل اللقطة: أول عد ينشئ أصنافاً كسولة (enum في PyQt6) لا يجب أن تُحسب نمواً
+        objects = self.live_objects()
+        gc.collect()
+        return tracemalloc.take_snapshot(), objects
+
+    def live_objects(self):
+        """عدد الكائنات الحية لكل صنف: كائنات Qt (من النوافذ ومن Python) وأصناف البرنامج"""
+        from PyQt6 import sip
+        seen = set()
+        counts = Counter()
+
+        def add(obj):
+            address = sip.unwrapinstance(obj)
+            if address not in seen:
+                seen.add(address)
+                counts[type(obj).__name__] += 1
+
+        for widget in self.app.topLevelWidgets():
+            add(widget)
+            for child in widget.findChildren(self.QObject):
+                add(child)
+        for obj in gc.get_objects():
+            if isinstance(obj, self.QObject):
+                if not sip.isdeleted(obj):
+                    add(obj)
+            elif type(obj).__module__ in APP_MODULES:
+                counts[type(obj).__name__] += 1
+        return counts
+
+
+def top_sites(snapshot, baseline, limit):
+    filters = [tracemalloc.Filter(False, tracemalloc.__file__),
+               tracemalloc.Filter(False, '<frozen importlib._bootstrap*>'),
+               tracemalloc.Filter(False, '*/linecache.py')]
+    snapshot = snapshot.filter_traces(filters)
+    baseline = baseline.filter_traces(filters)
+    return [stat for stat in snapshot.compare_to(baseline, 'lineno') if stat.size_diff > 0][:limit]
+
+
+def run(args):
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    from PyQt6.QtWidgets import QApplication
+    import main
+    import task_executor
+
+    # النافذة ومجمع الـ threads يستخدمان القاعدة الاصطناعية
+    SyntheticDatabase.populate(args.orders)
+    main.Database = SyntheticDatabase
+    task_executor.Database = SyntheticDatabase
+
+    app = QApplication(sys.argv[:1])
+    window = main.MainWindow()
+    window.show()
+    check = MemoryCheck(app, window)
+    check.settle()
+
+    tracemalloc.start(args.frames)
+    for _ in range(args.warmup):
+        check.cycle()
+        check.sample()
+    baseline, baseline_objects = check.sample()
+    previous, previous_objects = baseline, baseline_objects
+
+    print(f"{'الدورة':>6} {'الذاكرة (KB)':>14} {'النمو (KB)':>12} {'كائنات':>8}  أكثر الأصناف نمواً")
+    for number in range(1, args.cycles + 1):
+        start = time.perf_counter()
+        check.cycle()
+        elapsed = time.perf_counter() - start
+        snapshot, objects = check.sample()
+        size = sum(stat.size for stat in snapshot.statistics('filename'))
+        growth = size - sum(stat.size for stat in previous.statistics('filename'))
+        delta = objects.copy()
+        delta.subtract(previous_objects)
+        grown = ', '.join(f"{name} +{count}" for name, count in delta.most_common(3) if count > 0)
+        print(f"{number:>6} {size / 1024:>14.0f} {growth / 1024:>+12.1f} "
+              f"{sum(objects.values()):>8}  {grown} ({elapsed:.1f}s)")
+        previous, previous_objects = snapshot, objects
+
+    total = sum(stat.size for stat in previous.statistics('filename')) - \
+        sum(stat.size for stat in baseline.statistics('filename'))
+    per_cycle = total / args.cycles / 1024
+    object_growth = previous_objects.copy()
+    object_growth.subtract(baseline_objects)
+    leaking = {name: count / args.cycles for name, count in object_growth.items()
+               if count / args.cycles >= args.max_objects}
+
+    print(f"\nالنمو لكل دورة: {per_cycle:.1f} KB (الحد {args.max_growth_kb} KB)")
+    for name, count in sorted(object_growth.items(), key=lambda item: -item[1])[:10]:
+        if count > 0:
+            print(f"  {name:<28} +{count} ({count / args.cycles:.2f} لكل دورة)")
+    print("\nأكثر مواقع الحجز نمواً منذ بداية القياس:")
+    for stat in top_sites(previous, baseline, args.top):
+        frame = stat.traceback[0]
+        print(f"  {stat.size_diff / 1024:>+9.1f} KB {stat.count_diff:>+7}  "
+              f"{frame.filename}:{frame.lineno}")
+
+    window.close()
+    app.processEvents()
+    tracemalloc.stop()
+
+    failed = per_cycle > args.max_growth_kb or leaking
+    if leaking:
+        print("\nكائنات تتراكم: " + ', '.join(f"{name} ({rate:.2f}/دورة)"
+                                              for name, rate in leaking.items()))
+    print("\nFAIL" if failed else "\nOK")
+    return 1 if failed else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="فحص تسرب الذاكرة عبر دورات استخدام محاكاة")
+    parser.add_argument('--cycles', type=int, default=10)
+    parser.add_argument('--warmup', type=int, default=2,
+                        help="دورات قبل القياس حتى تمتلئ الكاشات")
+    parser.add_argument('--orders', type=int, default=500)
+    parser.add_argument('--max-growth-kb', type=float, default=64,
+                        help="أقصى نمو مسموح للذاكرة في الدورة")
+    parser.add_argument('--max-objects', type=float, default=1,
+                        help="أقصى نمو مسموح لعدد كائنات أي صنف في الدورة")
+    parser.add_argument('--top', type=int, default=15, help="عدد مواقع الحجز المعروضة")
+    parser.add_argument('--frames', type=int, default=1, help="عمق تتبع كل حجز")
+    args = parser.parse_args()
+
+    # ملفات الحالة المحلية (السجل، التحديدات) في مجلد مؤقت لا في مجلد العمل
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)
+        sys.exit(run(args))
+
+
+if __name__ == '__main__':
+    main()
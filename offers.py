@@ -0,0 +1,48 @@
+import sys
+
+# عمود Offers نص مفصول بفاصلة منقوطة ("تصميم معماري;إشراف"). كل نص مختلف
+# يُحلل مرة واحدة إلى أرقام أنواع عروض ثابتة طوال التشغيل، وهذه الأرقام
+# هي ما يستخدمه فهرس الكاش والكروت ونافذة التفاصيل. الاستخدام من thread
+# الواجهة فقط.
+
+_names = []   # رقم النوع -> الاسم
+_ids = {}     # الاسم -> رقم النوع
+_parsed = {}  # نص Offers -> أرقام أنواعه بالترتيب
+_labels = {}  # أرقام الأنواع -> نص العرض في الكرت
+
+
+def offer_tokens(text):
+    """أرقام أنواع العروض في نص Offers بترتيبها ودون تكرار"""
+    if not text:
+        return ()
+    tokens = _parsed.get(text)
+    if tokens is None:
+        found = []
+        for part in text.split(';'):
+            name = part.strip()
+            if not name:
+                continue
+            token = _ids.get(name)
+            if token is None:
+                token = _ids[name] = len(_names)
+                _names.append(sys.intern(name))
+            if token not in found:
+                found.append(token)
+        tokens = _parsed[text] = tuple(found)
+    return tokens
+
+
+def offer_name(token):
+    return _names[token]
+
+
+def offer_names(tokens):
+    return [_names[token] for token in tokens]
+
+
+def offers_label(tokens):
+    """أسماء العروض مفصولة بـ " | " كما تظهر في الكرت"""
+    label = _labels.get(tokens)
+    if label is None:
+        label = _labels[tokens] = ' | '.join(offer_names(tokens))
+    return label
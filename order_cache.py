@@ -0,0 +1,280 @@
+from collections import OrderedDict
+
+from config import ARCHIVE_CACHE_LIMIT
+from offers import offer_tokens
+from order_columns import OrderColumns
+from selection_state import load_selection_levels, load_selection_times
+
+# مفاتيح الترتيب المتاحة لقائمة الطلبات
+SORT_KEYS = ('date', 'modified', 'selection')
+
+
+class SetIndex:
+    """فهرس {قيمة: مجموعة أرقام الطلبات} لفلترة المجموعات والعروض (قيم متعددة لكل طلب)"""
+
+    def __init__(self):
+        self.ids_by_value = {}
+        self.values = {}
+
+    def set(self, order_id, values):
+        values = frozenset(values)
+        old_values = self.values.get(order_id, frozenset())
+        if values == old_values:
+            return
+        for value in old_values - values:
+            ids = self.ids_by_value[value]
+            ids.discard(order_id)
+            if not ids:
+                del self.ids_by_value[value]
+        for value in values - old_values:
+            self.ids_by_value.setdefault(value, set()).add(order_id)
+        if values:
+            self.values[order_id] = values
+        else:
+            self.values.pop(order_id, None)
+
+    def discard(self, order_id):
+        self.set(order_id, ())
+
+    def ids(self, value):
+        return self.ids_by_value.get(value, set())
+
+    def counts(self):
+        return {value: len(ids) for value, ids in self.ids_by_value.items()}
+
+    def union(self, values):
+        ids = set()
+        for value in values:
+            ids |= self.ids(value)
+        return ids
+
+
+class OrdersCache:
+    """الطلبات المحملة مع أعمدة للفلترة والترتيب تُحدث بالفروقات
+
+    الصفوف الجديدة تُدمج مع الموجودة (إضافة، تعديل، حذف) فتتغير خاناتها
+    في OrderColumns فقط. فلاتر الحالة والتحديد والبحث أقنعة على الأعمدة،
+    والمجموعات وأنواع العروض (انظر offers.py) فهارس مجموعات أرقام يُقاطع معها.
+    حالة التحديد (تم الاتصال) ووقتها محفوظة هنا أيضاً بدل الكروت.
+
+    الطلبات نوعان: "ساخنة" من نافذة التحديث الدوري، وصفحات أرشيف تُجلب
+    عند التمرير أو البحث ويُخرج الأقدم استخداماً منها عند تجاوز الحد.
+    """
+
+    def __init__(self, archive_limit=ARCHIVE_CACHE_LIMIT):
+        self.orders = {}
+        self.hot_ids = set()
+        self.archive_pages = OrderedDict()  # مفتاح الصفحة -> أرقام طلباتها، الأقدم استخداماً أولاً
+        self.archive_ids = set()
+        self.archive_limit = archive_limit
+        self.archive_cursor = None  # (Date, ID) لآخر طلب في صفحات التمرير المتتالية
+        self.archive_exhausted = False
+        self.columns = OrderColumns()
+        self.group_index = SetIndex()
+        self.offer_index = SetIndex()  # رقم نوع العرض -> الطلبات
+        self.selection_levels = {}
+        self.selection_times = {}
+        self.load_selections()
+
+    def load_selections(self):
+        self.selection_levels = {int(k): v for k, v in load_selection_levels().items() if v}
+        self.selection_times = {int(k): v for k, v in load_selection_times().items() if v}
+        for order_id in self.orders:
+            self.columns.set_selection(order_id, self.selection_level(order_id),
+                                       self.selection_time(order_id))
+
+    def __len__(self):
+        return len(self.orders)
+
+    def __iter__(self):
+        # نفس ترتيب استعلام القائمة: الأحدث أولاً
+        return self.ordered('date', True)
+
+    def __contains__(self, order_id):
+        return order_id in self.orders
+
+    def get(self, order_id):
+        return self.orders.get(order_id)
+
+    def reindex(self, order_id):
+        """تحديث فهارس الطلب بعد تعديل صفه في مكانه"""
+        order = self.orders[order_id]
+        self.columns.set(order, self.selection_level(order_id), self.selection_time(order_id))
+        self.group_index.set(order_id, order['group_ids'] or ())
+        self.offer_index.set(order_id, offer_tokens(order['Offers']))
+
+    def upsert(self, order):
+        self.orders[order['ID']] = order
+        self.reindex(order['ID'])
+
+    def update(self, order_id, **fields):
+        order = self.orders.get(order_id)
+        if order is None:
+            return None
+        for name, value in fields.items():
+            order[name] = value
+        self.reindex(order_id)
+        return order
+
+    def remove(self, order_id):
+        if self.orders.pop(order_id, None) is None:
+            return
+        self.columns.remove(order_id)
+        self.group_index.discard(order_id)
+        self.offer_index.discard(order_id)
+
+    def retain(self, order_ids):
+        """حذف الطلبات الساخنة غير الموجودة في order_ids؛ يُرجع المحذوفة
+
+        صفحات الأرشيف لا تتأثر، فهي خارج نتيجة التحديث أصلاً.
+        """
+        self.hot_ids = set(order_ids)
+        removed = [order_id for order_id in self.orders
+                   if order_id not in order_ids and order_id not in self.archive_ids]
+        for order_id in removed:
+            self.remove(order_id)
+        return removed
+
+    def replace_all(self, orders):
+        """دمج نتيجة تحديث كاملة كفروقات مع الموجود"""
+        seen = set()
+        for order in orders:
+            self.upsert(order)
+            seen.add(order['ID'])
+        return self.retain(seen)
+
+    def add_archive_page(self, key, orders):
+        for order in orders:
+            self.upsert(order)
+        ids = {order['ID'] for order in orders}
+        self.archive_pages[key] = ids
+        self.archive_pages.move_to_end(key)
+        self.archive_ids |= ids
+
+    def add_scroll_page(self, orders, page_size):
+        """الصفحة التالية من الأرشيف بعد archive_cursor"""
+        self.add_archive_page(('scroll', self.archive_cursor), orders)
+        if orders:
+            self.archive_cursor = (orders[-1]['Date'], orders[-1]['ID'])
+        self.archive_exhausted = len(orders) < page_size
+
+    def scroll_keys(self):
+        return [key for key in self.archive_pages if key[0] == 'scroll']
+
+    def trim_archive(self, keep=()):
+        """إخراج صفحات الأرشيف الأقدم استخداماً حتى لا تتجاوز archive_limit
+
+        صفحات التمرير تُخرج معاً حتى لا تبقى فجوة في وسط القائمة.
+        يُرجع أرقام الطلبات المحذوفة من الذاكرة.
+        """
+        evicted = set()
+        for key in list(self.archive_pages):
+            if len(self.archive_ids) <= self.archive_limit:
+                break
+            if key not in self.archive_pages:
+                continue
+            keys = self.scroll_keys() if key[0] == 'scroll' else [key]
+            if any(k in keep for k in keys):
+                continue
+            for k in keys:
+                evicted |= self.archive_pages.pop(k)
+            if key[0] == 'scroll':
+                self.archive_cursor = None
+                self.archive_exhausted = False
+            self.archive_ids = set().union(*self.archive_pages.values())
+        return self._drop_evicted(evicted)
+
+    def clear_archive(self):
+        evicted = set(self.archive_ids)
+        self.archive_pages.clear()
+        self.archive_ids = set()
+        self.archive_cursor = None
+        self.archive_exhausted = False
+        return self._drop_evicted(evicted)
+
+    def _drop_evicted(self, evicted):
+        removed = [order_id for order_id in evicted
+                   if order_id not in self.archive_ids and order_id not in self.hot_ids]
+        for order_id in removed:
+            self.remove(order_id)
+        return removed
+
+    def apply_delta(self, rows, removed, full=False):
+        """دمج فروقات الطلبات الساخنة؛ full يعني أن rows هي النتيجة كاملة
+
+        يُرجع أرقام الطلبات المحذوفة من الذاكرة.
+        """
+        for order in rows:
+            self.upsert(order)
+        if full:
+            return self.retain({order['ID'] for order in rows})
+        self.hot_ids |= {order['ID'] for order in rows}
+        self.hot_ids -= set(removed)
+        dropped = [order_id for order_id in removed if order_id not in self.archive_ids]
+        for order_id in dropped:
+            self.remove(order_id)
+        return dropped
+
+    def selection_level(self, order_id):
+        return self.selection_levels.get(order_id, 0)
+
+    def selection_time(self, order_id):
+        return self.selection_times.get(order_id)
+
+    def set_selection(self, order_id, level, selected_at):
+        if level:
+            self.selection_levels[order_id] = level
+            self.selection_times[order_id] = selected_at
+        else:
+            self.selection_levels.pop(order_id, None)
+            self.selection_times.pop(order_id, None)
+            selected_at = None
+        self.columns.set_selection(order_id, level, selected_at)
+
+    def matching_ids(self, status=None, group_id=None, contacted=False, offers=None):
+        """أرقام الطلبات المطابقة لفلاتر الحالة والمجموعة والمحددة والعروض؛ None يعني بلا فلتر
+
+        offers أرقام أنواع عروض، ويطابقها الطلب الذي فيه أي منها.
+        """
+        if status is None and not contacted:
+            if group_id is None and not offers:
+                return None
+            ids = set(self.group_index.ids(group_id)) if group_id is not None else None
+        else:
+            ids = self.columns.slot_ids(self.columns.select(status, contacted))
+            if group_id is not None:
+                ids &= self.group_index.ids(group_id)
+        if offers:
+            offered = self.offer_index.union(offers)
+            ids = offered if ids is None else ids & offered
+        return ids
+
+    def query(self, status=None, group_id=None, contacted=False, search=None,
+              key='date', descending=True, date_from=None, date_to=None, offers=None):
+        """الطلبات المطابقة لكل الفلاتر مرتبة حسب key"""
+        slots = self.columns.select(status, contacted, date_from, date_to, search)
+        ids = self.columns.sorted_ids(slots, key, descending)
+        if group_id is not None:
+            group = self.group_index.ids(group_id)
+            ids = [order_id for order_id in ids if order_id in group]
+        if offers:
+            offered = self.offer_index.union(offers)
+            ids = [order_id for order_id in ids if order_id in offered]
+        return [self.orders[order_id] for order_id in ids]
+
+    def offer_counts(self, status=None, group_id=None, contacted=False, search=None):
+        """عدد الطلبات لكل نوع عرض ضمن باقي الفلاتر (دون فلتر العروض نفسه)"""
+        if status is None and not contacted and not search and group_id is None:
+            return self.offer_index.counts()
+        ids = self.columns.slot_ids(self.columns.select(status, contacted, search=search))
+        if group_id is not None:
+            ids &= self.group_index.ids(group_id)
+        return {token: len(ids & order_ids)
+                for token, order_ids in self.offer_index.ids_by_value.items()}
+
+    def ordered(self, key='date', descending=True):
+        """كل الطلبات مرتبة حسب المفتاح
+
+        في ترتيب التحديد تأتي الطلبات غير المحددة بعد المحددة حسب تاريخ الطلب.
+        """
+        return iter(self.query(key=key, descending=descending))
@@ -0,0 +1,198 @@
+from array import array
+from bisect import bisect_right
+
+# NumPy اختياري: بدونه تُستخدم مصفوفات array مع حلقات Python
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# فاصل بين الاسم والجوال، وبين الطلبات في نص البحث المجمّع
+FIELD_SEPARATOR = '\x01'
+ROW_SEPARATOR = '\x00'
+
+
+def _epoch(value):
+    return value.timestamp() if value else 0.0
+
+
+class OrderColumns:
+    """أعمدة مصفوفات لحقول الفلترة والترتيب، بخانة لكل طلب
+
+    الرقم، رمز الحالة، تاريخ الطلب، تاريخ التعديل، مستوى التحديد ووقته
+    محفوظة كمصفوفات (NumPy إن وجد، وإلا array)، ونص البحث (الاسم والجوال)
+    في قائمة نصوص تُجمع عند البحث في نص واحد. فلاتر الحالة والتحديد
+    والتاريخ أقنعة على المصفوفات، والترتيب argsort على العمود.
+    الخانات المحذوفة تُعاد للاستخدام؛ رمز الحالة 0 يعني خانة فارغة.
+    """
+
+    COLUMNS = (('ids', 'q'), ('status', 'b'), ('date', 'd'), ('modified', 'd'),
+               ('level', 'b'), ('selected_at', 'd'))
+
+    def __init__(self, capacity=1024):
+        self.slot_of = {}
+        self.free = []
+        self.size = 0
+        self.status_codes = {}
+        self.search_text = []
+        self.search_pool = None
+        if np is not None:
+            for name, code in self.COLUMNS:
+                setattr(self, name, np.zeros(capacity, dtype=code))
+        else:
+            for name, code in self.COLUMNS:
+                setattr(self, name, array(code))
+
+    def __len__(self):
+        return len(self.slot_of)
+
+    def status_code(self, status):
+        code = self.status_codes.get(status)
+        if code is None:
+            code = self.status_codes[status] = len(self.status_codes) + 1
+        return code
+
+    def allocate(self, order_id):
+        if self.free:
+            slot = self.free.pop()
+        else:
+            slot = self.size
+            self.size += 1
+            if np is not None:
+                if slot >= len(self.ids):
+                    for name, _ in self.COLUMNS:
+                        column = getattr(self, name)
+                        grown = np.zeros(len(column) * 2, dtype=column.dtype)
+                        grown[:len(column)] = column
+                        setattr(self, name, grown)
+            else:
+                for name, _ in self.COLUMNS:
+                    getattr(self, name).append(0)
+            self.search_text.append('')
+        self.slot_of[order_id] = slot
+        return slot
+
+    def set(self, order, level=0, selected_at=None):
+        order_id = order['ID']
+        slot = self.slot_of.get(order_id)
+        if slot is None:
+            slot = self.allocate(order_id)
+        self.ids[slot] = order_id
+        self.status[slot] = self.status_code(order['Accept_Reject'])
+        self.date[slot] = _epoch(order['Date'])
+        self.modified[slot] = _epoch(order['ModifiedDate'])
+        self.level[slot] = level
+        self.selected_at[slot] = selected_at or 0.0
+        text = f"{order['customer_name'] or ''}{FIELD_SEPARATOR}{order['customer_phone'] or ''}".lower()
+        if self.search_text[slot] != text:
+            self.search_text[slot] = text
+            self.search_pool = None
+
+    def set_selection(self, order_id, level, selected_at):
+        slot = self.slot_of.get(order_id)
+        if slot is not None:
+            self.level[slot] = level
+            self.selected_at[slot] = selected_at or 0.0
+
+    def remove(self, order_id):
+        slot = self.slot_of.pop(order_id, None)
+        if slot is None:
+            return
+        self.status[slot] = 0
+        self.search_text[slot] = ''
+        self.search_pool = None
+        self.free.append(slot)
+
+    def pool(self):
+        """نص البحث المجمّع وبداية كل خانة فيه، يُبنى مرة بعد كل تغيير"""
+        if self.search_pool is None:
+            texts = self.search_text[:self.size]
+            starts = []
+            position = 0
+            for text in texts:
+                starts.append(position)
+                position += len(text) + 1
+            self.search_pool = (ROW_SEPARATOR.join(texts), starts)
+        return self.search_pool
+
+    def search_slots(self, search):
+        """الخانات التي يحتوي اسمها أو جوالها على search"""
+        text, starts = self.pool()
+        slots = []
+        position = text.find(search)
+        while position != -1:
+            slot = bisect_right(starts, position) - 1
+            slots.append(slot)
+            # المطابقة التالية تبدأ من الخانة التالية
+            if slot + 1 >= len(starts):
+                break
+            position = text.find(search, starts[slot + 1])
+        return slots
+
+    def select(self, status=None, contacted=False, date_from=None, date_to=None, search=None):
+        """خانات الطلبات المطابقة لكل الشروط المعطاة"""
+        if status is not None and status not in self.status_codes:
+            return [] if np is None else np.empty(0, dtype=np.int64)
+        code = self.status_codes.get(status)
+        date_from = _epoch(date_from) if date_from else None
+        date_to = _epoch(date_to) if date_to else None
+        n = self.size
+
+        if np is not None:
+            mask = self.status[:n] == code if code else self.status[:n] != 0
+            if contacted:
+                mask &= self.level[:n] > 0
+            if date_from is not None:
+                mask &= self.date[:n] >= date_from
+            if date_to is not None:
+                mask &= self.date[:n] < date_to
+            if search:
+                found = np.zeros(n, dtype=bool)
+                found[self.search_slots(search)] = True
+                mask &= found
+            return np.flatnonzero(mask)
+
+        candidates = self.search_slots(search) if search else range(n)
+        statuses, levels, dates = self.status, self.level, self.date
+        return [slot for slot in candidates
+                if (statuses[slot] == code if code else statuses[slot] != 0)
+                and (not contacted or levels[slot] > 0)
+                and (date_from is None or dates[slot] >= date_from)
+                and (date_to is None or dates[slot] < date_to)]
+
+    def sort_slots(self, slots, column, descending=True):
+        # الترتيب بالقيمة ثم برقم الطلب، والتنازلي عكسه تماماً
+        if np is not None:
+            slots = np.asarray(slots, dtype=np.int64)
+            order = np.lexsort((self.ids[slots], column[slots]))
+            return slots[order[::-1] if descending else order]
+        ids = self.ids
+        return sorted(slots, key=lambda slot: (column[slot], ids[slot]), reverse=descending)
+
+    def sorted_ids(self, slots, key='date', descending=True):
+        """أرقام الطلبات في slots مرتبة حسب date / modified / selection
+
+        في ترتيب التحديد تأتي الطلبات غير المحددة بعد المحددة حسب تاريخ الطلب.
+        """
+        if key == 'selection':
+            if np is not None:
+                slots = np.asarray(slots, dtype=np.int64)
+                selected = slots[self.selected_at[slots] > 0]
+                rest = slots[self.selected_at[slots] == 0]
+            else:
+                selected = [slot for slot in slots if self.selected_at[slot] > 0]
+                rest = [slot for slot in slots if self.selected_at[slot] == 0]
+            parts = [self.sort_slots(selected, self.selected_at, descending),
+                     self.sort_slots(rest, self.date, True)]
+        else:
+            column = self.modified if key == 'modified' else self.date
+            parts = [self.sort_slots(slots, column, descending)]
+        if np is not None:
+            return self.ids[np.concatenate(parts)].tolist()
+        ids = self.ids
+        return [ids[slot] for part in parts for slot in part]
+
+    def slot_ids(self, slots):
+        if np is not None:
+            return set(self.ids[slots].tolist())
+        return {self.ids[slot] for slot in slots}
@@ -1,21 +1,15 @@
 from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QLabel, 
                              QGridLayout, QWidget, QPushButton,
                              QScrollArea, QFrame, QHBoxLayout)
-from PyQt6.QtCore import Qt, QThread, pyqtSignal, QTimer
+from PyQt6.QtCore import Qt, QTimer
 from PyQt6.QtGui import QFont
 from config import FIELD_TRANSLATIONS, STATUS_TRANSLATIONS
+from offers import offer_names, offer_tokens
+from task_executor import PRIORITY_DETAILS
+import asyncio
 
-class DataLoaderThread(QThread):
-    data_loaded = pyqtSignal(dict)
-    
-    def __init__(self, db, order_id):
-        super().__init__()
-        self.db = db
-        self.order_id = order_id
-        
-    def run(self):
-        data = self.db.get_order_details(self.order_id)
-        self.data_loaded.emit(data)
+def fetch_order_details(task, order_id):
+    return task.db.get_order_details(order_id)
 
 class LoadingLabel(QLabel):
     def __init__(self, parent=None):
@@ -43,9 +37,11 @@ class LoadingLabel(QLabel):
         self.timer.stop()
 
 class OrderDetailsDialog(QDialog):
-    def __init__(self, order_id, db, parent=None):
+    def __init__(self, order_id, executor, parent=None, async_db=None):
         super().__init__(parent)
-        self.db = db
+        self.executor = executor
+        self.async_db = async_db
+        self.load_task = None
         self.order_id = order_id
         self.order_data = {}
         self.setup_ui()
@@ -124,9 +120,31 @@ class OrderDetailsDialog(QDialog):
         self.setLayout(self.main_layout)
     
     def load_data(self):
-        self.loader_thread = DataLoaderThread(self.db, self.order_id)
-        self.loader_thread.data_loaded.connect(self.on_data_loaded)
-        self.loader_thread.start()
+        if self.async_db:
+            self.load_task = asyncio.ensure_future(self.load_data_async())
+            return
+        self.load_task = self.executor.submit(fetch_order_details, self.order_id,
+                                              priority=PRIORITY_DETAILS,
+                                              on_result=self.on_data_loaded,
+                                              on_error=self.on_load_error)
+    
+    async def load_data_async(self):
+        try:
+            data = await self.async_db.get_order_details(self.order_id)
+        except Exception as e:
+            print(f"Error loading order details: {e}")
+            data = {}
+        self.on_data_loaded(data)
+
+    def on_load_error(self, error):
+        print(f"Error loading order details: {error}")
+        self.on_data_loaded({})
+
+    def done(self, result):
+        # إغلاق النافذة يلغي تحميل التفاصيل إن لم يكتمل
+        if self.load_task:
+            self.load_task.cancel()
+        super().done(result)
     
     def on_data_loaded(self, data):
         self.order_data = data
@@ -165,8 +183,8 @@ class OrderDetailsDialog(QDialog):
             offers_layout.setContentsMargins(10, 8, 10, 8)
             offers_layout.setSpacing(10)
             
-            # تقسيم العروض على أساس الفاصلة المنقوطة
-            offers = [offer.strip() for offer in self.order_data['Offers'].split(';') if offer.strip()]
+            # نفس أنواع العروض المحللة التي تستخدمها الكروت وفلتر العروض
+            offers = offer_names(offer_tokens(self.order_data['Offers']))
             
             for offer in offers:
                 offer_box = QWidget()
@@ -0,0 +1,122 @@
+import csv
+import os
+
+from config import EXPORT_CHUNK, STATUS_TRANSLATIONS
+from selection_state import format_selection_time, load_selection_levels, load_selection_times
+
+# أعمدة ملف التصدير بالترتيب
+EXPORT_HEADERS = [
+    "رقم الطلب",
+    "اسم العميل",
+    "رقم الجوال",
+    "الحالة",
+    "العروض",
+    "تاريخ الطلب",
+    "تاريخ آخر تعديل",
+    "المجموعات",
+    "مستوى الاتصال",
+    "تاريخ الاتصال",
+]
+
+
+class ExportCancelled(Exception):
+    pass
+
+
+class CsvWriter:
+    def __init__(self, path):
+        # utf-8-sig حتى يقرأ Excel النص العربي بشكل صحيح
+        self.file = open(path, 'w', newline='', encoding='utf-8-sig')
+        self.writer = csv.writer(self.file)
+
+    def write_rows(self, rows):
+        self.writer.writerows(rows)
+
+    def close(self):
+        self.file.close()
+
+
+class XlsxWriter:
+    def __init__(self, path):
+        try:
+            from openpyxl import Workbook
+        except ImportError:
+            raise RuntimeError("التصدير إلى Excel يتطلب تثبيت openpyxl")
+        # وضع الكتابة فقط يكتب الصفوف إلى القرص أولاً بأول
+        self.path = path
+        self.workbook = Workbook(write_only=True)
+        self.sheet = self.workbook.create_sheet("الطلبات")
+
+    def write_rows(self, rows):
+        for row in rows:
+            self.sheet.append(row)
+
+    def close(self):
+        self.workbook.save(self.path)
+
+
+def open_writer(path):
+    if path.lower().endswith('.xlsx'):
+        return XlsxWriter(path)
+    return CsvWriter(path)
+
+
+def format_datetime(value):
+    return value.strftime('%Y-%m-%d %H:%M') if value else ''
+
+
+def export_row(order, level, selected_at):
+    status = order['Accept_Reject']
+    return [
+        order['ID'],
+        order['customer_name'] or '',
+        order['customer_phone'] or '',
+        STATUS_TRANSLATIONS.get(status, status),
+        (order['Offers'] or '').replace(';', ' | '),
+        format_datetime(order['Date']),
+        format_datetime(order['ModifiedDate']),
+        order['custom_groups'] or '',
+        level,
+        format_selection_time(selected_at),
+    ]
+
+
+def export_orders(db, path, status=None, search='', contacted_only=False,
+                  progress=None, is_cancelled=None, chunk_size=EXPORT_CHUNK):
+    """تصدير الطلبات المطابقة للفلتر إلى ملف CSV أو XLSX
+
+    الصفوف تُقرأ من مؤشر غير مخزّن وتُكتب دفعة بدفعة، فتبقى الذاكرة
+    ثابتة مهما كان عدد الطلبات. progress(written, scanned) يُستدعى بعد كل
+    دفعة، و is_cancelled() يوقف التصدير ويحذف الملف الناقص.
+    يُرجع عدد الصفوف المكتوبة.
+    """
+    levels = load_selection_levels()
+    times = load_selection_times()
+
+    writer = open_writer(path)
+    written = 0
+    scanned = 0
+    try:
+        writer.write_rows([EXPORT_HEADERS])
+        for batch in db.iter_filtered_orders(status, search, chunk_size):
+            if is_cancelled and is_cancelled():
+                raise ExportCancelled()
+            rows = []
+            for order in batch:
+                order_id = str(order['ID'])
+                level = levels.get(order_id, 0)
+                if contacted_only and level == 0:
+                    continue
+                rows.append(export_row(order, level, times.get(order_id)))
+            writer.write_rows(rows)
+            written += len(rows)
+            scanned += len(batch)
+            if progress:
+                progress(written, scanned)
+        writer.close()
+    except BaseException:
+        writer.close()
+        if os.path.exists(path):
+            os.remove(path)
+        raise
+    return written
@@ -0,0 +1,141 @@
+import sys
+from datetime import date, datetime, time
+
+# الحقول التي تعرضها قائمة الطلبات فقط
+ORDER_ROW_FIELDS = (
+    'ID',
+    'Accept_Reject',
+    'customer_name',
+    'customer_phone',
+    'Offers',
+    'Date',
+    'ModifiedDate',
+    'custom_groups',
+    'group_colors',
+    'group_ids',
+)
+
+
+def _decode_text(value):
+    if isinstance(value, (bytes, bytearray)):
+        return value.decode('utf-8')
+    return value
+
+
+def _decode_int(value):
+    if value is None or isinstance(value, int):
+        return value
+    return int(value)
+
+
+def _decode_status(value):
+    # نص الحالة مكرر في كل الطلبات فنستخدم نسخة واحدة منه
+    value = _decode_text(value)
+    return sys.intern(value) if value else value
+
+
+def _decode_datetime(value):
+    if value is None or isinstance(value, datetime):
+        return value
+    if isinstance(value, date):
+        # أعمدة DATE من المؤشرات المُعدّة (prepared)
+        return datetime.combine(value, time())
+    try:
+        return datetime.fromisoformat(_decode_text(value))
+    except (ValueError, TypeError):
+        # تواريخ مثل 0000-00-00
+        return None
+
+
+def _decode_id_list(value):
+    # "3,7,12" من GROUP_CONCAT إلى (3, 7, 12)
+    if value is None or isinstance(value, tuple):
+        return value or ()
+    return tuple(int(part) for part in _decode_text(value).split(',') if part)
+
+
+FIELD_DECODERS = {
+    'ID': _decode_int,
+    'group_ids': _decode_id_list,
+    'Accept_Reject': _decode_status,
+    'Date': _decode_datetime,
+    'ModifiedDate': _decode_datetime,
+}
+
+
+class OrderRow:
+    """صف مضغوط لطلب في قائمة الطلبات
+
+    يدعم الوصول بأسلوب القاموس (order['ID'] و order.get) حتى تبقى الكروت
+    والفلاتر تعمل كما هي.
+    """
+    __slots__ = ORDER_ROW_FIELDS
+
+    def __init__(self, *values):
+        for name, value in zip(ORDER_ROW_FIELDS, values):
+            setattr(self, name, value)
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key)
+        except (AttributeError, TypeError):
+            raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key == 'Accept_Reject':
+            value = _decode_status(value)
+        setattr(self, key, value)
+
+    def __contains__(self, key):
+        return key in ORDER_ROW_FIELDS
+
+    def get(self, key, default=None):
+        return getattr(self, key, default) if key in ORDER_ROW_FIELDS else default
+
+    def keys(self):
+        return ORDER_ROW_FIELDS
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in ORDER_ROW_FIELDS}
+
+    def __repr__(self):
+        return f"OrderRow(ID={self.ID!r}, Accept_Reject={self.Accept_Reject!r})"
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(*(data.get(name) for name in ORDER_ROW_FIELDS))
+
+
+def row_from_values(values):
+    """OrderRow من قيم ORDER_ROW_FIELDS بالترتيب (مثلاً بعد نقلها بين العمليات)"""
+    row = OrderRow(*values)
+    row['Accept_Reject'] = row.Accept_Reject
+    return row
+
+
+def make_row_builder(column_names):
+    """إنشاء دالة تحول صفاً خاماً من المؤشر إلى OrderRow
+
+    تُفك فقط الأعمدة التي تحتاجها القائمة، وباقي الأعمدة تُتجاهل كما هي.
+    """
+    index = {name: i for i, name in enumerate(column_names)}
+    plan = []
+    for name in ORDER_ROW_FIELDS:
+        if name in index:
+            plan.append((index[name], FIELD_DECODERS.get(name, _decode_text)))
+        else:
+            plan.append((None, None))
+
+    def build(raw):
+        return OrderRow(*[
+            decode(raw[i]) if i is not None else None
+            for i, decode in plan
+        ])
+
+    return build
+
+
+def rows_from_cursor(cursor, raw_rows):
+    """تحويل دفعة صفوف من مؤشر غير قاموسي إلى OrderRow"""
+    build = make_row_builder(cursor.column_names)
+    return [build(raw) for raw in raw_rows]
@@ -0,0 +1,209 @@
+from mysql.connector import Error
+
+from database import ORDERS_QUERY_TEMPLATE
+
+# جدول ملخص القائمة: نفس أعمدة ORDER_ROW_FIELDS لكل طلب له عروض، يُحدَّث
+# بالـ triggers عند كل كتابة (من البرنامج أو غيره) فلا يعيد كل تحديث ربط
+# المجموعات وتجميعها. يُقرأ عند ORDERS_SUMMARY=1 (انظر database.orders_query).
+
+SUMMARY_COLUMNS = ('ID, Accept_Reject, Offers, Date, ModifiedDate, '
+                   'customer_name, customer_phone, custom_groups, group_colors, group_ids')
+
+CREATE_TABLE = """
+    CREATE TABLE IF NOT EXISTS order_list_summary (
+        ID INT NOT NULL PRIMARY KEY,
+        Accept_Reject VARCHAR(32),
+        Offers TEXT,
+        Date DATETIME NULL,
+        ModifiedDate DATETIME NULL,
+        customer_name VARCHAR(255),
+        customer_phone VARCHAR(255),
+        custom_groups TEXT,
+        group_colors TEXT,
+        group_ids TEXT,
+        KEY idx_summary_date (Date),
+        KEY idx_summary_status_date (Accept_Reject, Date)
+    )
+"""
+
+
+def list_select(conditions=''):
+    """استعلام القائمة الأصلي دون ترتيب، مصدر صفوف الملخص"""
+    return ORDERS_QUERY_TEMPLATE.format(conditions=conditions).replace("ORDER BY o.Date DESC", "")
+
+
+REFRESH_ORDER_PROCEDURE = f"""
+    CREATE PROCEDURE refresh_order_list_summary(IN p_order_id INT)
+    MODIFIES SQL DATA
+    BEGIN
+        DELETE FROM order_list_summary WHERE ID = p_order_id;
+        INSERT INTO order_list_summary ({SUMMARY_COLUMNS})
+        {list_select(" AND o.ID = p_order_id")};
+    END
+"""
+
+# تغيير اسم مجموعة أو لونها يُحدّث كل الطلبات المنسوبة إليها
+REFRESH_GROUP_PROCEDURE = """
+    CREATE PROCEDURE refresh_group_list_summary(IN p_group_id INT)
+    MODIFIES SQL DATA
+    BEGIN
+        UPDATE order_list_summary s
+        JOIN (
+            SELECT tga.order_id,
+                GROUP_CONCAT(DISTINCT cg.name) as custom_groups,
+                GROUP_CONCAT(DISTINCT cg.color) as group_colors,
+                GROUP_CONCAT(DISTINCT cg.id ORDER BY cg.id) as group_ids
+            FROM task_group_assignments tga
+            LEFT JOIN custom_groups cg ON tga.group_id = cg.id
+            WHERE tga.order_id IN (
+                SELECT order_id FROM task_group_assignments WHERE group_id = p_group_id)
+            GROUP BY tga.order_id
+        ) g ON g.order_id = s.ID
+        SET s.custom_groups = g.custom_groups,
+            s.group_colors = g.group_colors,
+            s.group_ids = g.group_ids;
+    END
+"""
+
+TRIGGERS = {
+    'ols_orders_insert': """
+        AFTER INSERT ON orders FOR EACH ROW
+        CALL refresh_order_list_summary(NEW.ID)
+    """,
+    # تغيير الحالة (أغلب الكتابات) يحدّث عمودين فقط دون إعادة الربط
+    'ols_orders_update': """
+        AFTER UPDATE ON orders FOR EACH ROW
+        BEGIN
+            IF NEW.ID <=> OLD.ID AND NEW.Offers <=> OLD.Offers
+                    AND NEW.Client_ID <=> OLD.Client_ID AND NEW.Date <=> OLD.Date THEN
+                UPDATE order_list_summary
+                SET Accept_Reject = NEW.Accept_Reject, ModifiedDate = NEW.ModifiedDate
+                WHERE ID = NEW.ID;
+            ELSE
+                DELETE FROM order_list_summary WHERE ID = OLD.ID;
+                CALL refresh_order_list_summary(NEW.ID);
+            END IF;
+        END
+    """,
+    'ols_orders_delete': """
+        AFTER DELETE ON orders FOR EACH ROW
+        DELETE FROM order_list_summary WHERE ID = OLD.ID
+    """,
+    'ols_clientdata_update': """
+        AFTER UPDATE ON clientdata FOR EACH ROW
+        BEGIN
+            IF NOT (NEW.Name <=> OLD.Name AND NEW.Phone <=> OLD.Phone AND NEW.ID <=> OLD.ID) THEN
+                UPDATE order_list_summary s
+                JOIN orders o ON o.ID = s.ID
+                SET s.customer_name = NEW.Name, s.customer_phone = NEW.Phone
+                WHERE o.Client_ID = NEW.ID;
+            END IF;
+        END
+    """,
+    'ols_assignments_insert': """
+        AFTER INSERT ON task_group_assignments FOR EACH ROW
+        CALL refresh_order_list_summary(NEW.order_id)
+    """,
+    'ols_assignments_update': """
+        AFTER UPDATE ON task_group_assignments FOR EACH ROW
+        BEGIN
+            CALL refresh_order_list_summary(OLD.order_id);
+            IF NOT (NEW.order_id <=> OLD.order_id) THEN
+                CALL refresh_order_list_summary(NEW.order_id);
+            END IF;
+        END
+    """,
+    'ols_assignments_delete': """
+        AFTER DELETE ON task_group_assignments FOR EACH ROW
+        CALL refresh_order_list_summary(OLD.order_id)
+    """,
+    'ols_groups_update': """
+        AFTER UPDATE ON custom_groups FOR EACH ROW
+        CALL refresh_group_list_summary(NEW.id)
+    """,
+    'ols_groups_delete': """
+        AFTER DELETE ON custom_groups FOR EACH ROW
+        CALL refresh_group_list_summary(OLD.id)
+    """,
+}
+
+PROCEDURES = {
+    'refresh_order_list_summary': REFRESH_ORDER_PROCEDURE,
+    'refresh_group_list_summary': REFRESH_GROUP_PROCEDURE,
+}
+
+# مقارنة الملخص بالاستعلام الأصلي: الطلبات الناقصة أو الزائدة أو المختلفة
+VERIFY_QUERY = f"""
+    SELECT l.ID, CASE WHEN s.ID IS NULL THEN 'missing' ELSE 'different' END
+    FROM ({list_select()}) l
+    LEFT JOIN order_list_summary s ON s.ID = l.ID
+    WHERE s.ID IS NULL OR NOT (
+        s.Accept_Reject <=> l.Accept_Reject AND s.Offers <=> l.Offers
+        AND s.Date <=> l.Date AND s.ModifiedDate <=> l.ModifiedDate
+        AND s.customer_name <=> l.customer_name AND s.customer_phone <=> l.customer_phone
+        AND s.custom_groups <=> l.custom_groups AND s.group_colors <=> l.group_colors
+        AND s.group_ids <=> l.group_ids)
+    UNION ALL
+    SELECT s.ID, 'extra'
+    FROM order_list_summary s
+    LEFT JOIN ({list_select()}) l ON l.ID = s.ID
+    WHERE l.ID IS NULL
+"""
+
+
+def install_summary(db):
+    """إنشاء الجدول والإجراءات والـ triggers ثم تعبئة الجدول"""
+    db.ensure_connection()
+    cursor = db.connection.cursor()
+    try:
+        cursor.execute(CREATE_TABLE)
+        for name, body in PROCEDURES.items():
+            cursor.execute(f"DROP PROCEDURE IF EXISTS {name}")
+            cursor.execute(body)
+        for name, body in TRIGGERS.items():
+            cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+            cursor.execute(f"CREATE TRIGGER {name} {body}")
+    finally:
+        cursor.close()
+    return rebuild_summary(db)
+
+
+def uninstall_summary(db):
+    db.ensure_connection()
+    cursor = db.connection.cursor()
+    try:
+        for name in TRIGGERS:
+            cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+        for name in PROCEDURES:
+            cursor.execute(f"DROP PROCEDURE IF EXISTS {name}")
+        cursor.execute("DROP TABLE IF EXISTS order_list_summary")
+    finally:
+        cursor.close()
+
+
+def rebuild_summary(db):
+    """إعادة تعبئة الملخص من الاستعلام الأصلي في معاملة واحدة؛ يُرجع عدد الصفوف"""
+    db.ensure_connection()
+    cursor = db.connection.cursor()
+    try:
+        cursor.execute("DELETE FROM order_list_summary")
+        cursor.execute(f"INSERT INTO order_list_summary ({SUMMARY_COLUMNS}) {list_select()}")
+        count = cursor.rowcount
+        db.connection.commit()
+    except Error:
+        db.connection.rollback()
+        raise
+    finally:
+        cursor.close()
+    return count
+
+
+def verify_summary(db):
+    """[(رقم الطلب، missing / extra / different)] للصفوف التي لا تطابق الاستعلام الأصلي"""
+    db.ensure_connection()
+    cursor = db.connection.cursor()
+    try:
+        cursor.execute(VERIFY_QUERY)
+        return cursor.fetchall()
+    finally:
+        cursor.close()
@@ -0,0 +1,172 @@
+import sqlite3
+import uuid
+from datetime import datetime
+
+# ملف السجل المحلي لتغييرات الحالة التي لم تصل لقاعدة البيانات بعد
+OUTBOX_FILE = 'status_outbox.sqlite3'
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS status_outbox (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        batch_id TEXT NOT NULL,
+        order_id INTEGER NOT NULL,
+        status TEXT NOT NULL,
+        base_modified TEXT,
+        chained INTEGER NOT NULL DEFAULT 0,
+        state TEXT NOT NULL DEFAULT 'pending',
+        server_status TEXT,
+        server_modified TEXT,
+        created_at TEXT NOT NULL
+    )
+"""
+
+
+def _to_text(value):
+    return value.isoformat(sep=' ') if value else None
+
+
+def _from_text(value):
+    return datetime.fromisoformat(value) if value else None
+
+
+class StatusOutbox:
+    """سجل محلي دائم (SQLite) لتغييرات حالة الطلبات
+
+    كل تغيير يُسجل فوراً فتؤكده الواجهة دون انتظار الشبكة، ثم يُرسل
+    لقاعدة البيانات بالترتيب عند توفر الاتصال. base_modified هو
+    ModifiedDate الذي رآه المستخدم، فإذا تغير على الخادم في الأثناء
+    يُسجل التغيير كتعارض بدل الكتابة فوق تعديل شخص آخر.
+    """
+
+    def __init__(self, path=OUTBOX_FILE):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.execute(SCHEMA)
+        self.connection.commit()
+
+    def enqueue(self, changes):
+        """تسجيل دفعة تغييرات [(order_id, status, base_modified)] تُطبق في معاملة واحدة"""
+        batch_id = uuid.uuid4().hex
+        now = _to_text(datetime.now())
+        pending = self.pending_order_ids()
+        with self.connection:
+            for order_id, status, base_modified in changes:
+                # تغيير يتبع تغييراً معلقاً لنفس الطلب لا يُفحص تعارضه؛ السابق يُفحص
+                chained = order_id in pending
+                self.connection.execute(
+                    "INSERT INTO status_outbox "
+                    "(batch_id, order_id, status, base_modified, chained, created_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (batch_id, order_id, status,
+                     None if chained else _to_text(base_modified), int(chained), now))
+        return batch_id
+
+    def pending_order_ids(self):
+        rows = self.connection.execute(
+            "SELECT DISTINCT order_id FROM status_outbox WHERE state = 'pending'")
+        return {order_id for (order_id,) in rows}
+
+    def pending_statuses(self):
+        """آخر حالة معلقة لكل طلب، لعرضها فوق بيانات الخادم"""
+        rows = self.connection.execute(
+            "SELECT order_id, status FROM status_outbox WHERE state = 'pending' ORDER BY id")
+        return {order_id: status for order_id, status in rows}
+
+    def pending_batches(self):
+        """الدفعات المعلقة بترتيب تسجيلها"""
+        rows = self.connection.execute(
+            "SELECT id, batch_id, order_id, status, base_modified, chained "
+            "FROM status_outbox WHERE state = 'pending' ORDER BY id")
+        batches = []
+        for entry_id, batch_id, order_id, status, base_modified, chained in rows:
+            entry = (entry_id, order_id, status, _from_text(base_modified), bool(chained))
+            if batches and batches[-1][0] == batch_id:
+                batches[-1][1].append(entry)
+            else:
+                batches.append((batch_id, [entry]))
+        return batches
+
+    def pending_count(self):
+        (count,) = self.connection.execute(
+            "SELECT COUNT(*) FROM status_outbox WHERE state = 'pending'").fetchone()
+        return count
+
+    def mark_applied(self, entry_ids):
+        with self.connection:
+            self.connection.executemany(
+                "DELETE FROM status_outbox WHERE id = ?", [(i,) for i in entry_ids])
+
+    def mark_conflict(self, entry_id, order_id, server_status, server_modified):
+        # التغييرات اللاحقة لنفس الطلب مبنية على التغيير المتعارض فتُلغى معه
+        with self.connection:
+            self.connection.execute(
+                "UPDATE status_outbox SET state = 'conflict', server_status = ?, "
+                "server_modified = ? WHERE order_id = ? AND state = 'pending' AND id >= ?",
+                (server_status, _to_text(server_modified), order_id, entry_id))
+
+    def conflicts(self):
+        rows = self.connection.execute(
+            "SELECT id, order_id, status, server_status, server_modified "
+            "FROM status_outbox WHERE state = 'conflict' ORDER BY id")
+        return [(entry_id, order_id, status, server_status, _from_text(server_modified))
+                for entry_id, order_id, status, server_status, server_modified in rows]
+
+    def clear_conflicts(self):
+        with self.connection:
+            self.connection.execute("DELETE FROM status_outbox WHERE state = 'conflict'")
+
+    def close(self):
+        self.connection.close()
+
+
+def replay_outbox(outbox, db):
+    """إرسال التغييرات المعلقة لقاعدة البيانات بالترتيب
+
+    يتوقف عند أول خطأ اتصال ويرفعه حتى يُعاد المحاولة لاحقاً من نفس النقطة.
+    يُرجع (applied, conflicts): التغييرات المطبقة [(order_id, status, modified)]
+    والمتعارضة [(order_id, status, server_status, server_modified)].
+    """
+    applied = []
+    conflicts = []
+    for _, entries in outbox.pending_batches():
+        entries = skip_conflicted(entries, conflicts)
+        if entries:
+            results = db.apply_status_changes(batch_changes(entries))
+            record_results(outbox, entries, results, applied, conflicts)
+    return applied, conflicts
+
+
+async def replay_outbox_async(outbox, async_db):
+    """نفس replay_outbox فوق AsyncDatabase"""
+    applied = []
+    conflicts = []
+    for _, entries in outbox.pending_batches():
+        entries = skip_conflicted(entries, conflicts)
+        if entries:
+            results = await async_db.apply_status_changes(batch_changes(entries))
+            record_results(outbox, entries, results, applied, conflicts)
+    return applied, conflicts
+
+
+def skip_conflicted(entries, conflicts):
+    # تغييرات لطلب تعارض في دفعة سابقة سُجلت كتعارض مع سابقتها
+    conflicted = {conflict[0] for conflict in conflicts}
+    return [entry for entry in entries if entry[1] not in conflicted]
+
+
+def batch_changes(entries):
+    return [(order_id, status, None if chained else base_modified)
+            for _, order_id, status, base_modified, chained in entries]
+
+
+def record_results(outbox, entries, results, applied, conflicts):
+    applied_ids = []
+    for (entry_id, order_id, status, _, _), result in zip(entries, results):
+        ok, server_status, server_modified = result
+        if ok:
+            applied_ids.append(entry_id)
+            applied.append((order_id, status, server_modified))
+        else:
+            outbox.mark_conflict(entry_id, order_id, server_status, server_modified)
+            conflicts.append((order_id, status, server_status, server_modified))
+    outbox.mark_applied(applied_ids)
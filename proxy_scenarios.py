@@ -0,0 +1,212 @@
+import argparse
+import os
+import statistics
+import time
+
+from mysql.connector import Error
+
+from database import Database, ORDER_STATUS_QUERY
+from db_proxy import FaultProxy, PROFILES, parse_address
+
+# سيناريوهات طبقة قاعدة البيانات خلف FaultProxy لكل ملف تعريف شبكة.
+# تُشغل على خادم MySQL/MariaDB محلي ببيانات تجريبية، لا على خادم العمل:
+# سيناريو الحالة يغير حالة طلب فعلاً ثم يعيدها.
+
+STATUS_CYCLE = ('Accepted', 'Rejected', 'Pending')
+
+
+def proxied_database(port):
+    db = Database()
+    db.host = '127.0.0.1'
+    db.port = port
+    return db
+
+
+def summarize(times):
+    if not times:
+        return '-'
+    return f"{statistics.median(times) * 1000:.0f} / {max(times) * 1000:.0f}"
+
+
+def scenario_refresh(port, repeat):
+    """زمن تحديث القائمة كاملة وفتح تفاصيل طلب (الوسيط / الأقصى) وعدد الفشل وإعادة الاتصال"""
+    db = proxied_database(port)
+    times = []
+    details_times = []
+    failures = 0
+    order_id = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        try:
+            count = 0
+            for batch in db.iter_orders():
+                count += len(batch)
+                if batch and order_id is None:
+                    order_id = batch[0]['ID']
+        except Error as e:
+            failures += 1
+            print(f"  refresh failed: {e}")
+            continue
+        times.append(time.perf_counter() - start)
+    for _ in range(repeat if order_id is not None else 0):
+        start = time.perf_counter()
+        try:
+            db.get_order_details(order_id)
+        except Error as e:
+            failures += 1
+            print(f"  details failed: {e}")
+            continue
+        details_times.append(time.perf_counter() - start)
+    calls, round_trips = db.round_trip_stats().get('iter_orders', (0, 0))
+    db.close_connection()
+    return {
+        'refresh ms': summarize(times),
+        'details ms': summarize(details_times),
+        'orders': count if times else 0,
+        'failures': failures,
+        'reconnects': db.reconnects,
+        'retries': db.retries,
+        'round trips/call': f"{round_trips / calls:.1f}" if calls else '-',
+    }
+
+
+def read_status(direct, order_id):
+    cursor = direct.connection.cursor()
+    cursor.execute(ORDER_STATUS_QUERY, (order_id,))
+    row = cursor.fetchone()
+    cursor.close()
+    return row[0] if row else None
+
+
+def scenario_status(port, direct, order_id, repeat):
+    """تغيير حالة طلب عبر الوكيل ثم قراءتها من الخادم مباشرة بعد كل محاولة
+
+    المحاولة الناجحة يجب أن تطابق الخادم، والفاشلة يجب أن تترك الحالة
+    السابقة أو الجديدة كاملة؛ أي شيء غير ذلك يُعد خطأ (wrong).
+    """
+    db = proxied_database(port)
+    ok = failed = wrong = 0
+    times = []
+    for i in range(repeat):
+        target = STATUS_CYCLE[i % len(STATUS_CYCLE)]
+        before = read_status(direct, order_id)
+        start = time.perf_counter()
+        try:
+            (applied, reported, _), = db.apply_status_changes([(order_id, target, None)])
+        except Error:
+            reported = None
+        times.append(time.perf_counter() - start)
+        actual = read_status(direct, order_id)
+        if reported is None:
+            failed += 1
+            if actual not in (before, target):
+                wrong += 1
+        elif applied and reported == actual == target:
+            ok += 1
+        else:
+            wrong += 1
+    db.close_connection()
+    return {'status ms': summarize(times), 'ok': ok, 'failed': failed, 'wrong': wrong}
+
+
+def scenario_ui(app, repeat, timeout=120):
+    """زمن التحديث في الواجهة وأطول توقف لحلقة الأحداث أثناءه
+
+    مؤقت كل 10ms يسجل أطول فجوة بين نبضتين؛ الواجهة المستجيبة لا تتجاوز
+    فيها الفجوة عشرات الملي ثانية مهما كانت الشبكة بطيئة.
+    """
+    from PyQt6.QtCore import QTimer
+    from main import MainWindow
+
+    state = {'last': time.perf_counter(), 'gap': 0.0}
+
+    def beat():
+        now = time.perf_counter()
+        state['gap'] = max(state['gap'], now - state['last'])
+        state['last'] = now
+
+    heartbeat = QTimer()
+    heartbeat.timeout.connect(beat)
+    heartbeat.start(10)
+
+    def settle(window):
+        start = time.perf_counter()
+        while time.perf_counter() - start < timeout:
+            app.processEvents()
+            if not window.executor.is_active('orders') and not window.render_scheduler.busy():
+                return time.perf_counter() - start
+            time.sleep(0.002)
+        return None
+
+    start = time.perf_counter()
+    window = MainWindow()
+    window.show()
+    first = settle(window)
+    startup = time.perf_counter() - start if first is not None else None
+    times = []
+    for _ in range(repeat):
+        window.load_orders()
+        elapsed = settle(window)
+        if elapsed is not None:
+            times.append(elapsed)
+    heartbeat.stop()
+    window.close()
+    app.processEvents()
+    return {
+        'startup ms': f"{startup * 1000:.0f}" if startup is not None else 'timeout',
+        'ui refresh ms': summarize(times),
+        'max gap ms': f"{state['gap'] * 1000:.0f}",
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="سيناريوهات قاعدة البيانات خلف وكيل شبكة بطيئة")
+    parser.add_argument('--target', default=f"{os.getenv('DB_HOST') or '127.0.0.1'}:"
+                                            f"{os.getenv('DB_PORT') or 3306}",
+                        help="خادم MySQL التجريبي")
+    parser.add_argument('--profiles', nargs='+', choices=sorted(PROFILES),
+                        default=['lan', 'vpn', 'wan', 'flaky'])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--order-id', type=int, help="طلب تجريبي لسيناريو تغيير الحالة")
+    parser.add_argument('--ui', action='store_true', help="قياس الواجهة (offscreen)")
+    args = parser.parse_args()
+
+    target_host, target_port = parse_address(args.target)
+    proxy = FaultProxy(target_host, target_port)
+    port = proxy.start()
+
+    direct = original = app = None
+    if args.order_id:
+        direct = Database()
+        direct.host, direct.port = target_host, target_port
+        direct.ensure_connection()
+        # كل قراءة ترى آخر ما حُفظ دون لقطة معاملة قديمة
+        direct.connection.autocommit = True
+        original = read_status(direct, args.order_id)
+    if args.ui:
+        os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+        os.environ['DB_HOST'], os.environ['DB_PORT'] = '127.0.0.1', str(port)
+        from PyQt6.QtWidgets import QApplication
+        app = QApplication([])
+
+    try:
+        for name in args.profiles:
+            proxy.set_profile(name)
+            results = scenario_refresh(port, args.repeat)
+            if direct:
+                results.update(scenario_status(port, direct, args.order_id, args.repeat))
+            if app:
+                results.update(scenario_ui(app, args.repeat))
+            print(f"\n=== {name} {PROFILES[name]} ===")
+            for key, value in results.items():
+                print(f"  {key:<18} {value}")
+        print(f"\nproxy: {proxy.stats}")
+    finally:
+        if direct:
+            direct.apply_status_changes([(args.order_id, original, None)])
+            direct.close_connection()
+        proxy.stop()
+
+
+if __name__ == '__main__':
+    main()
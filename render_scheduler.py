@@ -0,0 +1,96 @@
+import time
+
+from PyQt6.QtCore import QObject, QTimer
+
+from config import RENDER_FIRST_BATCH, RENDER_SLICE_MS
+
+
+class RenderScheduler(QObject):
+    """بناء الكروت على شرائح زمنية حتى لا تتوقف الواجهة
+
+    الطلبات المتتالية (المؤقت، الفلتر، البحث) في نفس دورة الأحداث تُدمج
+    في بناء واحد. أول RENDER_FIRST_BATCH كرت تُبنى مباشرة حتى يمتلئ
+    الجزء الظاهر، والباقي على شرائح لا تتجاوز RENDER_SLICE_MS عبر مؤقت
+    بمهلة صفر فتُعالج النقرات والكتابة بينها. طلب جديد أثناء البناء
+    يلغي البناء الجاري ويبدأ من جديد بالفلتر الأحدث.
+
+    prepare() يحذف الكروت الحالية ويُرجع العناصر المطلوب عرضها بالترتيب،
+    و build_item(item) يبني كرتاً واحداً. reveal() (اختياري) يُظهر ما بُني
+    منذ آخر استدعاء؛ يُستدعى بعد الدفعة الأولى ثم كلما تضاعف عدد المبني
+    وفي النهاية، فلا يُعاد حساب تخطيط القائمة كلها بعد كل شريحة.
+    """
+
+    def __init__(self, prepare, build_item, parent=None, reveal=None,
+                 first_batch=RENDER_FIRST_BATCH, slice_ms=RENDER_SLICE_MS):
+        super().__init__(parent)
+        self.prepare = prepare
+        self.build_item = build_item
+        self.reveal = reveal
+        self.reveal_at = 0
+        self.first_batch = first_batch
+        self.slice_ms = slice_ms
+        self.items = []
+        self.position = 0
+        self.pending = False
+        self.generation = 0  # يزيد مع كل بناء جديد أو إلغاء
+        self.slice_timer = QTimer(self)
+        self.slice_timer.setInterval(0)
+        self.slice_timer.timeout.connect(self.build_slice)
+
+    def request(self):
+        if not self.pending:
+            self.pending = True
+            QTimer.singleShot(0, self.start)
+
+    def busy(self):
+        return self.pending or self.position < len(self.items)
+
+    def cancel(self):
+        self.pending = False
+        self.generation += 1
+        self.slice_timer.stop()
+        self.items = []
+        self.position = 0
+
+    def start(self):
+        if not self.pending:
+            return  # أُلغي قبل أن يبدأ
+        self.pending = False
+        self.cancel()
+        try:
+            self.items = list(self.prepare())
+        except Exception as e:
+            print(f"Error preparing orders: {e}")
+            return
+        self.build_until(min(len(self.items), self.first_batch))
+        self.reveal_at = self.first_batch * 2
+        self.reveal_built()
+        if self.position < len(self.items):
+            self.slice_timer.start()
+
+    def build_slice(self):
+        deadline = time.perf_counter() + self.slice_ms / 1000
+        generation = self.generation
+        while self.position < len(self.items) and time.perf_counter() < deadline:
+            self.build_until(self.position + 1)
+            if generation != self.generation:
+                return  # بناء أحدث بدأ من داخل build_item
+        if self.position >= len(self.items):
+            self.slice_timer.stop()
+            self.reveal_built()
+        elif self.position >= self.reveal_at:
+            self.reveal_at *= 2
+            self.reveal_built()
+
+    def reveal_built(self):
+        if self.reveal:
+            self.reveal()
+
+    def build_until(self, end):
+        while self.position < end:
+            item = self.items[self.position]
+            self.position += 1
+            try:
+                self.build_item(item)
+            except Exception as e:
+                print(f"Error building card: {e}")
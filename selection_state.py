@@ -0,0 +1,59 @@
+import json
+import os
+from datetime import datetime
+
+# ملفات حفظ مستوى التحديد (تم الاتصال) وتاريخه لكل طلب
+SELECTIONS_FILE = 'selected_cards.json'
+SELECTION_DATES_FILE = 'selection_dates.json'
+
+# صيغة عرض وقت التحديد (وهي أيضاً صيغة التخزين القديمة)
+SELECTION_TIME_FORMAT = '%Y/%m/%d %H:%M'
+
+
+def selection_level_from_value(value):
+    """تحويل القيم القديمة (true/false) إلى المستوى الجديد"""
+    if isinstance(value, bool):
+        return 1 if value else 0
+    return int(value) if str(value).isdigit() else 0
+
+
+def load_selection_levels():
+    """مستوى التحديد لكل طلب {order_id: level}"""
+    try:
+        if os.path.exists(SELECTIONS_FILE):
+            with open(SELECTIONS_FILE, 'r') as f:
+                selections = json.load(f)
+            return {key: selection_level_from_value(value) for key, value in selections.items()}
+    except Exception as e:
+        print(f"Error loading selection state: {e}")
+    return {}
+
+
+def selection_time_from_value(value):
+    """وقت التحديد بالثواني منذ epoch، مع دعم النصوص القديمة "yyyy/MM/dd hh:mm" """
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            return datetime.strptime(value, SELECTION_TIME_FORMAT).timestamp()
+        except ValueError:
+            return None
+    return None
+
+
+def format_selection_time(selected_at):
+    if not selected_at:
+        return ''
+    return datetime.fromtimestamp(selected_at).strftime(SELECTION_TIME_FORMAT)
+
+
+def load_selection_times():
+    """وقت التحديد لكل طلب {order_id: epoch}"""
+    try:
+        if os.path.exists(SELECTION_DATES_FILE):
+            with open(SELECTION_DATES_FILE, 'r', encoding='utf-8') as f:
+                dates = json.load(f)
+            return {key: selection_time_from_value(value) for key, value in dates.items()}
+    except Exception as e:
+        print(f"Error loading selection date: {e}")
+    return {}
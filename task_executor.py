@@ -0,0 +1,181 @@
+import threading
+
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, QTimer, pyqtSignal
+
+from config import DB_POOL_THREADS, DB_KEEPALIVE_IDLE
+from database import Database
+
+# أولوية المهام في الطابور: الأعلى يبدأ أولاً
+PRIORITY_USER = 2        # إجراء من المستخدم: تغيير حالة، بحث، تمرير، تصدير
+PRIORITY_DETAILS = 1     # تفاصيل طلب مفتوح
+PRIORITY_BACKGROUND = 0  # التحديث الدوري والتحميل في الخلفية
+
+
+def keep_connections_alive(task, connections):
+    for db in connections:
+        db.keepalive()
+
+
+class Task(QRunnable):
+    """مهمة قاعدة بيانات واحدة في TaskExecutor
+
+    الدالة تُستدعى بـ fn(task, *args) في أحد threads المجمع، ويمكنها
+    استخدام task.db (اتصال خاص بالـ thread)، وفحص task.cancelled بين
+    الدفعات، وإرسال نتائج جزئية بـ task.report(...).
+    """
+
+    def __init__(self, executor, fn, args, kwargs, key, generation,
+                 on_result, on_error, on_progress):
+        super().__init__()
+        # الكائن يبقى ملك Python حتى تصل نتيجته للواجهة
+        self.setAutoDelete(False)
+        self.executor = executor
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.key = key
+        self.generation = generation
+        self.on_result = on_result
+        self.on_error = on_error
+        self.on_progress = on_progress
+        self.cancelled = False
+        self.done = False
+
+    @property
+    def db(self):
+        return self.executor.thread_db()
+
+    def cancel(self):
+        self.executor.cancel(self)
+
+    def report(self, *values):
+        if not self.cancelled:
+            self.executor.task_progress.emit(self, values)
+
+    def run(self):
+        if self.cancelled:
+            self.executor.task_finished.emit(self, False, None)
+            return
+        try:
+            result = self.fn(self, *self.args, **self.kwargs)
+        except Exception as e:
+            self.executor.task_finished.emit(self, False, e)
+            return
+        self.executor.task_finished.emit(self, True, result)
+
+
+class TaskExecutor(QObject):
+    """مجمع threads واحد لكل عمليات قاعدة البيانات في الواجهة
+
+    عدد الـ threads ثابت (DB_POOL_THREADS) ولكل منها اتصال Database خاص
+    يُنشأ عند أول استخدام، فلا يتجاوز عدد الاتصالات عدد الـ threads مهما
+    كثرت الطلبات. المهام تنتظر في طابور مرتب بالأولوية.
+
+    المهام ذات المفتاح (key) يلغي أحدثها ما سبقه: ما لم يبدأ يُحذف من
+    الطابور، وما بدأ تُهمل نتائجه عند وصولها (رقم الجيل أقدم). النتائج
+    والتقدم تصل للدوال المعطاة في thread الواجهة.
+    """
+
+    task_finished = pyqtSignal(object, bool, object)  # المهمة، النجاح، النتيجة أو الخطأ
+    task_progress = pyqtSignal(object, tuple)
+
+    def __init__(self, max_threads=DB_POOL_THREADS, parent=None):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max_threads)
+        # الـ threads لا تنتهي بعد الخمول حتى يبقى اتصال كل منها صالحاً
+        self.pool.setExpiryTimeout(-1)
+        # threading.local لا يصلح هنا: حالة Python لـ thread المجمع لا تبقى بين مهمة وأخرى
+        self.connections = {}  # رقم الـ thread -> اتصاله
+        self.connections_lock = threading.Lock()
+        self.generations = {}
+        self.latest = {}  # المفتاح -> أحدث مهمة
+        self.active = set()
+        self.task_finished.connect(self.on_task_finished)
+        self.task_progress.connect(self.on_task_progress)
+        # ping الاتصالات الخاملة فقط؛ المستخدمة حديثاً لا تحتاجه
+        self.keepalive_timer = QTimer(self)
+        self.keepalive_timer.timeout.connect(self.keep_alive)
+        self.keepalive_timer.start(DB_KEEPALIVE_IDLE * 1000 // 2)
+
+    def thread_db(self):
+        """اتصال قاعدة البيانات الخاص بالـ thread الحالي"""
+        ident = threading.get_ident()
+        with self.connections_lock:
+            db = self.connections.get(ident)
+            if db is None:
+                db = self.connections[ident] = Database()
+        return db
+
+    def submit(self, fn, *args, priority=PRIORITY_BACKGROUND, key=None,
+               on_result=None, on_error=None, on_progress=None, **kwargs):
+        generation = None
+        if key is not None:
+            previous = self.latest.get(key)
+            if previous is not None:
+                self.cancel(previous)
+            generation = self.generations[key] = self.generations.get(key, 0) + 1
+        task = Task(self, fn, args, kwargs, key, generation, on_result, on_error, on_progress)
+        self.active.add(task)
+        if key is not None:
+            self.latest[key] = task
+        self.pool.start(task, priority)
+        return task
+
+    def keep_alive(self):
+        with self.connections_lock:
+            connections = list(self.connections.values())
+        if connections and not self.is_active('keepalive'):
+            self.submit(keep_connections_alive, connections, key='keepalive')
+
+    def is_active(self, key):
+        """هل توجد مهمة بهذا المفتاح لم تصل نتيجتها بعد"""
+        task = self.latest.get(key)
+        return task is not None and not task.done
+
+    def is_stale(self, task):
+        return task.cancelled or (task.key is not None
+                                  and self.generations.get(task.key) != task.generation)
+
+    def cancel(self, task):
+        if task.done:
+            return
+        task.cancelled = True
+        if self.pool.tryTake(task):
+            # لم تبدأ بعد فلن تصل منها نتيجة
+            self.finish(task)
+
+    def finish(self, task):
+        task.done = True
+        self.active.discard(task)
+        if task.key is not None and self.latest.get(task.key) is task:
+            del self.latest[task.key]
+
+    def on_task_finished(self, task, success, value):
+        if task.done:
+            return
+        self.finish(task)
+        if self.is_stale(task):
+            return
+        if success:
+            if task.on_result:
+                task.on_result(value)
+        elif task.on_error:
+            task.on_error(value)
+        else:
+            print(f"Error in {task.fn.__name__}: {value}")
+
+    def on_task_progress(self, task, values):
+        if task.on_progress and not task.done and not self.is_stale(task):
+            task.on_progress(*values)
+
+    def shutdown(self):
+        """إلغاء المهام وانتظار الجاري منها ثم إغلاق الاتصالات"""
+        self.keepalive_timer.stop()
+        for task in list(self.active):
+            self.cancel(task)
+        self.pool.waitForDone()
+        with self.connections_lock:
+            for db in self.connections.values():
+                db.close_connection()
+            self.connections = {}